@@ -0,0 +1,258 @@
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Where stage outputs are kept between runs
+STORE_PATH = os.getenv('VM_ARTIFACT_STORE', os.path.expanduser('~/.vm_orchestrator/artifacts'))
+
+# Finished jobs whose artifacts are kept; older ones are released when a newer job finishes
+KEEP_JOBS = int(os.getenv('VM_ARTIFACT_KEEP_JOBS', 3))
+
+# Unindexed object files younger than this may still be mid-put() in another process, so GC leaves them alone
+GC_GRACE_SECONDS = float(os.getenv('VM_ARTIFACT_GC_GRACE', 60 * 60))
+
+ZSTD = 'zstd'
+GZIP = 'gzip'
+RAW = 'raw'
+
+
+def digest_of(data):
+    """Content address of a blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def compress(data):
+    """(codec, bytes) - zstd when installed, else gzip; kept raw if compression doesn't pay (xlsx/pptx are zips)"""
+    if zstandard is not None:
+        codec, packed = ZSTD, zstandard.ZstdCompressor(level=10).compress(data)
+    else:
+        codec, packed = GZIP, gzip.compress(data, compresslevel=6)
+    return (codec, packed) if len(packed) < len(data) else (RAW, data)
+
+
+def decompress(codec, packed):
+    if codec == RAW:
+        return packed
+    if codec == GZIP:
+        return gzip.decompress(packed)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(packed)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+class ArtifactStore:
+    """
+    🗃️ CONTENT-ADDRESSED ARTIFACT STORE
+
+    Every stage output (research text, xlsx, pptx) lands here keyed by
+    its SHA-256, compressed once on disk. An artifact produced again -
+    same sources, same deck - only adds a reference to the existing blob.
+    References are counted per (job, stage, filename); a blob is deleted
+    when its last reference is released. Each finished job supersedes the
+    oldest: only the newest KEEP_JOBS finished jobs keep their references.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.objects = os.path.join(path, 'objects')
+        os.makedirs(self.objects, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                refs INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS refs (
+                entry INTEGER PRIMARY KEY AUTOINCREMENT,
+                digest TEXT NOT NULL REFERENCES blobs(digest),
+                job_id TEXT,
+                stage TEXT,
+                filename TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS refs_by_job ON refs(job_id);
+            CREATE TABLE IF NOT EXISTS finished_jobs (
+                job_id TEXT PRIMARY KEY,
+                finished_at REAL NOT NULL
+            );
+        """)
+
+    def execute(self, sql, params=()):
+        return self.connection.execute(sql, params).fetchall()
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def put(self, data, job_id=None, stage=None, filename=None):
+        """📥 Store bytes (once per distinct content) and add a reference; returns the digest"""
+        if isinstance(data, str):
+            data = data.encode()
+        digest = digest_of(data)
+        with self.lock:
+            exists = self.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,))
+            if exists:
+                self.execute("UPDATE blobs SET refs = refs + 1 WHERE digest = ?", (digest,))
+            else:
+                codec, packed = compress(data)
+                path = self.blob_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename, so a crash never leaves a truncated blob behind
+                temporary = f"{path}.{os.getpid()}.tmp"
+                with open(temporary, 'wb') as blob:
+                    blob.write(packed)
+                os.replace(temporary, path)
+                self.execute("INSERT INTO blobs VALUES (?, ?, ?, ?, 1, ?)",
+                             (digest, len(data), len(packed), codec, time.time()))
+            self.execute("INSERT INTO refs (digest, job_id, stage, filename, created_at) VALUES (?, ?, ?, ?, ?)",
+                         (digest, job_id, stage, filename, time.time()))
+        return digest
+
+    def has(self, digest):
+        with self.lock:
+            return bool(self.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)))
+
+    def get(self, digest):
+        """📤 The bytes stored under digest (None if there is no such blob)"""
+        with self.lock:
+            rows = self.execute("SELECT codec FROM blobs WHERE digest = ?", (digest,))
+        if not rows:
+            return None
+        with open(self.blob_path(digest), 'rb') as blob:
+            return decompress(rows[0][0], blob.read())
+
+    def latest(self, filename):
+        """Digest of the most recently stored artifact with this filename"""
+        with self.lock:
+            rows = self.execute("SELECT digest FROM refs WHERE filename = ? ORDER BY entry DESC LIMIT 1", (filename,))
+        return rows[0][0] if rows else None
+
+    def release(self, digest, count=1):
+        """🗑️ Drop references to a blob, deleting it when none are left"""
+        with self.lock:
+            self.execute("UPDATE blobs SET refs = refs - ? WHERE digest = ?", (count, digest))
+            rows = self.execute("SELECT refs FROM blobs WHERE digest = ?", (digest,))
+            if rows and rows[0][0] <= 0:
+                self.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                self.execute("DELETE FROM refs WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+
+    def release_job(self, job_id):
+        """🗑️ Drop every reference one job holds; returns how many"""
+        with self.lock:
+            rows = self.execute("SELECT digest, COUNT(*) FROM refs WHERE job_id = ? GROUP BY digest", (job_id,))
+            self.execute("DELETE FROM refs WHERE job_id = ?", (job_id,))
+        for digest, count in rows:
+            self.release(digest, count)
+        return sum(count for _, count in rows)
+
+    def finish_job(self, job_id, keep=KEEP_JOBS):
+        """🏁 Mark a job finished and release every finished job's references beyond the newest keep"""
+        with self.lock:
+            self.execute("INSERT OR REPLACE INTO finished_jobs VALUES (?, ?)", (job_id, time.time()))
+            superseded = [old for (old,) in self.execute(
+                "SELECT job_id FROM finished_jobs ORDER BY finished_at DESC LIMIT -1 OFFSET ?", (keep,))]
+            for old in superseded:
+                self.execute("DELETE FROM finished_jobs WHERE job_id = ?", (old,))
+        released = sum(self.release_job(old) for old in superseded)
+        return released, self.collect_garbage()
+
+    def collect_garbage(self, grace=GC_GRACE_SECONDS):
+        """
+        🧹 Delete blobs no reference holds any more, and object files the index has no row for; returns how many
+
+        Unindexed files (including *.tmp) are only removed once they are
+        older than grace - until then another process may be between
+        writing the file and inserting its row.
+        """
+        removed = 0
+        cutoff = time.time() - grace
+        with self.lock:
+            for (digest,) in self.execute("SELECT digest FROM blobs WHERE refs <= 0"):
+                self.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                self.execute("DELETE FROM refs WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self.blob_path(digest))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            known = {digest for (digest,) in self.execute("SELECT digest FROM blobs")}
+            # Files left by a crash between writing a blob and indexing it, or before the rename
+            for prefix in os.listdir(self.objects):
+                directory = os.path.join(self.objects, prefix)
+                for name in os.listdir(directory):
+                    if prefix + name in known:
+                        continue
+                    try:
+                        path = os.path.join(directory, name)
+                        if os.path.getmtime(path) > cutoff:
+                            continue
+                        os.remove(path)
+                    except FileNotFoundError:
+                        # Renamed or removed by another process meanwhile
+                        continue
+                    removed += 1
+        return removed
+
+    def stats(self):
+        """📊 Blob count, logical vs unique vs on-disk bytes, and the dedup / compression ratios"""
+        with self.lock:
+            blobs, unique, stored, logical, references = self.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0), "
+                "COALESCE(SUM(size * refs), 0), COALESCE(SUM(refs), 0) FROM blobs")[0]
+        return {
+            'blobs': blobs,
+            'references': references,
+            'logical_bytes': logical,
+            'unique_bytes': unique,
+            'stored_bytes': stored,
+            'dedup_ratio': logical / unique if unique else None,
+            'compression_ratio': unique / stored if stored else None,
+        }
+
+    def print_status(self):
+        stats = self.stats()
+
+        def ratio(value):
+            return f"{value:.2f}x" if value is not None else "n/a"
+        print(f"🗃️ ARTIFACT STORE: {stats['blobs']} blob(s) for {stats['references']} artifact(s), "
+              f"{stats['stored_bytes'] / 1024:.1f} KB on disk ({stats['logical_bytes'] / 1024:.1f} KB stored logically)")
+        print(f"   dedup {ratio(stats['dedup_ratio'])}, compression {ratio(stats['compression_ratio'])} "
+              f"({ZSTD if zstandard else GZIP}) - {self.path}")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+STORE = None
+STORE_LOCK = threading.Lock()
+
+
+def artifact_store():
+    """🗃️ The process-wide store (opened on first use)"""
+    global STORE
+    with STORE_LOCK:
+        if STORE is None:
+            STORE = ArtifactStore()
+        return STORE
@@ -0,0 +1,208 @@
+import time
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_computer import FakeComputer
+from stage_scheduler import StageCompletion
+
+
+class AsyncComputer:
+    """
+    ⚡ ASYNC ADAPTER FOR orgo.Computer
+
+    Uses a native coroutine (aprompt / prompt_async) when the client
+    provides one, otherwise runs the blocking prompt() on the engine's
+    shared executor so the event loop never blocks.
+    """
+
+    NATIVE_ASYNC_METHODS = ('aprompt', 'prompt_async')
+
+    def __init__(self, computer, executor=None):
+        self.computer = computer
+        self.executor = executor
+
+    def native_prompt(self):
+        """Return the client's own async prompt method, if it has one"""
+        for name in self.NATIVE_ASYNC_METHODS:
+            method = getattr(self.computer, name, None)
+            if method is not None and inspect.iscoroutinefunction(method):
+                return method
+        return None
+
+    async def prompt(self, instruction):
+        """🤖 Await a prompt on the wrapped VM"""
+        native = self.native_prompt()
+        if native is not None:
+            return await native(instruction)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.computer.prompt, instruction)
+
+    async def destroy(self):
+        """🧹 Release the wrapped VM without blocking the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.computer.destroy)
+
+
+class AsyncOrchestrationEngine:
+    """
+    🌀 ASYNCIO ORCHESTRATION CORE
+
+    One event loop drives every in-flight VM session. Blocking prompts
+    share one bounded executor instead of each job spawning its own
+    threads and monitor loop, so a single process can multiplex hundreds
+    of sessions across many jobs.
+    """
+
+    def __init__(self, max_in_flight=256):
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="vm-prompt")
+
+        self.semaphore = None
+        self.semaphore_loop = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed_prompts = 0
+
+    def wrap(self, computer):
+        """Adapt a Computer (or FakeComputer) to the async interface"""
+        if isinstance(computer, AsyncComputer):
+            return computer
+        return AsyncComputer(computer, self.executor)
+
+    def gate(self):
+        """Semaphore bounding in-flight prompts (recreated per event loop)"""
+        loop = asyncio.get_running_loop()
+        if self.semaphore_loop is not loop:
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+            self.semaphore_loop = loop
+        return self.semaphore
+
+    async def prompt(self, computer, instruction):
+        """🤖 Run one VM prompt through the shared executor"""
+        async with self.gate():
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return await self.wrap(computer).prompt(instruction)
+            finally:
+                self.in_flight -= 1
+                self.completed_prompts += 1
+
+    async def run_blocking(self, func, *args):
+        """Run any other blocking call (destroy, file transfer, ...) off the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def run_stages(self, stages):
+        """
+        🕸️ Async stage DAG
+
+        stages: list of (name, coroutine_function, depends_on) in
+        dependency order. Returns {name: StageCompletion}; stages
+        downstream of a failure are skipped, never left waiting.
+        """
+        completions = {}
+        tasks = {}
+
+        async def run_one(name, func, depends_on):
+            for upstream in depends_on:
+                await asyncio.wait([tasks[upstream]])
+                if not completions[upstream].succeeded():
+                    completions[name].set_skipped(f"upstream '{upstream}' {completions[upstream].outcome}")
+                    print(f"⏭️ Stage '{name}' skipped: {completions[name].reason}")
+                    return
+            try:
+                result = await func()
+            except Exception as e:
+                print(f"❌ Stage '{name}' failed: {e}")
+                completions[name].set_failure(e)
+            else:
+                completions[name].set_result(result)
+
+        for name, func, depends_on in stages:
+            for upstream in depends_on:
+                if upstream not in completions:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{upstream}'")
+            completions[name] = StageCompletion(name)
+            tasks[name] = asyncio.ensure_future(run_one(name, func, depends_on))
+
+        await asyncio.gather(*tasks.values())
+        return completions
+
+    async def run_jobs(self, jobs):
+        """🚀 Drive many independent job coroutines concurrently on one loop"""
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    def shutdown(self):
+        """🧹 Release executor threads"""
+        self.executor.shutdown(wait=False)
+
+
+async def await_completion(completion):
+    """📬 Await a thread-safe StageCompletion from inside the event loop"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def wake(done):
+        loop.call_soon_threadsafe(lambda: future.done() or future.set_result(done))
+
+    completion.add_done_callback(wake)
+    return await future
+
+
+def run_sync(coroutine):
+    """
+    🔁 Compatibility shim: drive a coroutine from synchronous code
+
+    Uses asyncio.run() normally; if the caller is already inside a
+    running loop, the coroutine runs on a helper thread's own loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    outcome = {}
+
+    def runner():
+        try:
+            outcome['result'] = asyncio.run(coroutine)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=runner, name="run-sync")
+    thread.start()
+    thread.join()
+
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+
+def benchmark_engine(sessions=300, latency=2.0, jitter=1.0):
+    """🧪 Multiplex many fake VM sessions from one event loop"""
+    engine = AsyncOrchestrationEngine(max_in_flight=sessions)
+    vms = [FakeComputer(f"fake-{index}", latency=latency, jitter=jitter, seed=index) for index in range(sessions)]
+
+    async def drive():
+        return await engine.run_jobs([engine.prompt(vm, f"task {index}") for index, vm in enumerate(vms)])
+
+    start = time.time()
+    run_sync(drive())
+    elapsed = time.time() - start
+    engine.shutdown()
+
+    print("\n🌀 ASYNC ENGINE BENCHMARK:")
+    print(f"   {sessions} concurrent sessions, {latency}s (+{jitter}s jitter) each")
+    print(f"   Wall time: {elapsed:.2f}s on one event loop")
+    print(f"   Peak in-flight prompts: {engine.peak_in_flight}")
+    print(f"   Serial equivalent: ~{sessions * (latency + jitter / 2):.0f}s")
+
+    return {'elapsed': elapsed, 'peak_in_flight': engine.peak_in_flight}
+
+
+if __name__ == "__main__":
+    benchmark_engine()
@@ -0,0 +1,271 @@
+import os
+import math
+import time
+import asyncio
+import itertools
+import threading
+
+from async_engine import run_sync
+from concurrency_limiter import limited
+from fake_computer import FakeComputer
+from stage_stats import stage_key
+from vm_pool import GENERIC, VMPool
+from vm_provisioning import Provisioning, provision_vms
+from vm_registry import VMRegistry
+
+# Bounds on how many VMs the autoscaler keeps in the pool
+MIN_VMS = int(os.getenv('VM_AUTOSCALE_MIN', 1))
+MAX_VMS = int(os.getenv('VM_AUTOSCALE_MAX', 8))
+
+# Queued work should drain within this many seconds
+TARGET_LATENCY = float(os.getenv('VM_AUTOSCALE_TARGET_LATENCY', 15 * 60))
+
+# Seconds between scaling decisions, and after a change before the next one in each direction
+SCALE_INTERVAL = 10
+SCALE_UP_COOLDOWN = 60
+SCALE_DOWN_COOLDOWN = 5 * 60
+
+
+class FakeProvisioningBackend:
+    """
+    🧪 FAKE VM PROVIDER
+
+    create() blocks for boot_seconds like a real cloud VM start, then
+    hands back a FakeComputer; counts live machines and VM-seconds paid
+    for so autoscaling policies can be compared offline.
+    """
+
+    def __init__(self, boot_seconds=1.0, latency=0.2, jitter=0.0):
+        self.boot_seconds = boot_seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.live = {}
+        self.created = 0
+        self.vm_seconds = 0.0
+
+    def create(self):
+        time.sleep(self.boot_seconds)
+        backend = self
+
+        class BilledComputer(FakeComputer):
+            def destroy(self):
+                super().destroy()
+                backend.released(self)
+
+        computer = BilledComputer(f"fake-{next(self.counter)}", latency=self.latency, jitter=self.jitter)
+        with self.lock:
+            self.created += 1
+            self.live[id(computer)] = time.time() - self.boot_seconds
+        return computer
+
+    def released(self, computer):
+        with self.lock:
+            started = self.live.pop(id(computer), None)
+            if started is not None:
+                self.vm_seconds += time.time() - started
+
+    def billed_seconds(self):
+        """💰 VM-seconds paid for so far, counting machines that are still up"""
+        with self.lock:
+            return self.vm_seconds + sum(time.time() - started for started in self.live.values())
+
+
+class PoolAutoscaler:
+    """
+    📈 QUEUE-DEPTH AUTOSCALER FOR A VMPool
+
+    Every interval seconds it estimates the queued work (each pending
+    stage at its median historical duration, running stages at half of
+    one) and sizes the pool so that work drains within target_latency,
+    clamped to [min_vms, max_vms]. It only adds or removes machines it
+    created itself, never while the last change in that direction is
+    still cooling down, and only removes idle ones - one per tick, so
+    a brief lull doesn't tear the pool down.
+
+    With max_added, the bounds are instead taken from the pool when
+    scaling starts: never below the machines already attached, and at
+    most max_added of its own on top of them.
+    """
+
+    def __init__(self, pool, factory, capabilities=(GENERIC,), min_vms=MIN_VMS, max_vms=MAX_VMS,
+                 target_latency=TARGET_LATENCY, interval=SCALE_INTERVAL, up_cooldown=SCALE_UP_COOLDOWN,
+                 down_cooldown=SCALE_DOWN_COOLDOWN, wrap=limited, register=True, max_added=None):
+        if min_vms > max_vms:
+            raise ValueError(f"min_vms ({min_vms}) is larger than max_vms ({max_vms})")
+        self.pool = pool
+        self.factory = factory
+        self.capabilities = list(capabilities)
+        self.min_vms = min_vms
+        self.max_vms = max_vms
+        self.target_latency = target_latency
+        self.interval = interval
+        self.up_cooldown = up_cooldown
+        self.down_cooldown = down_cooldown
+        self.wrap = wrap
+        self.max_added = max_added
+
+        self.provisioning = Provisioning(register=register)
+        self.owned = {}
+        self.booting = 0
+        self.counter = itertools.count(1)
+        self.last_up = None
+        self.last_down = None
+        self.task = None
+        self.boots = set()
+
+        # (time, pool size incl. booting, queue depth, desired size) per tick
+        self.history = []
+        self.scale_ups = 0
+        self.scale_downs = 0
+
+    def start(self):
+        """▶️ Start scaling (call while the pool is running)"""
+        if self.max_added is not None:
+            attached = len(self.pool.vms) - len(self.owned)
+            self.min_vms = attached
+            self.max_vms = attached + self.max_added
+        self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """⏹️ Stop scaling; machines it added stay until release()"""
+        for task in [self.task, *self.boots]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*[task for task in [self.task, *self.boots] if task is not None],
+                             return_exceptions=True)
+        self.task = None
+
+    async def run(self):
+        while True:
+            await self.tick()
+            await asyncio.sleep(self.interval)
+
+    def stage_seconds(self, task):
+        return self.pool.durations.expected(stage_key(task.template, task.capability), task.capability)
+
+    def desired_size(self):
+        """🎯 Pool size that drains the current backlog within target_latency"""
+        pending = list(self.pool.pending)
+        busy = [vm for vm in self.pool.vms if vm.busy]
+        typical = self.pool.durations.expected(*self.capabilities)
+        work = sum(self.stage_seconds(task) for task in pending) + len(busy) * typical / 2
+        wanted = math.ceil(work / self.target_latency) if work else 0
+        # Never plan below what is busy right now
+        return max(self.min_vms, min(self.max_vms, max(wanted, len(busy))))
+
+    def size(self):
+        return len(self.pool.vms) + self.booting
+
+    async def tick(self):
+        """📏 One scaling decision"""
+        now = time.time()
+        desired = self.desired_size()
+        size = self.size()
+        self.history.append((now, size, len(self.pool.pending), desired))
+
+        if desired > size and self.cooled_down(self.last_up, self.up_cooldown, now):
+            self.last_up = now
+            self.scale_ups += 1
+            count = desired - size
+            print(f"📈 Autoscaler: {len(self.pool.pending)} queued stage(s) - adding {count} VM(s) ({size} → {desired})")
+            for _ in range(count):
+                self.booting += 1
+                boot = asyncio.ensure_future(self.add_one())
+                self.boots.add(boot)
+                boot.add_done_callback(self.boots.discard)
+        elif desired < size and self.cooled_down(self.last_down, self.down_cooldown, now):
+            if self.remove_one():
+                self.last_down = now
+                self.scale_downs += 1
+
+    @staticmethod
+    def cooled_down(last, cooldown, now):
+        return last is None or now - last >= cooldown
+
+    async def add_one(self):
+        """🥶 Boot one machine and put it into rotation"""
+        name = f"auto-{next(self.counter)}"
+        try:
+            await self.pool.engine.run_blocking(
+                lambda: provision_vms({name: self.factory}, wrap=self.wrap, provisioning=self.provisioning))
+        finally:
+            self.booting -= 1
+        computer = self.provisioning.computers.get(name)
+        if computer is not None:
+            self.owned[name] = self.pool.add_vm(computer, self.capabilities, name=name)
+
+    def remove_one(self):
+        """📉 Release one idle machine this autoscaler added (False if none is idle)"""
+        for name, vm in reversed(list(self.owned.items())):
+            if len(self.pool.vms) <= self.min_vms:
+                return False
+            if self.pool.remove_vm(vm):
+                del self.owned[name]
+                computer = self.provisioning.computers.pop(name)
+                print(f"📉 Autoscaler: releasing idle {name} ({len(self.pool.vms) + self.booting} VM(s) left)")
+                self.pool.loop.run_in_executor(self.pool.engine.executor, self.provisioning.discard, computer)
+                return True
+        return False
+
+    def release(self):
+        """🧹 Tear down every machine the autoscaler still holds"""
+        for vm in self.owned.values():
+            self.pool.remove_vm(vm)
+        self.owned = {}
+        return self.provisioning.release()
+
+    def print_status(self):
+        peak = max((size for _, size, _, _ in self.history), default=self.size())
+        print(f"📈 AUTOSCALER: {self.size()} VM(s) now, peak {peak}, bounds [{self.min_vms}, {self.max_vms}], "
+              f"{self.scale_ups} scale-up(s), {self.scale_downs} scale-down(s)")
+
+
+def benchmark_autoscaler(stages=40, latency=0.2, boot_seconds=0.5, max_vms=8):
+    """🧪 A burst of stages on one fixed VM vs an autoscaled pool, on a fake provider with boot delays"""
+    print("\n📈 AUTOSCALER BENCHMARK:")
+    print(f"   burst of {stages} stages x {latency}s, VMs take {boot_seconds}s to boot")
+    results = {}
+
+    for autoscale in (False, True):
+        backend = FakeProvisioningBackend(boot_seconds=boot_seconds, latency=latency)
+        pool = VMPool(health_interval=None)
+        for _ in range(stages):
+            pool.durations.record(GENERIC, latency)
+        # Fake machines go in a throwaway registry so the reaper never goes looking for them
+        scaler = PoolAutoscaler(pool, backend.create, min_vms=1, max_vms=max_vms if autoscale else 1,
+                                target_latency=1.0, interval=0.1, up_cooldown=0.5, down_cooldown=0.3,
+                                wrap=None, register=False)
+        scaler.provisioning.registry = VMRegistry(':memory:')
+
+        async def drive():
+            async with pool.running():
+                scaler.start()
+                while not pool.vms:
+                    await asyncio.sleep(0.05)
+                await asyncio.gather(*[pool.run(GENERIC, f"stage {index}") for index in range(stages)])
+                drained_at.append(time.time())
+                # Give the scaler time to shrink back down, one idle VM per cooldown
+                deadline = time.time() + 10
+                while scaler.size() > scaler.min_vms and time.time() < deadline:
+                    await asyncio.sleep(0.05)
+                await scaler.stop()
+
+        drained_at = []
+        start = time.time()
+        run_sync(drive())
+        elapsed = drained_at[0] - start
+        scaler.print_status()
+        scaler.release()
+        pool.engine.shutdown()
+
+        results[autoscale] = {'makespan': elapsed, 'vm_seconds': backend.billed_seconds()}
+        name = f"autoscaled 1-{max_vms} VMs" if autoscale else "fixed 1 VM"
+        print(f"   {name}: burst drained in {elapsed:.1f}s, {backend.billed_seconds():.1f} VM-seconds billed")
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_autoscaler()
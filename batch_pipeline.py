@@ -0,0 +1,388 @@
+import sys
+import time
+import asyncio
+
+from orgo import Computer
+
+from async_engine import await_completion, run_sync
+from autoscaler import FakeProvisioningBackend, PoolAutoscaler
+from concurrency_limiter import limited
+from fake_computer import FakeComputer
+from one_prompt_orchestrator import OnePromptOrchestrator
+from research_fanout import ResearchFanout
+from stage_stats import stage_key
+from vm_pool import RESEARCH, PROCESSING, PRESENTATION
+from vm_provisioning import add_stage_vms
+
+# Each prompt's stages. Their prompts are self-contained, so they run side by side;
+# only with research fanout does processing wait for (and get handed) the merged research notes
+PIPELINE_STAGES = [
+    (RESEARCH, 'vm1_task'),
+    (PROCESSING, 'vm2_task'),
+    (PRESENTATION, 'vm3_task'),
+]
+
+
+class BatchJob:
+    """📦 One prompt's research, processing and presentation stages"""
+
+    def __init__(self, index, prompt, timeout=None):
+        self.index = index
+        self.prompt = prompt
+        self.stage_tasks = {}
+        self.completions = {}
+        self.research_notes = None
+        self.template = None
+        self.predicted_seconds = None
+
+        self.submitted_at = time.time()
+        self.finished_at = None
+        # Every stage of the job must finish by this time.time()
+        self.deadline = self.submitted_at + timeout if timeout else None
+
+    def succeeded(self):
+        return bool(self.completions) and all(c.succeeded() for c in self.completions.values())
+
+
+class BatchPipeline:
+    """
+    🏭 PIPELINED MULTI-PROMPT BATCH MODE
+
+    Plans every prompt with OnePromptOrchestrator's create_*_tasks
+    planners, then streams the jobs through the VM pool. A job's stages
+    run side by side, as in orchestrate_task, and each stage VM moves on
+    to the next prompt as soon as it is done, so a job takes its longest
+    stage rather than the sum. Reports steady-state throughput and
+    per-stage utilization.
+    With research_fanout > 1 the research stage is split across several
+    research VMs and the merged notes are handed to the processing stage,
+    which then waits for them.
+    With job_timeout set, each prompt must finish within that many seconds
+    of arriving; jobs closest to their deadline get free VMs first.
+    With critical_path_first, each stage is tagged with the predicted time
+    left in its job (from measured per-template history) so the pool
+    starts the longest jobs first.
+    """
+
+    def __init__(self, orchestrator, research_fanout=1, job_timeout=None, critical_path_first=True, autoscaler=None):
+        self.orchestrator = orchestrator
+        # Adds generic VMs on top of the three stage VMs while the queue is deep
+        self.autoscaler = autoscaler
+        self.job_timeout = job_timeout
+        self.critical_path_first = critical_path_first
+        self.pool = orchestrator.pool
+        self.engine = orchestrator.engine
+        self.fanout = ResearchFanout(self.pool, research_fanout) if research_fanout > 1 else None
+        self.jobs = []
+
+        self.started_at = None
+        self.finished_at = None
+
+    def upstream_of(self, capability):
+        """Stages this stage waits for - only processing, on fanned-out research notes"""
+        return [RESEARCH] if self.fanout and capability == PROCESSING else []
+
+    def remaining_path(self, job, capability):
+        """🛤️ Predicted seconds from the start of this stage to the end of the job (this stage plus any that wait on it)"""
+        chain = [capability] + [stage for stage, _ in PIPELINE_STAGES if capability in self.upstream_of(stage)]
+        return self.pool.durations.predict_chain(job.template, chain)
+
+    async def run_stage(self, job, capability, instruction):
+        """Queue one stage of one job on the pool and wait for it"""
+        critical_path = self.remaining_path(job, capability) if self.critical_path_first else 0.0
+        task = await self.pool.submit(capability, instruction, label=f"job{job.index}-{capability}",
+                                      deadline=job.deadline, template=job.template, critical_path=critical_path)
+        job.stage_tasks[capability] = task
+        await await_completion(task.completion)
+        return task.completion.get()
+
+    async def run_fanout_research(self, job):
+        """🗺️ Research stage split across several VMs; keeps the merged notes on the job"""
+        start = time.time()
+        parts = await self.fanout.gather_parts(job.prompt, job.deadline)
+        job.research_notes = self.fanout.merge(job.prompt, parts)
+        job.stage_tasks[RESEARCH] = FanoutTiming(start, time.time(), sum(part['seconds'] for part in parts))
+        return job.research_notes
+
+    async def run_processing_with_notes(self, job, instruction):
+        """⚙️ Processing stage with the merged research pasted in (no file hunting)"""
+        instruction = f"{instruction}\n\nRESEARCH NOTES (merged from parallel research VMs):\n{job.research_notes}"
+        return await self.run_stage(job, PROCESSING, instruction)
+
+    async def run_job(self, job):
+        """🔗 Run one prompt's stages side by side (processing after research when fanned-out notes are handed over)"""
+        task_plan = self.orchestrator.analyze_prompt_and_create_tasks(job.prompt)
+        job.template = task_plan['template']
+        prediction = ""
+        if self.pool.durations.count(stage_key(job.template, RESEARCH)):
+            job.predicted_seconds = self.pool.durations.predict_chain(
+                job.template, [capability for capability, _ in PIPELINE_STAGES])
+            prediction = f" (predicted ~{job.predicted_seconds:.0f}s of stage time)"
+        print(f"📥 Job {job.index}: '{job.prompt}' → {task_plan['research_focus']}{prediction}")
+
+        stages = []
+        for capability, plan_key in PIPELINE_STAGES:
+            instruction = task_plan[plan_key]
+            if self.fanout and capability == RESEARCH:
+                run = lambda: self.run_fanout_research(job)
+            elif self.fanout and capability == PROCESSING:
+                run = lambda instruction=instruction: self.run_processing_with_notes(job, instruction)
+            else:
+                run = lambda capability=capability, instruction=instruction: self.run_stage(job, capability, instruction)
+            stages.append((capability, run, self.upstream_of(capability)))
+
+        job.completions = await self.engine.run_stages(stages)
+        job.finished_at = time.time()
+
+        status = "✅ done" if job.succeeded() else "❌ failed"
+        print(f"📤 Job {job.index} {status} after {job.finished_at - job.submitted_at:.1f}s")
+        return job
+
+    async def run_stream_async(self, prompts):
+        """🚰 Start each job the moment its prompt arrives (prompts may be a slow stream)"""
+        self.started_at = time.time()
+        running = []
+        iterator = iter(prompts)
+        sentinel = object()
+
+        # A batch keeps every stage busy, so it is always worth one VM per stage
+        await self.engine.run_blocking(self.orchestrator.attach_stage_vms, len(PIPELINE_STAGES))
+        add_stage_vms(self.pool, self.orchestrator.provisioning)
+
+        async with self.pool.running():
+            if self.autoscaler:
+                self.autoscaler.start()
+            while True:
+                # Reading the next prompt may block (stdin, pipe), so keep it off the loop
+                prompt = await self.engine.run_blocking(next, iterator, sentinel)
+                if prompt is sentinel:
+                    break
+                job = BatchJob(len(self.jobs) + 1, prompt, self.job_timeout)
+                self.jobs.append(job)
+                running.append(asyncio.ensure_future(self.run_job(job)))
+
+            await asyncio.gather(*running)
+            if self.autoscaler:
+                await self.autoscaler.stop()
+
+        self.finished_at = time.time()
+        return self.jobs
+
+    def run_batch(self, prompts):
+        """🏭 Synchronous entry point"""
+        run_sync(self.run_stream_async(prompts))
+        self.pool.durations.save()
+        self.print_report()
+        return self.jobs
+
+    def steady_state_throughput(self):
+        """⚡ Jobs/hour between the first and last completion (excludes pipeline fill time)"""
+        finishes = sorted(job.finished_at for job in self.jobs if job.succeeded())
+        if len(finishes) < 2 or finishes[-1] == finishes[0]:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            return len(finishes) * 3600 / elapsed if elapsed > 0 else 0.0
+        return (len(finishes) - 1) * 3600 / (finishes[-1] - finishes[0])
+
+    def stage_utilization(self):
+        """📊 Busy fraction per stage over the batch wall time"""
+        elapsed = max((self.finished_at or time.time()) - self.started_at, 1e-9)
+        utilization = {}
+        for capability, _ in PIPELINE_STAGES:
+            busy = sum(busy_seconds(job.stage_tasks[capability])
+                       for job in self.jobs if capability in job.stage_tasks)
+            specialists = [vm for vm in self.pool.vms if capability in vm.capabilities]
+            capacity = len(specialists) or len([vm for vm in self.pool.vms if vm.can_run(capability)]) or 1
+            utilization[capability] = min(busy / (elapsed * capacity), 1.0)
+        return utilization
+
+    def prediction_error(self):
+        """📏 Mean |predicted - measured| stage seconds per finished job (None if nothing to compare)"""
+        errors = [abs(job.predicted_seconds - sum(busy_seconds(task) for task in job.stage_tasks.values()))
+                  for job in self.jobs if job.succeeded() and job.predicted_seconds is not None]
+        return sum(errors) / len(errors) if errors else None
+
+    def print_report(self):
+        """🏁 Batch summary"""
+        completed = sum(1 for job in self.jobs if job.succeeded())
+        elapsed = (self.finished_at or time.time()) - self.started_at
+
+        print("\n🏭 BATCH PIPELINE REPORT:")
+        print("=" * 70)
+        print(f"   Jobs: {completed} completed, {len(self.jobs) - completed} failed")
+        print(f"   Wall time: {elapsed:.1f}s")
+        print(f"   Steady-state throughput: {self.steady_state_throughput():.1f} jobs/hour")
+        error = self.prediction_error()
+        if error is not None:
+            print(f"   Stage-time prediction error: {error:.1f}s per job on average")
+        print("   Stage utilization:")
+        for capability, value in self.stage_utilization().items():
+            print(f"      {capability}: {value:.0%}")
+        self.pool.print_pool_status()
+        if self.autoscaler:
+            self.autoscaler.print_status()
+
+
+class FanoutTiming:
+    """Start/finish of a fanned-out research stage, shaped like a StageTask for reporting"""
+
+    def __init__(self, started_at, finished_at, busy_seconds):
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.busy_seconds = busy_seconds
+
+
+def busy_seconds(task):
+    """VM-seconds a stage consumed (summed across VMs for fanned-out research)"""
+    if isinstance(task, FanoutTiming):
+        return task.busy_seconds
+    if task.started_at is None or task.finished_at is None:
+        return 0.0
+    return task.finished_at - task.started_at
+
+
+def read_prompts(stream):
+    """📜 Yield one prompt per non-empty line, skipping # comments"""
+    for line in stream:
+        prompt = line.strip()
+        if prompt and not prompt.startswith('#'):
+            yield prompt
+
+
+def simulated_orchestrator(latencies=None, research_vms=1):
+    """🧪 OnePromptOrchestrator backed by FakeComputers (no Orgo calls)"""
+    latencies = latencies or {RESEARCH: 0.3, PROCESSING: 0.3, PRESENTATION: 0.3}
+    # Simulated timings must not end up in the real duration history
+    orchestrator = OnePromptOrchestrator(computers=[
+        FakeComputer("vm1", latency=latencies[RESEARCH]),
+        FakeComputer("vm2", latency=latencies[PROCESSING]),
+        FakeComputer("vm3", latency=latencies[PRESENTATION]),
+    ], history_path=None)
+    for index in range(2, research_vms + 1):
+        orchestrator.pool.add_vm(FakeComputer(f"research{index}", latency=latencies[RESEARCH]),
+                                 [RESEARCH], name=f"research{index}")
+    return orchestrator
+
+
+def benchmark_critical_path(unit=0.1, jobs_per_template=3, generic_vms=1):
+    """
+    🧪 Makespan of a mixed batch, submission order vs longest-critical-path first
+
+    'general' jobs are short after research; 'creative' jobs have long
+    processing and presentation stages but are submitted last. A job's
+    stages are independent, so with one VM per stage every order gives
+    the same makespan; the generic VMs, which take any stage, are where
+    picking the longest stages first pays off.
+    """
+    stage_units = {
+        'general': {RESEARCH: 1.0, PROCESSING: 0.2, PRESENTATION: 0.2},
+        'creative': {RESEARCH: 1.0, PROCESSING: 2.0, PRESENTATION: 2.0},
+    }
+    prompts = ([f"Summarize quarterly results {index}" for index in range(jobs_per_template)] +
+               [f"Create a brand identity {index}" for index in range(jobs_per_template)])
+
+    print("\n🛤️ CRITICAL-PATH DISPATCH BENCHMARK:")
+    print(f"   {jobs_per_template} general then {jobs_per_template} creative jobs, "
+          f"one VM per stage + {generic_vms} generic VM(s)")
+    results = {}
+
+    for critical_path_first in (False, True):
+        orchestrator = simulated_orchestrator()
+        plans = {prompt: orchestrator.analyze_prompt_and_create_tasks(prompt) for prompt in prompts}
+
+        def latency(instruction):
+            for plan in plans.values():
+                for capability, plan_key in PIPELINE_STAGES:
+                    if plan[plan_key].strip() in instruction:
+                        return stage_units[plan['template']][capability] * unit
+            return unit
+
+        for vm in orchestrator.provisioning.computers.values():
+            vm.latency = latency
+        for index in range(1, generic_vms + 1):
+            orchestrator.pool.add_vm(FakeComputer(f"generic{index}", latency=latency), name=f"generic{index}")
+
+        # History from earlier runs
+        for template, units in stage_units.items():
+            for capability, value in units.items():
+                orchestrator.durations.record(stage_key(template, capability), value * unit)
+
+        pipeline = BatchPipeline(orchestrator, critical_path_first=critical_path_first)
+        run_sync(pipeline.run_stream_async(prompts))
+        orchestrator.engine.shutdown()
+
+        makespan = pipeline.finished_at - pipeline.started_at
+        name = "longest critical path first" if critical_path_first else "submission order"
+        results[name] = makespan
+        print(f"   {name}: makespan {makespan / unit:.1f} units")
+
+    return results
+
+
+def option(name, default):
+    """Read a --name=value command line option"""
+    for arg in sys.argv[1:]:
+        if arg.startswith(f"--{name}="):
+            return arg.split('=', 1)[1]
+    return default
+
+
+def main():
+    """🏭 Batch entry point: python3 batch_pipeline.py prompts.txt [--simulate] [--fanout=K] [--timeout=SECONDS] [--autoscale=MAX]
+
+    python3 batch_pipeline.py --benchmark compares submission-order and
+    critical-path-first dispatch on a simulated mixed batch instead.
+    """
+    if '--benchmark' in sys.argv:
+        benchmark_critical_path()
+        return
+
+    print("🏭 PIPELINED BATCH ORCHESTRATOR")
+    print("=" * 80)
+    print("📋 Each prompt's stages run side by side; every VM moves on to the next prompt when it is done")
+    print("=" * 80)
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    simulate = '--simulate' in sys.argv
+    research_fanout = int(option('fanout', 1))
+    job_timeout = float(option('timeout', 0)) or None
+    autoscale = int(option('autoscale', 0))
+
+    path = args[0] if args else input("\n📜 Prompts file (one per line, '-' for stdin): ").strip()
+    if not path:
+        print("❌ No prompts file given. Exiting...")
+        return
+
+    orchestrator = simulated_orchestrator(research_vms=research_fanout) if simulate else OnePromptOrchestrator()
+    autoscaler = None
+    if autoscale:
+        # Extra generic VMs on top of the stage (and fanout research) VMs attached when the batch starts
+        if simulate:
+            # Simulated stages take 0.3s, so scale on a matching time scale
+            autoscaler = PoolAutoscaler(orchestrator.pool, FakeProvisioningBackend(boot_seconds=1.0, latency=0.3).create,
+                                        target_latency=1.0, interval=0.2, up_cooldown=1.0, down_cooldown=1.0,
+                                        wrap=None, register=False, max_added=autoscale)
+        else:
+            autoscaler = PoolAutoscaler(orchestrator.pool,
+                                        lambda: Computer(project_id="yourcomputerid", api_key=orchestrator.api_key),
+                                        wrap=limited, max_added=autoscale)
+    pipeline = BatchPipeline(orchestrator, research_fanout=research_fanout, job_timeout=job_timeout,
+                             autoscaler=autoscaler)
+
+    try:
+        if path == '-':
+            pipeline.run_batch(read_prompts(sys.stdin))
+        else:
+            with open(path) as stream:
+                pipeline.run_batch(read_prompts(stream))
+    except KeyboardInterrupt:
+        print("\n⚠️ Batch interrupted by user")
+    except Exception as e:
+        print(f"\n❌ Error in batch: {e}")
+    finally:
+        if autoscaler:
+            autoscaler.release()
+        orchestrator.cleanup()
+
+
+if __name__ == "__main__":
+    main()
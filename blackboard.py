@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+
+from status_log import StatusLog
+
+# Sections of the shared memory every stage can read and write
+TASK = 'task'
+RESEARCH = 'vm1_research'
+ANALYSIS = 'vm2_analysis'
+PRESENTATION = 'vm3_presentation'
+INSIGHTS = 'insights'
+STATUS = 'status'
+
+SECTIONS = {
+    TASK: "TASK",
+    RESEARCH: "VM1 RESEARCH SECTION",
+    ANALYSIS: "VM2 ANALYSIS SECTION",
+    PRESENTATION: "VM3 PRESENTATION SECTION",
+    INSIGHTS: "SHARED INSIGHTS",
+    STATUS: "STATUS UPDATES",
+}
+
+# How long a blocking read waits for a section before giving up
+READ_TIMEOUT = float(os.getenv('VM_BLACKBOARD_TIMEOUT', 10 * 60))
+
+
+class VersionConflict(Exception):
+    """A conditional write lost the race: the section moved on since it was read"""
+
+
+class Entry:
+    """📌 One version of a section"""
+
+    def __init__(self, value, version, writer):
+        self.value = value
+        self.version = version
+        self.writer = writer
+        self.written_at = time.time()
+
+
+class Blackboard:
+    """
+    🧠 ORCHESTRATOR-HOSTED SHARED MEMORY
+
+    Sectioned key/value store that backs SHARED_MEMORY. Every write bumps
+    the section's version (optionally only if the writer saw the latest
+    one), and read() blocks until a section reaches the version asked
+    for, so a downstream stage picks up its input the moment the upstream
+    stage publishes it - no agent hunting for a file in a GUI.
+
+    STATUS UPDATES is not a section value but an append-only StatusLog
+    (the orchestrator's own, if it passes one): updates are appended,
+    never rewritten, and the section shows the ones since this board
+    was created.
+    """
+
+    def __init__(self, sections=SECTIONS, status_log=None):
+        self.titles = dict(sections)
+        self.changed = threading.Condition()
+        self.entries = {section: [] for section in self.titles if section != STATUS}
+
+        self.status = status_log if status_log is not None else StatusLog()
+        self.status_from = self.status.end()
+
+        # (section, version, reader, seconds from the write to the reader having it)
+        self.handoffs = []
+
+    def check(self, section):
+        if section not in self.entries:
+            raise KeyError(f"Unknown shared memory section {section!r} (known: {', '.join(self.entries)})")
+
+    def version(self, section):
+        """Latest version of a section (0 if never written)"""
+        self.check(section)
+        with self.changed:
+            history = self.entries[section]
+            return history[-1].version if history else 0
+
+    def write(self, section, value, writer=None, expected_version=None):
+        """
+        ✍️ Publish a new version of a section; returns its version
+
+        With expected_version the write only goes through if the section
+        is still at that version, otherwise VersionConflict is raised.
+        """
+        self.check(section)
+        with self.changed:
+            history = self.entries[section]
+            current = history[-1].version if history else 0
+            if expected_version is not None and expected_version != current:
+                raise VersionConflict(f"{section} is at v{current}, not v{expected_version}")
+            history.append(Entry(value, current + 1, writer))
+            self.changed.notify_all()
+            return current + 1
+
+    def append(self, section, line, writer=None):
+        """➕ Add a line to a section (atomic read-modify-write)"""
+        self.check(section)
+        with self.changed:
+            history = self.entries[section]
+            previous = history[-1].value if history else ""
+            return self.write(section, f"{previous}\n{line}" if previous else line, writer)
+
+    def read(self, section, min_version=1, timeout=READ_TIMEOUT, reader=None):
+        """
+        📖 Latest value of a section, blocking until it reaches min_version
+
+        Raises TimeoutError if the section is still behind after timeout
+        seconds. Named readers have their handoff time recorded.
+        """
+        self.check(section)
+        deadline = time.time() + timeout if timeout is not None else None
+        with self.changed:
+            while True:
+                history = self.entries[section]
+                if history and history[-1].version >= min_version:
+                    entry = history[-1]
+                    if reader is not None:
+                        self.handoffs.append((section, entry.version, reader, time.time() - entry.written_at))
+                    return entry.value
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Shared memory section {section!r} not written within {timeout:g}s")
+                self.changed.wait(remaining)
+
+    def snapshot(self):
+        """{section: (version, value)} for every section written so far"""
+        with self.changed:
+            return {section: (history[-1].version, history[-1].value)
+                    for section, history in self.entries.items() if history}
+
+    def render(self):
+        """📝 The whole shared memory as one sectioned document"""
+        snapshot = self.snapshot()
+        lines = ["=== SHARED MEMORY FOR ALL VMs ==="]
+        for section, title in self.titles.items():
+            if section == STATUS:
+                events = self.status.read_from(self.status_from)
+                lines.append(f"\n=== {title} ({len(events)}) ===")
+                lines.extend(f"{event.source.upper()}: {event.message}" for event in events)
+                continue
+            version, value = snapshot.get(section, (0, "[not written yet]"))
+            lines.append(f"\n=== {title} (v{version}) ===")
+            lines.append(value.strip())
+        return "\n".join(lines) + "\n"
+
+    def print_status(self):
+        snapshot = self.snapshot()
+        print(f"🧠 SHARED MEMORY: {len(snapshot)}/{len(self.entries)} sections written, "
+              f"{sum(version for version, _ in snapshot.values())} write(s), "
+              f"{self.status.end() - self.status_from} status update(s)")
+        for section, (version, value) in snapshot.items():
+            print(f"   {self.titles[section]}: v{version}, {len(value)} chars")
+        for section, version, reader, seconds in self.handoffs:
+            print(f"   🔄 {self.titles[section]} v{version} → {reader} in {seconds * 1000:.1f}ms")
+
+
+def benchmark_blackboard(handoffs=200):
+    """🧪 Write-to-reader wakeup latency for a chain of blocking reads across threads"""
+    print("\n🧠 BLACKBOARD BENCHMARK:")
+    board = Blackboard({f"s{index}": f"SECTION {index}" for index in range(handoffs + 1)})
+
+    def relay(index):
+        value = board.read(f"s{index}", reader=f"relay-{index}")
+        board.write(f"s{index + 1}", value + 1, writer=f"relay-{index}")
+
+    threads = [threading.Thread(target=relay, args=(index,)) for index in range(handoffs)]
+    for thread in threads:
+        thread.start()
+    start = time.time()
+    board.write("s0", 0, writer="benchmark")
+    result = board.read(f"s{handoffs}")
+    elapsed = time.time() - start
+    for thread in threads:
+        thread.join()
+
+    slowest = max(seconds for _, _, _, seconds in board.handoffs)
+    print(f"   {handoffs} chained handoffs in {elapsed * 1000:.1f}ms "
+          f"({elapsed / handoffs * 1000:.2f}ms each, slowest {slowest * 1000:.2f}ms), final value {result}")
+    return elapsed / handoffs
+
+
+if __name__ == "__main__":
+    benchmark_blackboard()
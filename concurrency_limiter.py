@@ -0,0 +1,307 @@
+import os
+import re
+import time
+import random
+import threading
+
+# Provider responses that mean "slow down" rather than "this prompt is broken". Only an
+# explicit rate limit is retried: a prompt that timed out may already have acted on the VM
+THROTTLE_STATUS_CODES = {429}
+THROTTLE_PATTERN = re.compile(r"\b429\b|rate.?limit|too many requests", re.IGNORECASE)
+
+# Timeouts are congestion too - they shrink the limit, but are raised rather than retried
+TIMEOUT_STATUS_CODES = {408, 504}
+TIMEOUT_PATTERN = re.compile(r"timed? ?out", re.IGNORECASE)
+
+
+def response_status(error):
+    for source in (error, getattr(error, 'response', None)):
+        status = getattr(source, 'status_code', None) or getattr(source, 'status', None)
+        if status is not None:
+            return status
+    return None
+
+
+def is_throttle_signal(error):
+    """🚥 True for explicit 429 / rate-limit responses (back off and retry), False for anything else"""
+    if response_status(error) in THROTTLE_STATUS_CODES:
+        return True
+    return bool(THROTTLE_PATTERN.search(str(error)))
+
+
+def is_timeout_signal(error):
+    """⌛ True for a prompt that timed out (shrink the limit, but don't re-run it)"""
+    if isinstance(error, TimeoutError) or response_status(error) in TIMEOUT_STATUS_CODES:
+        return True
+    return bool(TIMEOUT_PATTERN.search(str(error)))
+
+
+class LimiterRejected(RuntimeError):
+    """Raised when no prompt slot frees up within the limiter's max_wait"""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    🚦 AIMD CONCURRENCY LIMITER FOR VM PROMPTS
+
+    Gates concurrent Computer.prompt calls across every orchestrator in
+    the process. With no initial_limit it starts unbounded, so every
+    attached VM can be prompted at once; the first 429 / rate-limit
+    response sets the limit to half the prompts that were in flight.
+    From then on each successful prompt nudges it up (+1 per window of
+    successes) and each rate-limit halves it, at most once per cooldown
+    so a burst of simultaneous 429s counts as one congestion event.
+    A timed-out prompt shrinks the limit the same way. Only rate-limited
+    prompts are retried (with jittered backoff) - a prompt rejected with
+    a 429 never reached the VM, while one that timed out (or failed any
+    other way) may already have acted on it, so it is raised as is.
+    """
+
+    def __init__(self, initial_limit=None, min_limit=1, max_limit=None, decrease=0.5, cooldown=5.0,
+                 max_wait=None, max_retries=3, backoff=2.0):
+        # None = unbounded until the provider first rate-limits us
+        self.limit = float(initial_limit) if initial_limit else None
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.last_decrease = 0.0
+
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.acquired = 0
+
+    def acquire(self):
+        """⏳ Block until a prompt slot is free (LimiterRejected after max_wait)"""
+        start = time.time()
+        with self.condition:
+            self.waiting += 1
+            try:
+                while self.limit is not None and self.in_flight >= int(self.limit):
+                    remaining = None if self.max_wait is None else start + self.max_wait - time.time()
+                    if remaining is not None and remaining <= 0:
+                        self.rejected += 1
+                        raise LimiterRejected(f"No prompt slot free within {self.max_wait:.0f}s "
+                                              f"(limit {int(self.limit)}, {self.in_flight} in flight)")
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.acquired += 1
+            self.total_wait += time.time() - start
+
+    def release(self, throttled=False, reason="rate limiting"):
+        """Return a slot and adapt the limit to how the prompt went"""
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.on_throttle(reason)
+            else:
+                self.completed += 1
+                if self.limit is not None:
+                    # Additive increase: about +1 once every `limit` successful prompts
+                    self.limit += 1.0 / self.limit
+                    if self.max_limit is not None:
+                        self.limit = min(self.max_limit, self.limit)
+            self.condition.notify_all()
+
+    def on_throttle(self, reason="rate limiting"):
+        """📉 Multiplicative decrease, once per cooldown (caller holds the condition)"""
+        self.throttled += 1
+        now = time.time()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        # Unbounded so far: the concurrency that drew the 429 (this prompt included) is the ceiling
+        previous = int(self.limit) if self.limit is not None else self.in_flight + 1
+        self.limit = max(self.min_limit, previous * self.decrease)
+        print(f"🚦 Provider is {reason} - prompt concurrency {previous} → {int(self.limit)}")
+
+    def call(self, func, *args):
+        """🔁 Run func(*args) inside a slot, retrying throttled attempts with jittered backoff"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = func(*args)
+            except Exception as e:
+                throttled = is_throttle_signal(e)
+                if not throttled and is_timeout_signal(e):
+                    # Congestion, but the agent may have acted on the VM - shrink the limit, don't re-run
+                    self.timeouts += 1
+                    self.release(throttled=True, reason="timing out prompts")
+                    raise
+                self.release(throttled)
+                if not throttled or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+            else:
+                self.release()
+                return result
+
+    def metrics(self):
+        """📊 Current limit and throttling counters"""
+        with self.condition:
+            return {
+                'limit': int(self.limit) if self.limit is not None else None,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'peak_in_flight': self.peak_in_flight,
+                'completed': self.completed,
+                'throttled': self.throttled,
+                'timeouts': self.timeouts,
+                'retries': self.retries,
+                'rejected': self.rejected,
+                'mean_wait': self.total_wait / self.acquired if self.acquired else 0.0,
+            }
+
+    def print_status(self):
+        metrics = self.metrics()
+        limit = metrics['limit'] if metrics['limit'] is not None else "unbounded"
+        print(f"🚦 Prompt limiter: limit {limit}, {metrics['in_flight']} in flight, "
+              f"{metrics['waiting']} waiting, {metrics['throttled']} throttled "
+              f"({metrics['timeouts']} timed out), "
+              f"{metrics['retries']} retried, {metrics['rejected']} rejected, "
+              f"mean slot wait {metrics['mean_wait']:.1f}s")
+
+
+# One limiter for the whole process - every orchestrator's prompts share the provider's rate limit.
+# Unbounded unless VM_PROMPT_CONCURRENCY / VM_PROMPT_CONCURRENCY_MAX are set
+PROMPT_LIMITER = AdaptiveConcurrencyLimiter(
+    initial_limit=int(os.getenv('VM_PROMPT_CONCURRENCY', 0)) or None,
+    max_limit=int(os.getenv('VM_PROMPT_CONCURRENCY_MAX', 0)) or None,
+)
+
+
+class LimitedComputer:
+    """🚦 Computer whose prompt() goes through the shared limiter; everything else passes through"""
+
+    # Hide native async prompts so async callers use prompt() and stay inside the limiter
+    HIDDEN = ('aprompt', 'prompt_async')
+
+    def __init__(self, computer, limiter=None):
+        self.computer = computer
+        self.limiter = limiter or PROMPT_LIMITER
+        self.first_prompt_at = None
+
+    def prompt(self, instruction):
+        if self.first_prompt_at is None:
+            self.first_prompt_at = time.time()
+        return self.limiter.call(self.computer.prompt, instruction)
+
+    def __getattr__(self, name):
+        if name in self.HIDDEN:
+            raise AttributeError(name)
+        return getattr(self.computer, name)
+
+    def __repr__(self):
+        return f"limited({self.computer!r})"
+
+
+def limited(computer, limiter=None):
+    """Wrap a Computer so its prompts share the process-wide limiter"""
+    if isinstance(computer, LimitedComputer):
+        return computer
+    return LimitedComputer(computer, limiter)
+
+
+def unwrap(computer):
+    """The underlying Computer of a limited(...) proxy"""
+    return computer.computer if isinstance(computer, LimitedComputer) else computer
+
+
+def benchmark_limiter(threads=24, prompts_per_thread=3, capacity=6, healthy=4, latency=0.05):
+    """
+    🧪 Many threads against a provider that 429s above `capacity` concurrent
+    prompts and times prompts out once more than `healthy` are running
+    """
+
+    class ThrottlingProvider:
+        """Fake provider: beyond `capacity` at once fail fast with a 429, beyond `healthy` time out"""
+
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.active = 0
+            self.rejections = 0
+            self.timeouts = 0
+
+        def prompt(self, instruction):
+            with self.lock:
+                if self.active >= capacity:
+                    self.rejections += 1
+                    throttled = True
+                else:
+                    self.active += 1
+                    throttled = False
+                    overloaded = self.active > healthy
+                    self.timeouts += overloaded
+            if throttled:
+                time.sleep(latency / 10)
+                raise RuntimeError("429 Too Many Requests")
+            time.sleep(latency * 2 if overloaded else latency)
+            with self.lock:
+                self.active -= 1
+            if overloaded:
+                raise TimeoutError("Prompt timed out")
+
+    def naive_call(provider):
+        # Old behaviour: every thread retries 429s on its own, immediately
+        for attempt in range(50):
+            try:
+                return provider.prompt("task")
+            except RuntimeError:
+                time.sleep(latency / 10)
+        raise RuntimeError("gave up")
+
+    def drive(call):
+        provider = ThrottlingProvider()
+        failures = []
+
+        def worker():
+            for _ in range(prompts_per_thread):
+                try:
+                    call(provider)
+                except Exception as e:
+                    failures.append(e)
+
+        start = time.time()
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return time.time() - start, provider.rejections, provider.timeouts, len(failures)
+
+    print("\n🚦 ADAPTIVE CONCURRENCY BENCHMARK:")
+    print(f"   {threads} threads x {prompts_per_thread} prompts, provider accepts {capacity} at once "
+          f"and times out above {healthy}")
+
+    naive = drive(naive_call)
+    print(f"   Uncoordinated retries: {naive[0]:.2f}s, {naive[1]} provider 429s, {naive[2]} timeouts, "
+          f"{naive[3]} failed prompts")
+
+    # Same retry budget for 429s as the naive loop; timeouts are never retried by either
+    limiter = AdaptiveConcurrencyLimiter(cooldown=latency, backoff=latency / 2, max_retries=50)
+    adaptive = drive(lambda provider: limiter.call(provider.prompt, "task"))
+    print(f"   AIMD limiter: {adaptive[0]:.2f}s, {adaptive[1]} provider 429s, {adaptive[2]} timeouts, "
+          f"{adaptive[3]} failed prompts")
+    limiter.print_status()
+
+    return {'naive': naive, 'adaptive': adaptive, 'metrics': limiter.metrics()}
+
+
+if __name__ == "__main__":
+    benchmark_limiter()
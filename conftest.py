@@ -0,0 +1,2 @@
+# test_orgo.py is a live smoke test against a real Orgo VM (needs ORGO_API_KEY) - run it directly
+collect_ignore = ["test_orgo.py"]
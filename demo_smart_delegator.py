@@ -3,6 +3,8 @@ import time
 from dotenv import load_dotenv
 from orgo import Computer
 
+from concurrency_limiter import limited
+
 # Load environment variables
 load_dotenv()
 
@@ -12,7 +14,7 @@ class DemoSmartDelegator:
         
         # For demo: using one working VM to show the concept
         print("🚀 Initializing Demo Smart Task Delegation System...")
-        self.computer = Computer(project_id="yourcomputerid", api_key=self.api_key)
+        self.computer = limited(Computer(project_id="yourcomputerid", api_key=self.api_key))
         print("✅ VM ready for intelligent task delegation!")
     
     def analyze_and_delegate_task(self, user_prompt):
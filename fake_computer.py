@@ -0,0 +1,114 @@
+import re
+import time
+import random
+import threading
+
+# "Save as 'name.ext'" / "SAVE AS: 'name.ext'" in stage prompts
+SAVED_FILE_PATTERN = re.compile(r"save[^'\n]*'([^']+\.[A-Za-z0-9]+)'", re.IGNORECASE)
+
+# Prompt steps that make the agent start an app, by the app's launch command
+APP_STEPS = {
+    'firefox': 'open browser',
+    'libreoffice --calc': 'open spreadsheet',
+    'libreoffice --impress': 'open presentation',
+}
+
+
+class FakeComputer:
+    """
+    🧪 FAKE COMPUTER - OFFLINE STAND-IN FOR orgo.Computer
+
+    Mirrors the parts of the Computer API the orchestrators use
+    (prompt / destroy) but just sleeps for a configurable latency,
+    so schedulers can be benchmarked without renting real VMs.
+    Files a prompt asks to "save as '...'" land in an in-memory
+    filesystem readable through read_file / write_file.
+
+    latency may also be a function of the instruction, for simulating
+    stages whose length depends on what they are asked to do.
+    A prompt that opens an app which isn't running yet pays
+    app_launch_seconds extra, unless launch_app() started it first.
+    """
+
+    def __init__(self, name="fake-vm", latency=1.0, jitter=0.0, fail_rate=0.0, seed=None,
+                 tail_rate=0.0, tail_factor=4.0, app_launch_seconds=0.0):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        # Occasionally the agent gets stuck (e.g. in a dialog) and takes tail_factor x longer
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.app_launch_seconds = app_launch_seconds
+        self.open_apps = set()
+        self.random = random.Random(seed)
+
+        self.prompts = []
+        self.files = {}
+        self.destroyed = False
+        self.alive = True
+        self.resets = 0
+        self.lock = threading.Lock()
+
+    def prompt(self, instruction):
+        """🤖 Pretend to run an agent session on this VM"""
+        with self.lock:
+            latency = self.latency(instruction) if callable(self.latency) else self.latency
+            delay = latency + self.random.uniform(0, self.jitter)
+            if self.random.random() < self.tail_rate:
+                delay *= self.tail_factor
+            should_fail = self.random.random() < self.fail_rate
+            for command, step in APP_STEPS.items():
+                if step in instruction.lower() and command not in self.open_apps:
+                    delay += self.app_launch_seconds
+                    self.open_apps.add(command)
+
+        time.sleep(delay)
+
+        if not self.alive:
+            raise ConnectionError(f"{self.name}: VM unreachable")
+        if should_fail:
+            raise RuntimeError(f"{self.name}: simulated prompt failure")
+
+        with self.lock:
+            self.prompts.append(instruction)
+            for filename in SAVED_FILE_PATTERN.findall(instruction):
+                self.files[filename] = f"[{self.name}] output saved as {filename}\n".encode()
+
+    def ping(self):
+        """💓 Liveness probe - fails once the VM has been killed"""
+        if not self.alive:
+            raise ConnectionError(f"{self.name}: VM unreachable")
+
+    def kill(self):
+        """💀 Simulate the VM dying (prompts in flight fail when they return)"""
+        self.alive = False
+
+    def read_file(self, filename):
+        """📄 Contents of a file on the fake VM (None if it was never saved)"""
+        with self.lock:
+            return self.files.get(filename)
+
+    def write_file(self, filename, data):
+        """💾 Place a file on the fake VM"""
+        with self.lock:
+            self.files[filename] = data
+
+    def launch_app(self, command):
+        """🖥️ Start an app directly, outside any agent session"""
+        time.sleep(self.app_launch_seconds)
+        with self.lock:
+            self.open_apps.add(command)
+
+    def reset(self):
+        """🧽 Close the apps the last job left open (saved files stay)"""
+        with self.lock:
+            self.resets += 1
+            self.open_apps.clear()
+
+    def destroy(self):
+        """🧹 Mark the fake VM as released"""
+        self.destroyed = True
+
+    def __repr__(self):
+        return f"FakeComputer({self.name!r}, latency={self.latency})"
@@ -1,12 +1,33 @@
 import os
 import time
-import threading
 from dotenv import load_dotenv
 from orgo import Computer
 
+from job_journal import JobJournal
+from research_stream import STREAM_CHUNKS, ResearchChunk, ResearchStream, analyze_stream, print_stream_report, stream_research
+from stage_scheduler import StageCompletion, StageScheduler
+from status_log import vm_status_log
+from vm_files import UPLOAD_DIR, ArtifactTransfers
+from vm_provisioning import provision_vms
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
+# Stream VM1's research to VM2 part by part instead of handing it over in one piece
+STREAM_RESEARCH = os.getenv('VM_STREAM_RESEARCH', '0') == '1'
+
+# The file each stage saves, and the files (with the stage that saves them) it reads
+STAGE_OUTPUTS = {
+    'vm1': 'vm1_research_data.txt',
+    'vm2': 'vm2_analysis_data.xlsx',
+    'vm3': 'vm3_final_presentation.pptx',
+}
+STAGE_INPUTS = {
+    'vm2': ['vm1'],
+    'vm3': ['vm1', 'vm2'],
+}
+
 class InterconnectedVMOrchestrator:
     """
     🔗 INTERCONNECTED VM ORCHESTRATOR - REVOLUTIONARY CONCEPT
@@ -17,9 +38,13 @@ class InterconnectedVMOrchestrator:
     3. VM3 waits for both, READS research + analysis, creates presentation
     
     This creates a REAL interconnected workflow where VMs pass actual data!
+    
+    With stream_research, VM1 researches one angle at a time and each
+    part is handed to VM2 as it is saved, so VM2's analysis overlaps
+    VM1's research instead of waiting for all of it.
     """
     
-    def __init__(self):
+    def __init__(self, stream_research=STREAM_RESEARCH):
         self.api_key = os.getenv('ORGO_API_KEY', 'your_orgo_api_key_here')
         
         # Set the Anthropic API key
@@ -27,25 +52,46 @@ class InterconnectedVMOrchestrator:
         
         print("🔗 Initializing INTERCONNECTED VM Orchestrator...")
         
+        reap_leaked_computers(Computer, self.api_key)
+
         # Initialize all 3 VMs
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Research VM
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Processing VM
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Presentation VM
+        self.provisioning = provision_vms({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research VM
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing VM
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Presentation VM
+        })
+        self.vm1, self.vm2, self.vm3 = self.provisioning.require('vm1', 'vm2', 'vm3')
         
         print("✅ All 3 VMs connected for INTERCONNECTED workflow!")
         
         # Status tracking
-        self.vm1_status = "Ready"
-        self.vm2_status = "Waiting for VM1 data..."
-        self.vm3_status = "Waiting for VM1 & VM2 data..."
+        self.status_log = vm_status_log(vm2="Waiting for VM1 data...", vm3="Waiting for VM1 & VM2 data...")
         
-        # Data sharing mechanism
+        # Data sharing mechanism (informational - stages hand off through completion signals)
         self.research_complete = False
         self.analysis_complete = False
+        
+        # Durable record of every stage, so a crashed run resumes instead of redoing VM work
+        self.journal = JobJournal()
+        
+        # Stage outputs copied from the VM that saved them to the VMs that read them (one per run)
+        self.transfers = None
+        
+        # VM1 → VM2 research parts when streaming (one per run)
+        self.stream_research = stream_research
+        self.stream = None
+        self.first_insight_at = None
+    
+    def resume_unfinished_jobs(self):
+        """♻️ Finish pipelines a previous (crashed) process left half done"""
+        for job_id in self.journal.unfinished_jobs('interconnected'):
+            print(f"\n♻️ Found unfinished interconnected job {job_id} - resuming it")
+            self.execute_interconnected_pipeline(self.journal.plan(job_id))
     
     def orchestrate_interconnected_workflow(self, user_prompt):
         """🔗 Execute TRUE INTERCONNECTED workflow with data handoffs"""
         
+        self.provisioning.accept_task()
         print(f"\n🔗 INTERCONNECTED WORKFLOW: '{user_prompt}'")
         print("="*80)
         print("🎯 DATA PIPELINE PLAN:")
@@ -58,12 +104,12 @@ class InterconnectedVMOrchestrator:
         task_plan = self.create_interconnected_tasks(user_prompt)
         
         # Execute TRUE SEQUENTIAL WORKFLOW with data handoffs
-        self.execute_interconnected_pipeline(task_plan)
+        return self.execute_interconnected_pipeline(task_plan)
     
     def create_interconnected_tasks(self, prompt):
         """🔗 Create interconnected tasks with actual data handoffs"""
         
-        return {
+        plan = {
             'vm1_research_task': f"""
             VM1 RESEARCH TASK - DATA COLLECTION for: "{prompt}"
             
@@ -98,7 +144,8 @@ class InterconnectedVMOrchestrator:
             
             CRITICAL: Use VM1's research data to create analysis!
             
-            1. First, locate and OPEN the file 'vm1_research_data.txt' 
+            1. First, OPEN 'vm1_research_data.txt' - it has already been copied
+               to {UPLOAD_DIR} on this VM, no need to search for it
             2. READ all the research data that VM1 collected
             3. Open spreadsheet application (Numbers/Excel)
             4. Create data analysis based on VM1's research:
@@ -125,9 +172,9 @@ class InterconnectedVMOrchestrator:
             
             CRITICAL: Use both VM1's research AND VM2's analysis!
             
-            1. First, locate and OPEN 'vm1_research_data.txt'
+            1. First, OPEN 'vm1_research_data.txt' from {UPLOAD_DIR} (already copied here)
             2. READ VM1's research findings thoroughly
-            3. Then locate and OPEN 'vm2_analysis_data.xlsx' 
+            3. Then OPEN 'vm2_analysis_data.xlsx' from {UPLOAD_DIR} (already copied here)
             4. REVIEW VM2's analysis and charts
             
             5. Open presentation software (Keynote/PowerPoint)
@@ -149,6 +196,11 @@ class InterconnectedVMOrchestrator:
             YOU MUST REFERENCE BOTH VM1 AND VM2 FILES!
             """
         }
+        if self.stream_research:
+            # Part of the plan, so a resumed job streams (or not) the same way
+            plan['prompt'] = prompt
+            plan['stream_chunks'] = STREAM_CHUNKS
+        return plan
     
     def execute_interconnected_pipeline(self, task_plan):
         """🔗 Execute the TRUE interconnected pipeline"""
@@ -156,85 +208,185 @@ class InterconnectedVMOrchestrator:
         print("\n🔗 STARTING INTERCONNECTED DATA PIPELINE...")
         print("=" * 80)
         
+        # VM2 opens VM1's file, VM3 opens both - each stage starts the moment
+        # its inputs exist and is skipped if an upstream stage fails
+        scheduler = StageScheduler()
+        streaming = task_plan.get('stream_chunks')
+        if streaming:
+            # VM2 starts with VM1 and blocks on the stream for its first parts
+            self.stream = ResearchStream(streaming)
+            self.first_insight_at = None
+            vm1_stage = scheduler.add_stage('vm1', self.execute_vm1_streaming, args=(task_plan['prompt'],))
+            # ...so its clock covers VM1's research too
+            vm2_stage = scheduler.add_stage('vm2', self.execute_vm2_streaming, args=(task_plan['vm2_analysis_task'],),
+                                            timeout=None if scheduler.stage_timeout is None else 2 * scheduler.stage_timeout)
+        else:
+            vm1_stage = scheduler.add_stage('vm1', self.execute_vm1_research, args=(task_plan['vm1_research_task'],))
+            vm2_stage = scheduler.add_stage('vm2', self.execute_vm2_analysis, args=(task_plan['vm2_analysis_task'],),
+                                            depends_on=['vm1'])
+        vm3_stage = scheduler.add_stage('vm3', self.execute_vm3_presentation, args=(task_plan['vm3_presentation_task'],),
+                                        depends_on=['vm1', 'vm2'])
+        
+        # Skip stages a previous run of this exact plan already finished
+        job_id, completed = self.journal.resume_or_create('interconnected', task_plan)
+        if completed:
+            print(f"♻️ Resuming job {job_id}: {', '.join(sorted(completed))} already done")
+        self.journal.attach(scheduler, job_id, {'vm1': self.vm1, 'vm2': self.vm2, 'vm3': self.vm3}, completed)
+        # Files saved since the job began are this job's - restored stages' outputs included
+        self.transfers = ArtifactTransfers(job_id=job_id, since=self.journal.created_at(job_id))
+        tail = self.status_log.tail(self.status_log.end())
+        for name, stage in scheduler.stages.items():
+            if stage.restored:
+                self.status_log.append(name, f"Restored from journal ✅ ({stage.completion.result})")
+        if streaming and vm1_stage.restored:
+            # VM1's research is already whole on its disk - stream it as a single part
+            data = self.transfers.pull(self.vm1, STAGE_OUTPUTS['vm1'], 'VM1') or b""
+            self.stream.append(ResearchChunk(1, "restored research", STAGE_OUTPUTS['vm1'], data.decode(errors='replace')))
+            self.stream.close()
+        
         # STEP 1: VM1 Research (starts immediately)
         print("📊 STEP 1: VM1 starting research and data collection...")
-        self.execute_vm1_research(task_plan['vm1_research_task'])
+        scheduler.start()
         
-        # Wait for VM1 to complete and mark research as done
+        # Wait for VM1's completion signal - wakes the instant it succeeds or fails
         print("⏳ Waiting for VM1 to complete research...")
-        while not self.research_complete:
-            time.sleep(5)
-        
-        print("✅ VM1 research complete! Data saved for VM2 and VM3.")
+        vm1_stage.completion.wait()
         
-        # STEP 2: VM2 Analysis (starts after VM1 completes)
-        print("\n📈 STEP 2: VM2 starting analysis using VM1's research data...")
-        self.vm2_status = "Processing VM1's research data..."
-        
-        # Start VM2 and VM3 in parallel (both can use VM1's data)
-        vm2_thread = threading.Thread(target=self.execute_vm2_analysis, args=(task_plan['vm2_analysis_task'],))
-        vm3_thread = threading.Thread(target=self.execute_vm3_presentation, args=(task_plan['vm3_presentation_task'],))
-        
-        vm2_thread.start()
-        time.sleep(10)  # Give VM2 a head start on analysis
-        vm3_thread.start()
-        
-        # Monitor both VM2 and VM3
-        self.monitor_final_stages(vm2_thread, vm3_thread)
+        if vm1_stage.completion.succeeded():
+            print("✅ VM1 research complete! Data saved for VM2 and VM3.")
+            
+            # STEP 2: VM2 Analysis (starts after VM1 completes, or already running on the streamed parts)
+            if streaming:
+                print("\n📈 STEP 2: VM2 finishing analysis on the last streamed research parts...")
+            else:
+                print("\n📈 STEP 2: VM2 starting analysis using VM1's research data...")
+            
+            # Monitor both VM2 and VM3
+            self.monitor_final_stages(tail, vm2_stage, vm3_stage)
         
         # Wait for completion
-        vm2_thread.join()
-        vm3_thread.join()
+        scheduler.wait()
+        self.journal.finish_job(job_id, scheduler.succeeded())
+        self.transfers.finish_job()
+        
+        if not scheduler.succeeded():
+            print("\n⚠️ INTERCONNECTED WORKFLOW STOPPED EARLY!")
+            if vm2_stage.completion.outcome == StageCompletion.SKIPPED:
+                self.status_log.append('vm2', f"Skipped - {vm2_stage.completion.reason}")
+            if vm3_stage.completion.outcome == StageCompletion.SKIPPED:
+                self.status_log.append('vm3', f"Skipped - {vm3_stage.completion.reason}")
+            tail.print_new()
+            scheduler.print_timeline()
+            self.transfers.print_report()
+            return False
         
         print("\n🎉 INTERCONNECTED WORKFLOW COMPLETE!")
+        scheduler.print_timeline()
+        self.transfers.print_report()
+        if streaming:
+            print_stream_report(self.stream, self.first_insight_at, vm2_stage.finished_at)
         self.show_interconnected_results()
+        return True
+    
+    def collect_output(self, name):
+        """⬇️ Pull the file a stage just saved off its VM, ready to hand to the stages that read it"""
+        self.transfers.pull(getattr(self, name), STAGE_OUTPUTS[name], name.upper())
+    
+    def receive_inputs(self, name):
+        """📦 Copy the files a stage reads onto its VM before its prompt starts"""
+        for source in STAGE_INPUTS[name]:
+            self.transfers.hand_off(STAGE_OUTPUTS[source], getattr(self, source), getattr(self, name),
+                                    source.upper(), name.upper())
     
     def execute_vm1_research(self, task):
         """📊 Execute VM1 research with data saving"""
-        self.vm1_status = "Researching and collecting data..."
+        self.status_log.append('vm1', "Researching and collecting data...")
         try:
             self.vm1.prompt(task)
-            self.vm1_status = "Research Complete - Data Saved ✅"
+            self.collect_output('vm1')
+            self.status_log.append('vm1', "Research Complete - Data Saved ✅")
             self.research_complete = True
             print("✅ VM1: Research data saved to 'vm1_research_data.txt'")
+            return 'vm1_research_data.txt'
         except Exception as e:
-            self.vm1_status = f"Error: {e}"
+            self.status_log.append('vm1', f"Error: {e}")
             print(f"❌ VM1 Error: {e}")
+            raise
+    
+    def execute_vm1_streaming(self, prompt):
+        """🌊 VM1 research one angle at a time, each part streamed to VM2 as it is saved"""
+        self.status_log.append('vm1', "Streaming research parts to VM2...")
+        try:
+            artifact = stream_research(self.vm1, prompt, self.stream, self.transfers, STAGE_OUTPUTS['vm1'])
+            self.collect_output('vm1')
+            self.status_log.append('vm1', f"Research Complete - {len(self.stream.chunks)} parts streamed ✅")
+            self.research_complete = True
+            print(f"✅ VM1: All research parts streamed, merged into '{artifact}'")
+            return artifact
+        except Exception as e:
+            self.status_log.append('vm1', f"Error: {e}")
+            print(f"❌ VM1 Error: {e}")
+            raise
+    
+    def execute_vm2_streaming(self, task):
+        """📈 VM2 analysis started on VM1's first research parts, updated as the rest land"""
+        self.status_log.append('vm2', "Waiting for VM1's first research parts...")
+        try:
+            outcome = analyze_stream(self.vm2, self.vm1, self.stream, self.transfers, task, STAGE_OUTPUTS['vm2'],
+                                     merged_filename=STAGE_OUTPUTS['vm1'])
+            self.first_insight_at = outcome['first_insight_at']
+            self.collect_output('vm2')
+            self.status_log.append('vm2', f"Analysis Complete - {outcome['updates']} streamed update(s) ✅")
+            self.analysis_complete = True
+            print("✅ VM2: Analysis complete using every streamed research part")
+            return STAGE_OUTPUTS['vm2']
+        except Exception as e:
+            self.status_log.append('vm2', f"Error: {e}")
+            print(f"❌ VM2 Error: {e}")
+            raise
     
     def execute_vm2_analysis(self, task):
         """📈 Execute VM2 analysis using VM1's data"""
-        self.vm2_status = "Reading VM1's research file..."
+        self.status_log.append('vm2', "Receiving VM1's research file...")
         try:
+            self.receive_inputs('vm2')
+            self.status_log.append('vm2', "Analyzing VM1's research file...")
             self.vm2.prompt(task)
-            self.vm2_status = "Analysis Complete - Used VM1 Data ✅"
+            self.collect_output('vm2')
+            self.status_log.append('vm2', "Analysis Complete - Used VM1 Data ✅")
             self.analysis_complete = True
             print("✅ VM2: Analysis complete using VM1's research data")
+            return 'vm2_analysis_data.xlsx'
         except Exception as e:
-            self.vm2_status = f"Error: {e}"
+            self.status_log.append('vm2', f"Error: {e}")
             print(f"❌ VM2 Error: {e}")
+            raise
     
     def execute_vm3_presentation(self, task):
         """📋 Execute VM3 presentation using both VM1 and VM2 data"""
-        self.vm3_status = "Reading VM1 & VM2 files..."
+        self.status_log.append('vm3', "Receiving VM1 & VM2 files...")
         try:
+            self.receive_inputs('vm3')
+            self.status_log.append('vm3', "Presenting VM1 & VM2 files...")
             self.vm3.prompt(task)
-            self.vm3_status = "Presentation Complete - Used All Data ✅"
+            self.collect_output('vm3')
+            self.status_log.append('vm3', "Presentation Complete - Used All Data ✅")
             print("✅ VM3: Presentation complete using data from VM1 and VM2")
+            return 'vm3_final_presentation.pptx'
         except Exception as e:
-            self.vm3_status = f"Error: {e}"
+            self.status_log.append('vm3', f"Error: {e}")
             print(f"❌ VM3 Error: {e}")
+            raise
     
-    def monitor_final_stages(self, vm2_thread, vm3_thread):
-        """📊 Monitor VM2 and VM3 execution"""
+    def monitor_final_stages(self, tail, vm2_stage, vm3_stage):
+        """📊 Monitor VM2 and VM3 execution - every status change since the run started, each printed once"""
         print("\n📊 MONITORING INTERCONNECTED EXECUTION:")
         print("-" * 70)
         
-        while vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"📊 VM1: {self.vm1_status}")
-            print(f"📈 VM2: {self.vm2_status}")
-            print(f"📋 VM3: {self.vm3_status}")
-            print("-" * 70)
-            time.sleep(8)
+        while vm2_stage.is_alive() or vm3_stage.is_alive():
+            if tail.print_new(wait=8):
+                print("-" * 70)
+        tail.print_new()
     
     def show_interconnected_results(self):
         """🔗 Show the interconnected workflow results"""
@@ -247,17 +399,16 @@ class InterconnectedVMOrchestrator:
         print("\n🔗 INTERCONNECTED FEATURES DEMONSTRATED:")
         print("  • Real data handoff between VMs")
         print("  • Sequential workflow with dependencies")
-        print("  • File-based data sharing")
+        print("  • Files copied between VMs by the orchestrator")
         print("  • Each VM builds on previous VM's work")
         print("  • True interconnected computing")
         print("\n🏆 THIS IS REVOLUTIONARY VM ORCHESTRATION!")
     
     def cleanup(self):
         """🧹 Clean up all VM connections"""
+        self.provisioning.print_startup_metrics()
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
             print("✅ All VMs cleaned up!")
         except Exception as e:
             print(f"⚠️ Cleanup: {e}")
@@ -274,6 +425,9 @@ def main():
     orchestrator = InterconnectedVMOrchestrator()
     
     try:
+        # Pick up anything a crashed run left behind before taking new work
+        orchestrator.resume_unfinished_jobs()
+        
         user_prompt = input("\n💭 Enter your research prompt: ").strip()
         
         if not user_prompt:
@@ -282,11 +436,12 @@ def main():
         
         # Execute the revolutionary interconnected workflow
         start_time = time.time()
-        orchestrator.orchestrate_interconnected_workflow(user_prompt)
+        succeeded = orchestrator.orchestrate_interconnected_workflow(user_prompt)
         end_time = time.time()
         
         print(f"\n⚡ TOTAL PIPELINE TIME: {end_time - start_time:.2f} seconds")
-        print("🏆 INTERCONNECTED VM ORCHESTRATION COMPLETE!")
+        if succeeded:
+            print("🏆 INTERCONNECTED VM ORCHESTRATION COMPLETE!")
         
     except KeyboardInterrupt:
         print("\n⚠️ Workflow interrupted")
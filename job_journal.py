@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import threading
+
+# Where the journal lives between runs
+JOURNAL_PATH = os.getenv('VM_JOB_JOURNAL', os.path.expanduser('~/.vm_orchestrator/jobs.db'))
+
+# Stage name used for whole-job events
+JOB = 'job'
+
+STARTED = 'started'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+def process_alive(pid):
+    """Whether a process with this pid is still running on this machine"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def owner_identity():
+    """host:pid of this process, recorded on the jobs it runs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_alive(owner):
+    """Whether the process that claimed a job may still be running it (other hosts can't be checked, so yes)"""
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname():
+        return True
+    return pid.isdigit() and process_alive(int(pid))
+
+
+def vm_identity(computer):
+    """Stable id of the VM a stage ran on (artifacts only survive on the same machine)"""
+    return getattr(computer, 'project_id', None) or getattr(computer, 'name', None)
+
+
+class JobJournal:
+    """
+    📓 DURABLE JOB JOURNAL
+
+    Append-only SQLite log (WAL mode) of job plans, stage transitions and
+    the artifacts each stage left on its VM. If the orchestrator dies
+    mid-pipeline, rerunning the same plan picks up after the last stage
+    that durably succeeded instead of redoing finished VM work. The
+    process running a job records itself (host:pid) on the job's started
+    event; a job whose owner is still alive is never resumed elsewhere.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                workflow TEXT NOT NULL,
+                plan_hash TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL REFERENCES jobs(job_id),
+                stage TEXT NOT NULL,
+                state TEXT NOT NULL,
+                artifact TEXT,
+                vm TEXT,
+                detail TEXT,
+                at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_by_job ON events(job_id, seq);
+            CREATE INDEX IF NOT EXISTS jobs_by_plan ON jobs(workflow, plan_hash);
+        """)
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    @staticmethod
+    def plan_hash(workflow, plan):
+        encoded = json.dumps([workflow, plan], sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def create_job(self, workflow, plan):
+        """🆕 Record a new job and its plan; returns the job id"""
+        job_id = uuid.uuid4().hex[:12]
+        self.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?)",
+                     (job_id, workflow, self.plan_hash(workflow, plan), json.dumps(plan), time.time()))
+        return job_id
+
+    def record(self, job_id, stage, state, artifact=None, vm=None, detail=None):
+        """✍️ Append one stage (or job) transition"""
+        self.execute("INSERT INTO events (job_id, stage, state, artifact, vm, detail, at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (job_id, stage, state, artifact, vm, detail, time.time()))
+
+    def latest_states(self, job_id):
+        """{stage: (state, artifact, vm)} from each stage's most recent event"""
+        rows = self.execute("SELECT stage, state, artifact, vm FROM events WHERE job_id = ? ORDER BY seq", (job_id,))
+        return {stage: (state, artifact, vm) for stage, state, artifact, vm in rows}
+
+    def completed_stages(self, job_id):
+        """{stage: (artifact, vm)} for stages whose last recorded state is success"""
+        return {stage: (artifact, vm) for stage, (state, artifact, vm) in self.latest_states(job_id).items()
+                if stage != JOB and state == SUCCEEDED}
+
+    def created_at(self, job_id):
+        """When the job was first created (a resumed job keeps its original time)"""
+        rows = self.execute("SELECT created_at FROM jobs WHERE job_id = ?", (job_id,))
+        return rows[0][0] if rows else None
+
+    def plan(self, job_id):
+        rows = self.execute("SELECT plan FROM jobs WHERE job_id = ?", (job_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def owner(self, job_id):
+        """host:pid of the process that last started running the job (None if none recorded)"""
+        rows = self.execute("SELECT detail FROM events WHERE job_id = ? AND stage = ? AND state = ? "
+                            "ORDER BY seq DESC LIMIT 1", (job_id, JOB, STARTED))
+        return rows[0][0] if rows else None
+
+    def running_elsewhere(self, job_id):
+        """Whether the job is unfinished and claimed by another process that is still alive"""
+        owner = self.owner(job_id)
+        return (self.latest_states(job_id).get(JOB, (None,))[0] == STARTED
+                and owner != owner_identity() and owner_alive(owner))
+
+    def resumable_job(self, workflow, plan):
+        """Most recent job with this exact plan that never finished successfully and no live process is running"""
+        rows = self.execute("SELECT job_id FROM jobs WHERE workflow = ? AND plan_hash = ? ORDER BY created_at DESC",
+                            (workflow, self.plan_hash(workflow, plan)))
+        for (job_id,) in rows:
+            state = self.latest_states(job_id).get(JOB, (None,))[0]
+            if state != SUCCEEDED and not self.running_elsewhere(job_id):
+                return job_id
+        return None
+
+    def unfinished_jobs(self, workflow):
+        """Jobs that never reached an outcome and whose process is gone - it died while they ran"""
+        rows = self.execute("SELECT job_id FROM jobs WHERE workflow = ? ORDER BY created_at", (workflow,))
+        return [job_id for (job_id,) in rows
+                if self.latest_states(job_id).get(JOB, (None,))[0] in (None, STARTED)
+                and not self.running_elsewhere(job_id)]
+
+    def resume_or_create(self, workflow, plan):
+        """♻️ Job id to run this plan under (claimed by this process), and the stages already durably done"""
+        job_id = self.resumable_job(workflow, plan)
+        completed = {}
+        if job_id is None:
+            job_id = self.create_job(workflow, plan)
+        else:
+            completed = self.completed_stages(job_id)
+        self.record(job_id, JOB, STARTED, detail=owner_identity())
+        return job_id, completed
+
+    def attach(self, scheduler, job_id, vms, completed=None):
+        """
+        🔗 Journal a StageScheduler run
+
+        Stages already in `completed` are restored instead of rerun, as
+        long as they ran on the same VM (vms: {stage: computer}) - their
+        artifacts live on that machine's disk.
+        """
+        for name, (artifact, vm) in (completed or {}).items():
+            if name not in scheduler.stages:
+                continue
+            current = vm_identity(vms.get(name))
+            if vm is not None and current is not None and vm != current:
+                print(f"⚠️ Stage '{name}' ran on {vm}, not {current} - its artifact is not here, rerunning")
+                continue
+            scheduler.restore_stage(name, artifact)
+
+        for name, stage in scheduler.stages.items():
+            if stage.completion.done():
+                continue
+            vm = vm_identity(vms.get(name))
+            stage.target = self.journaled(job_id, name, vm, stage.target)
+            stage.completion.add_done_callback(
+                lambda completion, name=name, vm=vm: self.record_outcome(job_id, name, vm, completion))
+
+    def journaled(self, job_id, name, vm, target):
+        def run(*args):
+            self.record(job_id, name, STARTED, vm=vm)
+            return target(*args)
+        return run
+
+    def record_outcome(self, job_id, name, vm, completion):
+        artifact = completion.result if isinstance(completion.result, str) else None
+        detail = str(completion.error or completion.reason or '') or None
+        self.record(job_id, name, completion.outcome, artifact=artifact, vm=vm, detail=detail)
+
+    def finish_job(self, job_id, succeeded):
+        """🏁 Record the job outcome (only successful jobs stop being resumable)"""
+        self.record(job_id, JOB, SUCCEEDED if succeeded else FAILED)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,276 @@
+import os
+import time
+import asyncio
+import threading
+from collections import defaultdict
+
+from async_engine import AsyncOrchestrationEngine, run_sync
+from fake_computer import FakeComputer
+from stage_scheduler import StageCompletion
+from vm_pool import VMPool, RESEARCH
+
+# Job priority classes - a lower number always dispatches first
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+# Tenant an orchestrator's own entry points submit as, and how many of its jobs run at once
+DEFAULT_TENANT = os.getenv('VM_TENANT', 'default')
+MAX_RUNNING = int(os.getenv('VM_QUEUE_MAX_RUNNING', 2))
+
+
+class QueuedJob:
+    """🎫 One tenant's prompt waiting for (or holding) an orchestration slot"""
+
+    def __init__(self, tenant, prompt, priority=NORMAL, options=None):
+        self.tenant = tenant
+        self.prompt = prompt
+        self.priority = priority
+        # Extra keyword arguments for the handler (e.g. timeout)
+        self.options = dict(options or {})
+        self.completion = StageCompletion(f"{tenant}: {prompt}")
+
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.charged = 0.0
+
+    def queue_wait(self):
+        """⏱️ Seconds between submission and dispatch"""
+        return (self.started_at or time.time()) - self.submitted_at
+
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class FairShareJobQueue:
+    """
+    ⚖️ PRIORITY + WEIGHTED FAIR-SHARE JOB QUEUE
+
+    Sits in front of an orchestrator so many tenants can share one VM
+    pool. Higher priority classes always dispatch first; within a class
+    the tenant that has used the least orchestration time (divided by its
+    weight) goes next, so one team's long "comprehensive" jobs can't
+    starve everyone else. Jobs run on one event loop, at most
+    max_running at a time.
+
+    OnePromptOrchestrator and SmartTaskDelegator route their own entry
+    points through one of these (orchestrator.queue), so direct calls
+    from several threads are queued and reported per tenant too.
+
+    Usage:
+        orchestrator = OnePromptOrchestrator()
+        queue = FairShareJobQueue(orchestrator.orchestrate_task_async, max_running=2)
+        queue.set_weight('research-team', 2.0)
+        queue.submit('research-team', "Research quantum computing", priority=HIGH)
+        queue.submit('sales', "Analyze the CRM market")
+        queue.run()
+    """
+
+    def __init__(self, handler, max_running=1, weights=None, fair_share=True):
+        self.handler = handler
+        self.max_running = max_running
+        self.weights = dict(weights or {})
+        # False: plain priority + submission order (useful as a baseline)
+        self.fair_share = fair_share
+
+        self.pending = []
+        self.jobs = []
+        self.usage = defaultdict(float)
+        self.lock = threading.Lock()
+
+        self.loop = None
+        self.wakeup = None
+        # A dispatcher has been claimed but hasn't set self.loop yet
+        self.starting = False
+
+    def set_weight(self, tenant, weight):
+        """⚖️ Give a tenant a bigger (or smaller) share of the VMs"""
+        self.weights[tenant] = weight
+
+    def weight(self, tenant):
+        return self.weights.get(tenant, 1.0)
+
+    def submit(self, tenant, prompt, priority=NORMAL, **options):
+        """📥 Queue a prompt for a tenant (safe to call from any thread, also while running)"""
+        job = QueuedJob(tenant, prompt, priority, options)
+        with self.lock:
+            if not any(queued.tenant == tenant for queued in self.pending):
+                # A tenant returning from idle starts level with the backlogged ones, not with saved-up credit
+                backlogged = [self.usage[queued.tenant] for queued in self.pending]
+                if backlogged:
+                    self.usage[tenant] = max(self.usage[tenant], min(backlogged))
+            self.pending.append(job)
+            self.jobs.append(job)
+            loop, wakeup = self.loop, self.wakeup
+
+        if loop is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+        return job
+
+    def submit_and_wait(self, tenant, prompt, priority=NORMAL, **options):
+        """
+        ⏳ Queue a prompt and block until it has run; returns the handler's result
+
+        If no dispatcher is running, this thread runs one (which also
+        drains anything else queued meanwhile); otherwise the running
+        dispatcher picks the job up. The handler's own exception is re-raised.
+        """
+        job = self.submit(tenant, prompt, priority, **options)
+        with self.lock:
+            dispatch = self.loop is None and not self.starting
+            self.starting = self.starting or dispatch
+        if dispatch:
+            run_sync(self.run_async())
+        job.completion.wait()
+        if job.completion.error is not None:
+            raise job.completion.error
+        return job.completion.result
+
+    def estimated_cost(self, tenant):
+        """Expected job seconds for a tenant, from its finished jobs (1s until we know)"""
+        durations = [job.duration() for job in self.jobs if job.tenant == tenant and job.duration() is not None]
+        return sum(durations) / len(durations) if durations else 1.0
+
+    def next_job(self):
+        """🎯 Highest priority class first, then the tenant furthest below its fair share, then FIFO"""
+        with self.lock:
+            if not self.pending:
+                return None
+            job = min(self.pending, key=lambda job: (job.priority,
+                                                     self.usage[job.tenant] if self.fair_share else 0.0,
+                                                     job.submitted_at))
+            self.pending.remove(job)
+
+            # Charge up front so a tenant can't grab every free slot before its first job finishes
+            job.charged = self.estimated_cost(job.tenant) / self.weight(job.tenant)
+            self.usage[job.tenant] += job.charged
+        return job
+
+    async def run_job(self, job):
+        """▶️ Run one job through the orchestrator and settle its tenant's usage"""
+        job.started_at = time.time()
+        print(f"🎫 Dispatching {job.tenant}'s {PRIORITY_NAMES.get(job.priority, job.priority)} job "
+              f"after {job.queue_wait():.1f}s in the queue: '{job.prompt}'")
+        try:
+            result = await self.handler(job.prompt, **job.options)
+        except Exception as e:
+            print(f"❌ {job.tenant}'s job failed: {e}")
+            job.completion.set_failure(e)
+        else:
+            job.completion.set_result(result)
+        finally:
+            job.finished_at = time.time()
+            with self.lock:
+                self.usage[job.tenant] += job.duration() / self.weight(job.tenant) - job.charged
+
+    async def run_async(self):
+        """🚰 Dispatch queued jobs until the queue is empty and nothing is running"""
+        with self.lock:
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+            self.starting = False
+        running = set()
+
+        try:
+            while True:
+                while len(running) < self.max_running:
+                    job = self.next_job()
+                    if job is None:
+                        break
+                    running.add(asyncio.ensure_future(self.run_job(job)))
+
+                if not running:
+                    with self.lock:
+                        # Stop under the lock, so a job submitted now finds no dispatcher and starts one
+                        if not self.pending:
+                            self.loop = None
+                            self.wakeup = None
+                            break
+                    continue
+
+                self.wakeup.clear()
+                waker = asyncio.ensure_future(self.wakeup.wait())
+                done, _ = await asyncio.wait(running | {waker}, return_when=asyncio.FIRST_COMPLETED)
+                waker.cancel()
+                running -= done
+        finally:
+            with self.lock:
+                self.loop = None
+                self.wakeup = None
+        return self.jobs
+
+    def run(self):
+        """⚖️ Synchronous entry point"""
+        run_sync(self.run_async())
+        self.print_report()
+        return self.jobs
+
+    def queue_wait_by_tenant(self):
+        """📊 {tenant: {'jobs', 'mean_wait', 'max_wait', 'busy_seconds'}} for dispatched jobs"""
+        report = {}
+        for tenant in dict.fromkeys(job.tenant for job in self.jobs):
+            dispatched = [job for job in self.jobs if job.tenant == tenant and job.started_at is not None]
+            waits = [job.queue_wait() for job in dispatched]
+            report[tenant] = {
+                'jobs': len(dispatched),
+                'mean_wait': sum(waits) / len(waits) if waits else 0.0,
+                'max_wait': max(waits, default=0.0),
+                'busy_seconds': sum(job.duration() or 0.0 for job in dispatched),
+            }
+        return report
+
+    def print_report(self):
+        """🏁 Per-tenant queue wait and share of orchestration time"""
+        report = self.queue_wait_by_tenant()
+        total_busy = sum(stats['busy_seconds'] for stats in report.values()) or 1e-9
+
+        print("\n⚖️ FAIR-SHARE QUEUE REPORT:")
+        print("=" * 70)
+        for tenant, stats in report.items():
+            print(f"   {tenant} (weight {self.weight(tenant):g}): {stats['jobs']} job(s), "
+                  f"queue wait mean {stats['mean_wait']:.1f}s / max {stats['max_wait']:.1f}s, "
+                  f"{stats['busy_seconds'] / total_busy:.0%} of orchestration time")
+        if self.pending:
+            print(f"   {len(self.pending)} job(s) still queued")
+
+
+def benchmark_fair_share(big_jobs=6, small_jobs=3, stage_latency=0.05, big_stages=8):
+    """🧪 Queue wait of a light tenant stuck behind a heavy one, FIFO vs fair share"""
+    print("\n⚖️ FAIR-SHARE BENCHMARK:")
+    print(f"   'bulk' submits {big_jobs} jobs of {big_stages} stages, then 'interactive' submits {small_jobs} one-stage jobs")
+    results = {}
+
+    for mode in ('fifo', 'fair'):
+        engine = AsyncOrchestrationEngine()
+        pool = VMPool(engine)
+        pool.add_vm(FakeComputer("vm1", latency=stage_latency), [RESEARCH])
+
+        async def handler(prompt):
+            stages = big_stages if prompt.startswith("comprehensive") else 1
+            async with pool.running():
+                for index in range(stages):
+                    await pool.run(RESEARCH, f"{prompt} step {index}")
+
+        queue = FairShareJobQueue(handler, max_running=1, fair_share=(mode == 'fair'))
+        for index in range(big_jobs):
+            queue.submit('bulk', f"comprehensive report {index}")
+        for index in range(small_jobs):
+            queue.submit('interactive', f"quick lookup {index}")
+
+        run_sync(queue.run_async())
+        engine.shutdown()
+        waits = queue.queue_wait_by_tenant()
+        results[mode] = waits
+        print(f"   {mode}: interactive mean wait {waits['interactive']['mean_wait']:.2f}s, "
+              f"bulk mean wait {waits['bulk']['mean_wait']:.2f}s")
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_fair_share()
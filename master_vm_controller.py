@@ -1,9 +1,12 @@
 import os
-import time
 import threading
 from dotenv import load_dotenv
 from orgo import Computer
 
+from status_log import vm_status_log
+from vm_provisioning import provision_vms
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
@@ -13,16 +16,18 @@ class MasterVMController:
         
         # Initialize all 3 VMs simultaneously
         print("🚀 Initializing all VMs...")
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)  # Research & Analysis VM
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Processing & Data VM  
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Presentation & Output VM
+        reap_leaked_computers(Computer, self.api_key)
+        self.provisioning = provision_vms({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research & Analysis VM
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing & Data VM
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Presentation & Output VM
+        })
+        self.vm1, self.vm2, self.vm3 = self.provisioning.require('vm1', 'vm2', 'vm3')
         
         print("✅ All 3 VMs connected and ready!")
         
         # Status tracking
-        self.vm1_status = "Ready"
-        self.vm2_status = "Ready" 
-        self.vm3_status = "Ready"
+        self.status_log = vm_status_log()
         
     def real_time_parallel_execution(self):
         """Execute interconnected tasks across all 3 VMs in real-time"""
@@ -36,14 +41,15 @@ class MasterVMController:
         vm2_thread = threading.Thread(target=self.vm2_data_processing) 
         vm3_thread = threading.Thread(target=self.vm3_presentation_creation)
         
-        # Start all VMs at the SAME TIME
+        # Start all VMs at the SAME TIME - the monitor prints status changes from here on
+        tail = self.status_log.tail(self.status_log.end())
         print("🚀 Launching all VMs simultaneously...")
         vm1_thread.start()
         vm2_thread.start() 
         vm3_thread.start()
         
         # Monitor progress in real-time
-        self.monitor_progress(vm1_thread, vm2_thread, vm3_thread)
+        self.monitor_progress(tail, vm1_thread, vm2_thread, vm3_thread)
         
         # Wait for all to complete
         vm1_thread.join()
@@ -56,7 +62,7 @@ class MasterVMController:
         
     def vm1_research_and_analysis(self):
         """VM1: Research and competitive analysis"""
-        self.vm1_status = "Working"
+        self.status_log.append('vm1', "Working")
         print("🔍 VM1: Starting research and analysis...")
         
         prompt = """
@@ -83,15 +89,15 @@ class MasterVMController:
         
         try:
             self.vm1.prompt(prompt)
-            self.vm1_status = "Completed"
+            self.status_log.append('vm1', "Completed")
             print("✅ VM1: Research and analysis COMPLETED!")
         except Exception as e:
-            self.vm1_status = f"Error: {e}"
+            self.status_log.append('vm1', f"Error: {e}")
             print(f"❌ VM1 Error: {e}")
             
     def vm2_data_processing(self):
         """VM2: Data processing and financial modeling"""
-        self.vm2_status = "Working"
+        self.status_log.append('vm2', "Working")
         print("⚙️ VM2: Starting data processing and financial modeling...")
         
         prompt = """
@@ -119,15 +125,15 @@ class MasterVMController:
         
         try:
             self.vm2.prompt(prompt)
-            self.vm2_status = "Completed"
+            self.status_log.append('vm2', "Completed")
             print("✅ VM2: Data processing and financial modeling COMPLETED!")
         except Exception as e:
-            self.vm2_status = f"Error: {e}"
+            self.status_log.append('vm2', f"Error: {e}")
             print(f"❌ VM2 Error: {e}")
             
     def vm3_presentation_creation(self):
         """VM3: Presentation and final deliverable creation"""
-        self.vm3_status = "Working"
+        self.status_log.append('vm3', "Working")
         print("📊 VM3: Starting presentation creation...")
         
         prompt = """
@@ -160,29 +166,27 @@ class MasterVMController:
         
         try:
             self.vm3.prompt(prompt)
-            self.vm3_status = "Completed"
+            self.status_log.append('vm3', "Completed")
             print("✅ VM3: Presentation creation COMPLETED!")
         except Exception as e:
-            self.vm3_status = f"Error: {e}"
+            self.status_log.append('vm3', f"Error: {e}")
             print(f"❌ VM3 Error: {e}")
     
-    def monitor_progress(self, vm1_thread, vm2_thread, vm3_thread):
-        """Monitor all VMs in real-time"""
+    def monitor_progress(self, tail, vm1_thread, vm2_thread, vm3_thread):
+        """Monitor all VMs in real-time - each status change is printed once, as it lands"""
         print("\n📊 REAL-TIME VM MONITORING:")
         print("-" * 50)
         
         while vm1_thread.is_alive() or vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"🔍 VM1 Status: {self.vm1_status}")
-            print(f"⚙️ VM2 Status: {self.vm2_status}")
-            print(f"📊 VM3 Status: {self.vm3_status}")
-            print("-" * 50)
-            time.sleep(10)  # Update every 10 seconds
+            # Wakes on the next status change (or after 10 seconds), never re-reads old ones
+            tail.print_new(wait=10)
+        tail.print_new()
             
         # Final status
         print("\n🏁 FINAL STATUS:")
-        print(f"🔍 VM1: {self.vm1_status}")
-        print(f"⚙️ VM2: {self.vm2_status}")
-        print(f"📊 VM3: {self.vm3_status}")
+        print(f"🔍 VM1: {self.status_log.latest('vm1')}")
+        print(f"⚙️ VM2: {self.status_log.latest('vm2')}")
+        print(f"📊 VM3: {self.status_log.latest('vm3')}")
     
     def alternative_task_workflow(self):
         """Alternative workflow: E-commerce business analysis"""
@@ -236,11 +240,10 @@ class MasterVMController:
     
     def cleanup(self):
         """Clean up all VM connections"""
+        self.provisioning.print_startup_metrics()
         print("\n🧹 Cleaning up all VMs...")
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
             print("✅ All VMs cleaned up successfully!")
         except Exception as e:
             print(f"⚠️ Cleanup warning: {e}")
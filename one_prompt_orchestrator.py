@@ -1,9 +1,18 @@
 import os
 import time
-import threading
+import asyncio
 from dotenv import load_dotenv
 from orgo import Computer
 
+from async_engine import AsyncOrchestrationEngine, run_sync
+from job_queue import DEFAULT_TENANT, MAX_RUNNING, NORMAL, FairShareJobQueue
+from research_fanout import ResearchFanout
+from stage_stats import HISTORY_PATH, DurationStats, stage_key
+from status_log import vm_status_log
+from vm_pool import VMPool, RESEARCH, PROCESSING, PRESENTATION
+from vm_provisioning import STAGE_VMS, SMALL_JOB_SECONDS, OnDemandVMs, ProvisioningFailed, add_stage_vms, vms_for_plan
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
@@ -21,9 +30,28 @@ class OnePromptOrchestrator:
     - Focus on essential content over visual perfection
     - Streamlined workflows for faster execution
     - Text-based data collection prioritized
+    
+    🏊 Stages are dispatched through a VM pool - add more machines with
+    orchestrator.pool.add_vm(limited(Computer(...)), [GENERIC]) for more throughput.
+    
+    ♨️ Pass a WarmVMPool to lease VMs from it; cleanup() then hands them
+    back for the next job instead of destroying them.
+    
+    🪄 VMs attach lazily: VM1 while the prompt is being planned, VM2 and
+    VM3 only if the plan is predicted to take longer than
+    small_job_seconds with its stages run back to back on one machine.
+    
+    🗺️ With more than one research-capable VM in the pool (e.g. extra
+    GENERIC machines), the research stage fans out into one sub-query per
+    VM and the merged notes are kept in orchestrator.research_notes.
+    
+    ⚖️ Prompts go through a fair-share job queue (orchestrator.queue):
+    orchestrate_task(prompt, tenant=..., priority=...) waits its turn, and
+    submit() + run_queued() take many tenants' prompts at once.
     """
     
-    def __init__(self):
+    def __init__(self, computers=None, history_path=HISTORY_PATH, warm_pool=None,
+                 small_job_seconds=SMALL_JOB_SECONDS):
         self.api_key = os.getenv('ORGO_API_KEY', 'your_orgo_api_key_here')
         
         # Set the new Anthropic API key
@@ -31,35 +59,129 @@ class OnePromptOrchestrator:
         
         print("🚀 Initializing One Prompt VM Orchestrator...")
         
-        # Initialize all 3 VMs with correct project IDs from your scripts
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Research VM
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)  # Processing VM
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Presentation VM
-        
-        print("✅ All 3 VMs connected and ready!")
+        if computers is not None:
+            # Pre-built machines (e.g. FakeComputers for simulated runs) are all used straight away
+            self.stage_vms = OnDemandVMs({name: (lambda computer=computer: computer)
+                                          for (name, _), computer in zip(STAGE_VMS, computers)},
+                                         wrap=None, register=False)
+        else:
+            reap_leaked_computers(Computer, self.api_key)
+
+            # VMs with correct project IDs from your scripts, attached once a plan needs them
+            self.stage_vms = OnDemandVMs({
+                'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research VM
+                'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing VM
+                'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Presentation VM
+            }, warm_pool=warm_pool)
+        self.provisioning = self.stage_vms.provisioning
+        self.small_job_seconds = small_job_seconds
         
         # Status tracking
-        self.vm1_status = "Ready"
-        self.vm2_status = "Ready"
-        self.vm3_status = "Ready"
+        self.status_log = vm_status_log()
+        
+        # One event loop drives every VM prompt
+        self.engine = AsyncOrchestrationEngine()
+        
+        # Measured stage durations per template, kept across runs to predict completion times
+        self.durations = DurationStats(path=history_path)
+        
+        # Stage tasks are pulled from a shared queue by any VM with the right capability
+        self.pool = VMPool(self.engine, durations=self.durations, replace_vm=self.stage_vms.replace)
+        
+        # Every entry point queues here, so tenants share the VMs fairly
+        self.queue = FairShareJobQueue(self.orchestrate_task_async, max_running=MAX_RUNNING)
+        
+        # Research splits across the pool's research-capable VMs when there is more than one
+        self.fanout = ResearchFanout(self.pool)
+        self.research_notes = None
+        
+        if computers is not None:
+            self.attach_stage_vms(len(computers))
+            add_stage_vms(self.pool, self.provisioning)
+            print(f"✅ {len(self.provisioning.computers)} of 3 VMs connected and ready!")
+        else:
+            print("✅ Ready - VMs attach as soon as a plan says how many it needs")
+    
+    def attach_stage_vms(self, count):
+        """🪄 Make sure the first `count` stage VMs are attached and in the pool"""
+        self.stage_vms.ensure(count)
+        if not self.provisioning.computers:
+            raise ProvisioningFailed("No VMs could be attached")
     
-    def orchestrate_task(self, user_prompt):
-        """🧠 Intelligently orchestrate task across all 3 VMs"""
+    def vms_needed(self, task_plan):
+        """🪶 How many VMs the plan is worth, from its predicted stage durations"""
+        return vms_for_plan([self.durations.expected(stage_key(task_plan['template'], stage), stage)
+                             for stage in (RESEARCH, PROCESSING, PRESENTATION)], self.small_job_seconds)
+    
+    def orchestrate_task(self, user_prompt, timeout=None, tenant=DEFAULT_TENANT, priority=NORMAL):
+        """🧠 Intelligently orchestrate task across all 3 VMs (synchronous entry point, queued per tenant)"""
+        return self.queue.submit_and_wait(tenant, user_prompt, priority, timeout=timeout)
+    
+    def submit(self, tenant, prompt, priority=NORMAL, timeout=None):
+        """📥 Queue a tenant's prompt; run_queued() dispatches it"""
+        return self.queue.submit(tenant, prompt, priority, timeout=timeout)
+    
+    def run_queued(self):
+        """⚖️ Run every queued prompt, fair-shared between tenants, and print their queue waits"""
+        return self.queue.run()
+    
+    async def orchestrate_task_async(self, user_prompt, timeout=None):
+        """🧠 Async orchestration - many of these can share one event loop
+        
+        timeout: seconds the whole job may take; stages still queued or
+        running when it expires are failed and their VMs released.
+        """
+        self.provisioning.accept_task()
+        deadline = time.time() + timeout if timeout else None
         
         print(f"\n🧠 ORCHESTRATING TASK: '{user_prompt}'")
         print("="*80)
         
+        # VM1 is needed whatever the plan says - attach it while planning
+        first_vm = asyncio.ensure_future(self.engine.run_blocking(self.stage_vms.ensure, 1))
+        
         # Analyze prompt and create intelligent task delegation
         task_plan = self.analyze_prompt_and_create_tasks(user_prompt)
+        task_plan['prompt'] = user_prompt
+        task_plan['vms'] = self.vms_needed(task_plan)
         
         print("🎯 TASK DELEGATION PLAN:")
         print(f"🔍 VM1 (Research): {task_plan['research_focus']}")
         print(f"⚙️ VM2 (Processing): {task_plan['processing_focus']}")
         print(f"📊 VM3 (Presentation): {task_plan['presentation_focus']}")
+        if self.history_runs(task_plan):
+            print(f"⏱️ Predicted completion: ~{self.predict_completion(task_plan):.0f}s "
+                  f"(from {self.history_runs(task_plan)} past '{task_plan['template']}' run(s))")
+        else:
+            print(f"⏱️ Predicted completion: unknown until a '{task_plan['template']}' job has been timed")
+        print(f"🖥️ VMs needed: {task_plan['vms']}")
         print("="*80)
         
+        await first_vm
+        await self.engine.run_blocking(self.attach_stage_vms, task_plan['vms'])
+        add_stage_vms(self.pool, self.provisioning)
+        
         # Execute all VMs in parallel
-        self.execute_parallel_tasks(task_plan)
+        await self.execute_parallel_tasks_async(task_plan, deadline)
+        self.durations.save()
+    
+    def predict_completion(self, task_plan):
+        """⏱️ Seconds until the last stage should finish on the plan's VMs, from measured history
+        
+        Stages that share a VM run back to back: one VM takes the sum of
+        the stage durations, one VM per stage takes the slowest stage.
+        """
+        seconds = sorted((self.durations.expected(stage_key(task_plan['template'], stage), stage)
+                          for stage in (RESEARCH, PROCESSING, PRESENTATION)), reverse=True)
+        busy = [0.0] * max(task_plan.get('vms', len(seconds)), 1)
+        for stage_seconds in seconds:
+            # Each stage goes to whichever VM frees up first
+            busy[busy.index(min(busy))] += stage_seconds
+        return max(busy)
+    
+    def history_runs(self, task_plan):
+        """How many timed runs of this template's research stage the prediction is based on"""
+        return self.durations.count(stage_key(task_plan['template'], RESEARCH))
     
     def analyze_prompt_and_create_tasks(self, prompt):
         """🤖 Smart prompt analysis and task creation"""
@@ -82,6 +204,7 @@ class OnePromptOrchestrator:
     def create_research_focused_tasks(self, prompt):
         """📊 Research-focused task delegation"""
         return {
+            'template': 'research',
             'research_focus': 'Comprehensive research and data gathering',
             'processing_focus': 'Data analysis and insights generation',
             'presentation_focus': 'Research findings presentation',
@@ -140,6 +263,7 @@ class OnePromptOrchestrator:
     def create_business_focused_tasks(self, prompt):
         """💼 Business-focused task delegation"""
         return {
+            'template': 'business',
             'research_focus': 'Market research and competitive analysis',
             'processing_focus': 'Financial modeling and business analytics',
             'presentation_focus': 'Business strategy presentation',
@@ -184,6 +308,7 @@ class OnePromptOrchestrator:
     def create_creative_focused_tasks(self, prompt):
         """🎨 Creative-focused task delegation"""
         return {
+            'template': 'creative',
             'research_focus': 'Creative research and inspiration gathering',
             'processing_focus': 'Content development and structure',
             'presentation_focus': 'Creative deliverable design',
@@ -222,6 +347,7 @@ class OnePromptOrchestrator:
     def create_general_analysis_tasks(self, prompt):
         """📋 General analysis task delegation"""
         return {
+            'template': 'general',
             'research_focus': 'Information gathering and research',
             'processing_focus': 'Data processing and analysis',
             'presentation_focus': 'Final deliverable creation',
@@ -257,86 +383,91 @@ class OnePromptOrchestrator:
             """
         }
     
-    def execute_parallel_tasks(self, task_plan):
-        """🚀 Execute all VM tasks in parallel"""
+    def execute_parallel_tasks(self, task_plan, deadline=None):
+        """🚀 Execute all VM tasks in parallel (synchronous entry point)"""
+        return run_sync(self.execute_parallel_tasks_async(task_plan, deadline))
+    
+    async def execute_parallel_tasks_async(self, task_plan, deadline=None):
+        """🚀 Execute all VM tasks in parallel on the event loop (deadline: absolute time.time())"""
         
         print("\n🚀 EXECUTING TASKS ACROSS ALL 3 VMs SIMULTANEOUSLY...")
         
-        # Create threads for parallel execution
-        vm1_thread = threading.Thread(target=self.execute_vm1_research, args=(task_plan['vm1_task'],))
-        vm2_thread = threading.Thread(target=self.execute_vm2_processing, args=(task_plan['vm2_task'],))
-        vm3_thread = threading.Thread(target=self.execute_vm3_presentation, args=(task_plan['vm3_task'],))
-        
-        # Start all VMs at the same time
-        print("⚡ All VMs starting simultaneously...")
-        vm1_thread.start()
-        vm2_thread.start()
-        vm3_thread.start()
-        
-        # Monitor progress
-        self.monitor_all_vms(vm1_thread, vm2_thread, vm3_thread)
-        
-        # Wait for completion
-        vm1_thread.join()
-        vm2_thread.join()
-        vm3_thread.join()
+        async with self.pool.running():
+            # Queue all stages at the same time
+            print("⚡ All VMs starting simultaneously...")
+            template = task_plan.get('template')
+            vm1_task = asyncio.ensure_future(self.execute_vm1_research(task_plan['vm1_task'], deadline, template,
+                                                                       task_plan.get('prompt')))
+            vm2_task = asyncio.ensure_future(self.execute_vm2_processing(task_plan['vm2_task'], deadline, template))
+            vm3_task = asyncio.ensure_future(self.execute_vm3_presentation(task_plan['vm3_task'], deadline, template))
+            
+            # Monitor progress until every VM has finished
+            await self.monitor_all_vms(vm1_task, vm2_task, vm3_task)
+            self.pool.print_pool_status()
         
         print("\n🎉 ALL VMs COMPLETED THEIR ORCHESTRATED TASKS!")
         self.show_completion_summary()
     
-    def execute_vm1_research(self, task):
-        """🔍 Execute VM1 research task"""
-        self.vm1_status = "Researching..."
+    async def execute_vm1_research(self, task, deadline=None, template=None, prompt=None):
+        """🔍 Execute VM1 research task (fanned out over every research-capable VM when there are several)"""
+        self.status_log.append('vm1', "Researching...")
         print("🔍 VM1: Starting research task...")
         try:
-            self.vm1.prompt(task)
-            self.vm1_status = "Research Complete ✅"
+            if prompt is not None and self.fanout.fanout_width() > 1:
+                self.research_notes = await self.fanout.research(prompt, deadline)
+                print(f"🗺️ Merged research notes: {len(self.research_notes)} characters")
+            else:
+                await self.pool.run(RESEARCH, task, label="vm1_research", deadline=deadline, template=template)
+            self.status_log.append('vm1', "Research Complete ✅")
             print("✅ VM1: Research COMPLETED!")
         except Exception as e:
-            self.vm1_status = f"Error: {e}"
+            self.status_log.append('vm1', f"Error: {e}")
             print(f"❌ VM1 Error: {e}")
     
-    def execute_vm2_processing(self, task):
+    async def execute_vm2_processing(self, task, deadline=None, template=None):
         """⚙️ Execute VM2 processing task"""
-        self.vm2_status = "Processing..."
+        self.status_log.append('vm2', "Processing...")
         print("⚙️ VM2: Starting processing task...")
         try:
-            self.vm2.prompt(task)
-            self.vm2_status = "Processing Complete ✅"
+            await self.pool.run(PROCESSING, task, label="vm2_processing", deadline=deadline, template=template)
+            self.status_log.append('vm2', "Processing Complete ✅")
             print("✅ VM2: Processing COMPLETED!")
         except Exception as e:
-            self.vm2_status = f"Error: {e}"
+            self.status_log.append('vm2', f"Error: {e}")
             print(f"❌ VM2 Error: {e}")
     
-    def execute_vm3_presentation(self, task):
+    async def execute_vm3_presentation(self, task, deadline=None, template=None):
         """📊 Execute VM3 presentation task"""
-        self.vm3_status = "Creating presentation..."
+        self.status_log.append('vm3', "Creating presentation...")
         print("📊 VM3: Starting presentation task...")
         try:
-            self.vm3.prompt(task)
-            self.vm3_status = "Presentation Complete ✅"
+            await self.pool.run(PRESENTATION, task, label="vm3_presentation", deadline=deadline, template=template)
+            self.status_log.append('vm3', "Presentation Complete ✅")
             print("✅ VM3: Presentation COMPLETED!")
         except Exception as e:
-            self.vm3_status = f"Error: {e}"
+            self.status_log.append('vm3', f"Error: {e}")
             print(f"❌ VM3 Error: {e}")
     
-    def monitor_all_vms(self, vm1_thread, vm2_thread, vm3_thread):
+    async def monitor_all_vms(self, *vm_tasks):
         """📊 Real-time monitoring of all VMs"""
         print("\n📊 REAL-TIME VM MONITORING:")
         print("-" * 70)
         
-        while vm1_thread.is_alive() or vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"🔍 VM1 Research: {self.vm1_status}")
-            print(f"⚙️ VM2 Processing: {self.vm2_status}")
-            print(f"📊 VM3 Presentation: {self.vm3_status}")
-            print("-" * 70)
-            time.sleep(5)  # Update every 5 seconds for faster monitoring
+        # Only status changes since the VMs were queued are printed, each once
+        tail = self.status_log.tail(self.status_log.end())
+        pending = set(vm_tasks)
+        while pending:
+            if tail.print_new():
+                print("-" * 70)
+            # Wake on the 5 second tick or as soon as the last VM finishes
+            done, pending = await asyncio.wait(pending, timeout=5)
+        tail.print_new()
         
         # Final status
         print("🏁 FINAL STATUS:")
-        print(f"🔍 VM1: {self.vm1_status}")
-        print(f"⚙️ VM2: {self.vm2_status}")
-        print(f"📊 VM3: {self.vm3_status}")
+        print(f"🔍 VM1: {self.status_log.latest('vm1')}")
+        print(f"⚙️ VM2: {self.status_log.latest('vm2')}")
+        print(f"📊 VM3: {self.status_log.latest('vm3')}")
     
     def show_completion_summary(self):
         """📋 Show task completion summary"""
@@ -353,14 +484,15 @@ class OnePromptOrchestrator:
     
     def cleanup(self):
         """🧹 Clean up all VM connections"""
+        self.provisioning.print_startup_metrics()
         print("\n🧹 Cleaning up all VMs...")
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
             print("✅ All VMs cleaned up successfully!")
         except Exception as e:
             print(f"⚠️ Cleanup warning: {e}")
+        finally:
+            self.engine.shutdown()
 
 def main():
     """🎯 Main orchestrator function"""
@@ -386,6 +518,7 @@ def main():
         
         print(f"\n🎉 SUCCESS! Your prompt '{user_prompt}' was intelligently")
         print("   orchestrated across all 3 VMs with specialized task distribution!")
+        orchestrator.queue.print_report()
         
     except KeyboardInterrupt:
         print("\n⚠️ Orchestration interrupted by user")
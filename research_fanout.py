@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+
+from async_engine import await_completion
+from vm_files import read_vm_file, safe_slug
+from vm_pool import RESEARCH
+
+# Sub-queries one research stage is split into (capped by the research VMs in the pool)
+SUB_QUERIES = int(os.getenv('VM_RESEARCH_FANOUT', 3))
+
+# Angles a research question is split along, in order of priority
+RESEARCH_ANGLES = [
+    "key statistics, market size and hard numbers",
+    "recent news and developments from the last 12 months",
+    "expert opinions and authoritative analysis",
+    "future trends and forecasts",
+    "major players, products and competitors",
+    "challenges, risks and open problems",
+]
+
+
+class ResearchFanout:
+    """
+    🗺️ MAP-REDUCE RESEARCH FAN-OUT
+
+    Splits one research stage into K sub-queries (one angle each), runs
+    them on K research-capable VMs at the same time and merges the
+    partial notes into a single research artifact. K is capped by the
+    number of VMs in the pool that can run research.
+    """
+
+    def __init__(self, pool, sub_queries=SUB_QUERIES):
+        self.pool = pool
+        self.sub_queries = sub_queries
+
+    def fanout_width(self):
+        """How many sub-queries to actually run, capped by pool size and known angles"""
+        research_vms = sum(1 for vm in self.pool.vms if vm.can_run(RESEARCH))
+        return max(1, min(self.sub_queries, research_vms, len(RESEARCH_ANGLES)))
+
+    def split(self, prompt, width):
+        """✂️ One sub-query instruction per angle"""
+        # Filenames end up in shell commands on the VM, so no raw user text in them
+        slug = safe_slug(prompt)
+        sub_queries = []
+        for index, angle in enumerate(RESEARCH_ANGLES[:width], start=1):
+            filename = f"research_{slug}_part{index}.txt"
+            instruction = f"""
+            RESEARCH SUB-QUERY {index}/{width} for: "{prompt}"
+
+            FOCUS ONLY ON: {angle}
+            Other VMs are covering the other angles - do not duplicate them.
+
+            1. Open browser and search for: {prompt} {angle}
+            2. Read 1-2 authoritative sources for this angle only
+            3. Copy key facts, numbers and source URLs into a text editor
+            4. Save as '{filename}' quickly
+
+            PRIORITY: Speed and concrete data over visual browsing.
+            """
+            sub_queries.append((angle, filename, instruction))
+        return sub_queries
+
+    async def run_sub_query(self, index, angle, filename, instruction, deadline=None):
+        """🔍 Run one sub-query on whichever research VM is free, then pull its notes"""
+        task = await self.pool.submit(RESEARCH, instruction, label=f"research-part{index}", deadline=deadline)
+        await await_completion(task.completion)
+        task.completion.get()
+
+        notes = None
+        vm = next((vm for vm in self.pool.vms if vm.name == task.vm_name), None)
+        if vm is None:
+            # Quarantined, replaced or scaled away since it finished - its disk is gone with it
+            print(f"⚠️ {task.vm_name} left the pool after research part {index} - its notes are missing")
+        else:
+            try:
+                notes = await self.pool.engine.run_blocking(read_vm_file, vm.computer, filename)
+            except Exception as e:
+                print(f"⚠️ Could not read research part {index} from {vm.name}: {e}")
+        return {
+            'index': index,
+            'angle': angle,
+            'filename': filename,
+            'vm': task.vm_name,
+            'seconds': task.finished_at - task.started_at,
+            'notes': notes.decode(errors='replace') if notes else None,
+        }
+
+    def merge(self, prompt, parts):
+        """🧩 Reduce partial notes into one research artifact"""
+        lines = [f"=== MERGED RESEARCH: {prompt} ===", f"Sources: {len(parts)} parallel sub-queries", ""]
+        for part in parts:
+            lines.append(f"--- Part {part['index']}/{len(parts)}: {part['angle']} ({part['vm']}) ---")
+            lines.append(part['notes'].strip() if part['notes'] else f"[notes not retrievable - see {part['filename']} on {part['vm']}]")
+            lines.append("")
+        return "\n".join(lines)
+
+    async def research(self, prompt, deadline=None):
+        """🗺️ Fan out, wait for every partial, and return the merged artifact"""
+        return self.merge(prompt, await self.gather_parts(prompt, deadline))
+
+    async def gather_parts(self, prompt, deadline=None):
+        """Run every sub-query concurrently and return the partial notes"""
+        width = self.fanout_width()
+        start = time.time()
+        print(f"🗺️ Research fan-out: {width} sub-queries for '{prompt}'")
+
+        parts = await asyncio.gather(*[
+            self.run_sub_query(index, angle, filename, instruction, deadline)
+            for index, (angle, filename, instruction) in enumerate(self.split(prompt, width), start=1)
+        ])
+
+        elapsed = time.time() - start
+        slowest = max(part['seconds'] for part in parts)
+        print(f"✅ Research fan-out finished {width} parts in {elapsed:.1f}s "
+              f"(serial would be ~{sum(part['seconds'] for part in parts):.1f}s, slowest part {slowest:.1f}s)")
+        return parts
@@ -0,0 +1,252 @@
+import os
+import time
+import tempfile
+import threading
+
+from artifact_store import ArtifactStore
+from fake_computer import FakeComputer
+from research_fanout import RESEARCH_ANGLES
+from vm_files import UPLOAD_DIR, ArtifactTransfers, write_vm_file
+
+# Research parts VM1 streams, and how many VM2 waits for before starting its analysis
+STREAM_CHUNKS = int(os.getenv('VM_STREAM_CHUNKS', 4))
+FIRST_CHUNKS = int(os.getenv('VM_STREAM_FIRST_CHUNKS', 2))
+
+# How long a reader waits for the next part before giving up on the stream
+CHUNK_TIMEOUT = float(os.getenv('VM_STREAM_CHUNK_TIMEOUT', 15 * 60))
+
+
+class ResearchChunk:
+    """🧩 One part of VM1's research, as it landed"""
+
+    def __init__(self, index, angle, filename, text):
+        self.index = index
+        self.angle = angle
+        self.filename = filename
+        self.text = text
+        self.arrived_at = time.time()
+
+
+class ResearchStream:
+    """
+    🌊 APPEND-ONLY STREAM OF RESEARCH PARTS
+
+    VM1 appends one chunk per research angle as each is saved; readers
+    block until there is something past the offset they have consumed,
+    so VM2 can start on the first parts while VM1 is still researching
+    the rest. If VM1 fails the error is raised in every reader.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.changed = threading.Condition()
+        self.chunks = []
+        self.closed = False
+        self.error = None
+        self.opened_at = time.time()
+        self.closed_at = None
+
+    def append(self, chunk):
+        with self.changed:
+            self.chunks.append(chunk)
+            self.changed.notify_all()
+
+    def close(self):
+        """🏁 No more parts are coming"""
+        with self.changed:
+            self.closed = True
+            self.closed_at = time.time()
+            self.changed.notify_all()
+
+    def fail(self, error):
+        with self.changed:
+            self.error = error
+            self.closed = True
+            self.closed_at = time.time()
+            self.changed.notify_all()
+
+    def read_from(self, offset, min_count=1, timeout=CHUNK_TIMEOUT):
+        """
+        📖 chunks[offset:] once at least min_count new ones have landed
+
+        Returns fewer if the stream ends first ([] once it is exhausted).
+        Raises the producer's error if VM1 failed.
+        """
+        deadline = time.time() + timeout
+        with self.changed:
+            while True:
+                if self.error is not None:
+                    raise RuntimeError(f"Research stream failed: {self.error}") from self.error
+                if len(self.chunks) - offset >= min_count or self.closed:
+                    return self.chunks[offset:]
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No research part after {len(self.chunks)} within {timeout:g}s")
+                self.changed.wait(remaining)
+
+    def merged(self, prompt):
+        """🧩 Every part so far as one research document"""
+        with self.changed:
+            chunks = list(self.chunks)
+        lines = [f"=== STREAMED RESEARCH: {prompt} ===", f"Parts: {len(chunks)}/{self.total}", ""]
+        for chunk in chunks:
+            lines.append(f"--- Part {chunk.index}/{self.total}: {chunk.angle} ---")
+            lines.append(chunk.text.strip())
+            lines.append("")
+        return "\n".join(lines)
+
+
+def chunk_filename(index):
+    return f"vm1_research_part{index}.txt"
+
+
+def stream_research(computer, prompt, stream, transfers, merged_filename='vm1_research_data.txt'):
+    """
+    🌊 VM1 side: research one angle per prompt on the same VM, publishing each part as it is saved
+
+    When every part is in, the merged research is also saved on VM1 as
+    merged_filename for stages that read the whole thing. Returns that filename.
+    """
+    try:
+        for index, angle in enumerate(RESEARCH_ANGLES[:stream.total], start=1):
+            filename = chunk_filename(index)
+            computer.prompt(f"""
+            RESEARCH PART {index}/{stream.total} for: "{prompt}"
+
+            FOCUS ONLY ON: {angle}
+            Your findings are handed to VM2 as soon as you save - keep it tight.
+
+            1. Open browser and search for: {prompt} {angle}
+            2. Read 1-2 authoritative sources for this angle only
+            3. Copy key facts, numbers and source URLs into a text editor
+            4. Save as '{filename}' quickly
+            """)
+            data = transfers.pull(computer, filename, 'VM1')
+            text = data.decode(errors='replace') if data else f"[part {index} was not saved - see {filename} on VM1]"
+            stream.append(ResearchChunk(index, angle, filename, text))
+            print(f"🌊 VM1 → stream: research part {index}/{stream.total} ({angle}) after "
+                  f"{time.time() - stream.opened_at:.1f}s")
+        write_vm_file(computer, merged_filename, stream.merged(prompt))
+        stream.close()
+        return merged_filename
+    except Exception as e:
+        stream.fail(e)
+        raise
+
+
+def analyze_stream(computer, source, stream, transfers, task, output_filename, first_chunks=FIRST_CHUNKS,
+                   merged_filename='vm1_research_data.txt'):
+    """
+    📈 VM2 side: start the analysis on the first parts, then fold in later parts as they land
+
+    If the stream ends without a single part, VM2 analyzes VM1's merged
+    research file in one prompt instead. Returns {'first_insight_at': when
+    the first analysis was saved, 'updates': follow-up prompts}.
+    """
+    def receive(chunks):
+        for chunk in chunks:
+            transfers.hand_off(chunk.filename, source, computer, 'VM1', 'VM2')
+        return "\n".join(f"               - {chunk.filename} ({chunk.angle})" for chunk in chunks)
+
+    chunks = stream.read_from(0, max(1, min(first_chunks, stream.total)))
+    if not chunks:
+        print(f"⚠️ VM2: no research parts were streamed - analyzing '{merged_filename}' instead")
+        transfers.hand_off(merged_filename, source, computer, 'VM1', 'VM2')
+        computer.prompt(task)
+        return {'first_insight_at': time.time(), 'updates': 0}
+    files = receive(chunks)
+    computer.prompt(f"""
+            RESEARCH IS STREAMING IN FROM VM1 - parts {chunks[0].index}-{chunks[-1].index} of {stream.total}
+            are already on {UPLOAD_DIR}:
+{files}
+            Wherever the task below mentions 'vm1_research_data.txt', use these parts instead.
+            Start the analysis from them NOW; later parts will arrive as follow-up updates.
+            {task}
+            """)
+    first_insight_at = time.time()
+    print(f"💡 VM2: first analysis from {len(chunks)} part(s) after {first_insight_at - stream.opened_at:.1f}s")
+
+    offset = len(chunks)
+    updates = 0
+    while True:
+        chunks = stream.read_from(offset)
+        if not chunks:
+            break
+        offset += len(chunks)
+        updates += 1
+        files = receive(chunks)
+        computer.prompt(f"""
+            RESEARCH UPDATE - parts {chunks[0].index}-{chunks[-1].index} of {stream.total} just arrived on {UPLOAD_DIR}:
+{files}
+            1. Open the new part(s) and read the findings
+            2. Keep working in the open analysis: add the new data, update tables and charts
+            3. Save '{output_filename}' again
+            """)
+    return {'first_insight_at': first_insight_at, 'updates': updates}
+
+
+def print_stream_report(stream, first_insight_at, finished_at=None):
+    finished_at = finished_at or time.time()
+    arrivals = ", ".join(f"{chunk.arrived_at - stream.opened_at:.1f}s" for chunk in stream.chunks)
+    print(f"🌊 RESEARCH STREAM: {len(stream.chunks)}/{stream.total} part(s) landed at {arrivals}")
+    if first_insight_at is not None:
+        print(f"   💡 time to first insight {first_insight_at - stream.opened_at:.1f}s, "
+              f"total {finished_at - stream.opened_at:.1f}s")
+
+
+def benchmark_streaming(research_seconds=1.2, analysis_seconds=1.0, chunks=4, first_chunks=1,
+                        prompt_overhead=0.05):
+    """
+    🧪 Serial VM1 → VM2 vs streamed research parts, on fake VMs
+
+    The fake agent spends research_seconds on the whole research (split
+    evenly across parts, plus prompt_overhead per prompt). Analysis of
+    the first parts takes 60% of analysis_seconds and each later update
+    20%, since the spreadsheet is already built.
+    """
+    print("\n🌊 STREAMING RESEARCH BENCHMARK:")
+    print(f"   research {research_seconds}s, analysis {analysis_seconds}s, {chunks} parts, "
+          f"VM2 starts after {first_chunks}")
+
+    def research_latency(instruction):
+        if "RESEARCH PART" in instruction:
+            return research_seconds / chunks + prompt_overhead
+        return research_seconds
+
+    def analysis_latency(instruction):
+        if "RESEARCH UPDATE" in instruction:
+            return 0.2 * analysis_seconds + prompt_overhead
+        if "STREAMING IN" in instruction:
+            return 0.6 * analysis_seconds + prompt_overhead
+        return analysis_seconds
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        transfers = ArtifactTransfers(store=ArtifactStore(directory))
+        for mode in ("serial", "streamed"):
+            vm1 = FakeComputer("vm1", latency=research_latency)
+            vm2 = FakeComputer("vm2", latency=analysis_latency)
+            start = time.time()
+            if mode == "serial":
+                vm1.prompt("Research everything and save as 'vm1_research_data.txt'")
+                vm2.prompt("Analyze 'vm1_research_data.txt' and save as 'vm2_analysis_data.xlsx'")
+                first_insight = total = time.time() - start
+            else:
+                transfers.pulled.clear()
+                stream = ResearchStream(chunks)
+                producer = threading.Thread(target=stream_research, args=(vm1, "benchmark", stream, transfers))
+                producer.start()
+                outcome = analyze_stream(vm2, vm1, stream, transfers, "Analyze the research.",
+                                         'vm2_analysis_data.xlsx', first_chunks)
+                producer.join()
+                first_insight = outcome['first_insight_at'] - start
+                total = time.time() - start
+
+            results[mode] = {'first_insight': first_insight, 'total': total}
+            print(f"   {mode}: first insight after {first_insight:.2f}s, VM1+VM2 done after {total:.2f}s")
+        transfers.store.close()
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_streaming()
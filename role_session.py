@@ -0,0 +1,66 @@
+import time
+
+from vm_pool import app_ready_instruction
+
+
+class RoleSession:
+    """
+    🔁 ONE LIVE COMPUTER REUSED ACROSS A ROLE VM'S TASKS
+
+    The standalone role VMs (research / processing / presentation) keep
+    their Computer between calls. Once a task has opened the role's app,
+    later tasks are told it is already open so the agent skips the launch
+    steps, and batches report each task's latency plus the per-task
+    latency with the VM's startup amortized over the whole batch.
+    """
+
+    def __init__(self, factory, capability):
+        start = time.time()
+        self.computer = factory()
+        self.startup_seconds = time.time() - start
+        self.capability = capability
+        self.app_open = False
+        self.tasks_run = 0
+
+    def prompt(self, instruction, in_app=True):
+        """🤖 Prompt the session; in_app tasks start in the role's app (opened by the first of them)"""
+        if in_app and self.app_open:
+            instruction = app_ready_instruction(self.capability, instruction)
+        self.computer.prompt(instruction)
+        self.tasks_run += 1
+        if in_app:
+            self.app_open = True
+
+    def run_many(self, task, items, label="task"):
+        """
+        📦 Run task(item) for every item back to back on this session
+
+        A failing task is reported and the batch moves on. Returns
+        {'latencies': {item: seconds}, 'failed': {item: error},
+        'amortized_seconds': per-task seconds including startup}.
+        """
+        items = list(items)
+        # The first task of a fresh session pays the VM startup; later batches ride on it
+        startup = self.startup_seconds if self.tasks_run == 0 else 0.0
+        print(f"📦 Running {len(items)} {label}(s) on one session")
+
+        latencies = {}
+        failed = {}
+        start = time.time()
+        for index, item in enumerate(items, 1):
+            task_start = time.time()
+            try:
+                task(item)
+            except Exception as e:
+                failed[item] = e
+                print(f"   ❌ {label} {index}/{len(items)} ({item}) failed: {e}")
+                continue
+            latencies[item] = time.time() - task_start
+            print(f"   ⏱️ {label} {index}/{len(items)} ({item}): {latencies[item]:.1f}s")
+        elapsed = time.time() - start
+
+        amortized = (startup + elapsed) / len(items) if items else None
+        if items:
+            print(f"📦 {len(latencies)}/{len(items)} {label}(s) done in {elapsed:.1f}s "
+                  f"(+{startup:.1f}s VM startup) - {amortized:.1f}s per {label} amortized")
+        return {'latencies': latencies, 'failed': failed, 'amortized_seconds': amortized}
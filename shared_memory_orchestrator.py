@@ -1,21 +1,44 @@
 import os
 import time
-import threading
 from dotenv import load_dotenv
 from orgo import Computer
 
+from blackboard import ANALYSIS, INSIGHTS, PRESENTATION, RESEARCH, TASK, Blackboard
+from job_journal import JobJournal
+from stage_scheduler import StageCompletion, StageScheduler
+from status_log import VM_LABELS, vm_status_log
+from vm_provisioning import provision_vms
+from vm_files import ArtifactTransfers
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
+# The shared memory section each stage publishes, and the text file its agent saves it to
+STAGE_SECTIONS = {
+    'vm1': (RESEARCH, 'vm1_research_section.txt'),
+    'vm2': (ANALYSIS, 'vm2_analysis_section.txt'),
+    'vm3': (PRESENTATION, 'vm3_presentation_section.txt'),
+}
+
+# Deliverables kept in the artifact store once their stage finishes
+STAGE_ARTIFACTS = {
+    'vm2': 'analysis_using_shared_memory.xlsx',
+    'vm3': 'final_shared_memory_presentation.pptx',
+}
+
+# Lines in a published section that are copied into the shared insights
+INSIGHT_PREFIX = "INSIGHT:"
+
 class SharedMemoryOrchestrator:
     """
     🧠 SHARED MEMORY VM ORCHESTRATOR - REVOLUTIONARY CONCEPT
     
     SHARED MEMORY SYSTEM:
-    - All 3 VMs access the same shared memory file
-    - VMs can read and write to common memory space
-    - Real-time memory updates visible to all VMs
-    - Seamless data sharing without file searching
+    - The orchestrator hosts the shared memory as a versioned blackboard
+    - Each stage's section is published the moment the stage finishes
+    - Downstream stages block on the sections they read and get them
+      pasted into their prompt - no agent hunting for a file in a GUI
     """
     
     def __init__(self):
@@ -26,30 +49,49 @@ class SharedMemoryOrchestrator:
         
         print("🧠 Initializing SHARED MEMORY VM Orchestrator...")
         
+        reap_leaked_computers(Computer, self.api_key)
+
         # Initialize all 3 VMs
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Research VM
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Processing VM
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Presentation VM
+        self.provisioning = provision_vms({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research VM
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing VM
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Presentation VM
+        })
+        self.vm1, self.vm2, self.vm3 = self.provisioning.require('vm1', 'vm2', 'vm3')
         
         print("✅ All 3 VMs connected to SHARED MEMORY system!")
         
         # Status tracking
-        self.vm1_status = "Ready"
-        self.vm2_status = "Ready"
-        self.vm3_status = "Ready"
+        self.status_log = vm_status_log({**VM_LABELS, 'system': "🧠 System"})
         
         # Completion tracking
         self.vm1_complete = False
         self.vm2_complete = False
+        
+        # Durable record of every stage, so a crashed run resumes instead of redoing VM work
+        self.journal = JobJournal()
+        
+        # The shared memory itself, and the stage outputs kept in the artifact store - one of each per job
+        self.blackboard = None
+        self.transfers = None
+    
+    def resume_unfinished_jobs(self):
+        """♻️ Finish pipelines a previous (crashed) process left half done"""
+        for job_id in self.journal.unfinished_jobs('shared_memory'):
+            print(f"\n♻️ Found unfinished shared memory job {job_id} - resuming it")
+            task_plan = self.journal.plan(job_id)
+            self.initialize_shared_memory(task_plan.get('prompt', 'resumed job'))
+            self.execute_shared_memory_pipeline(task_plan)
     
     def execute_shared_memory_workflow(self, user_prompt):
         """🧠 Execute workflow with shared memory access"""
         
+        self.provisioning.accept_task()
         print(f"\n🧠 SHARED MEMORY WORKFLOW: '{user_prompt}'")
         print("="*80)
         print("🎯 SHARED MEMORY ARCHITECTURE:")
-        print("📝 All VMs read/write to 'SHARED_MEMORY.txt'")
-        print("🔄 Real-time memory updates accessible to all VMs")
+        print("📝 All VMs read/write one orchestrator-hosted shared memory")
+        print("🔄 Each section is versioned and handed off the moment it is written")
         print("⚡ Seamless data sharing without file searching")
         print("="*80)
         
@@ -60,55 +102,61 @@ class SharedMemoryOrchestrator:
         task_plan = self.create_shared_memory_tasks(user_prompt)
         
         # Execute with shared memory
-        self.execute_shared_memory_pipeline(task_plan)
+        return self.execute_shared_memory_pipeline(task_plan)
     
     def initialize_shared_memory(self, prompt):
-        """🧠 Initialize the shared memory file"""
+        """🧠 Initialize the shared memory blackboard"""
         print("\n🧠 INITIALIZING SHARED MEMORY...")
         
-        # Each VM will have instructions to access this shared memory
-        shared_memory_content = f"""
-=== SHARED MEMORY FOR ALL VMs ===
-TASK: {prompt}
-STATUS: Initialized
-
-=== VM1 RESEARCH SECTION ===
-[VM1 will write research findings here]
-
-=== VM2 ANALYSIS SECTION ===
-[VM2 will write analysis based on VM1 data here]
-
-=== VM3 PRESENTATION SECTION ===
-[VM3 will write presentation notes using VM1 & VM2 data here]
-
-=== SHARED INSIGHTS ===
-[All VMs can add insights here]
-
-=== STATUS UPDATES ===
-System: Shared memory initialized
-"""
+        # Its STATUS UPDATES section is this orchestrator's status log, from here on
+        self.blackboard = Blackboard(status_log=self.status_log)
+        self.blackboard.write(TASK, prompt, writer="system")
+        self.status_log.append('system', "Shared memory initialized")
         
         print("✅ Shared memory structure created for all VMs")
     
+    def with_shared_memory(self, name, task, *sections):
+        """📖 Block until the sections a stage reads are written, and paste them above its task"""
+        start = time.time()
+        blocks = [f"=== {self.blackboard.titles[section]} ===\n{self.blackboard.read(section, reader=name).strip()}"
+                  for section in sections]
+        print(f"🧠 {name.upper()} ← SHARED MEMORY: {len(sections)} section(s) in {(time.time() - start) * 1000:.1f}ms")
+        return ("🧠 SHARED MEMORY (already read for you - do not search for any file):\n\n"
+                + "\n\n".join(blocks) + f"\n\n{task}")
+    
+    def publish_section(self, name, computer):
+        """✍️ Copy the section a stage's agent saved into shared memory"""
+        section, filename = STAGE_SECTIONS[name]
+        try:
+            data = self.transfers.pull(computer, filename, name.upper())
+        except Exception as e:
+            print(f"⚠️ Could not read {filename} from {name.upper()}: {e}")
+            data = None
+        text = data.decode(errors='replace') if data else f"[{name.upper()} finished but did not save {filename}]"
+        
+        version = self.blackboard.write(section, text, writer=name)
+        for line in text.splitlines():
+            if line.strip().startswith(INSIGHT_PREFIX):
+                self.blackboard.append(INSIGHTS, f"{name.upper()}: {line.strip()[len(INSIGHT_PREFIX):].strip()}", writer=name)
+        self.status_log.append(name, f"{self.blackboard.titles[section]} v{version} written")
+        return filename
+    
     def create_shared_memory_tasks(self, prompt):
         """🧠 Create tasks that use shared memory"""
         
         return {
+            'prompt': prompt,
             'vm1_task': f"""
             VM1 RESEARCH WITH SHARED MEMORY ACCESS for: "{prompt}"
             
             🧠 SHARED MEMORY INSTRUCTIONS:
-            1. Open TextEdit and create/open file called 'SHARED_MEMORY.txt'
-            2. Look for the "=== VM1 RESEARCH SECTION ===" header
-            3. Write your research findings under that section
+            Your research section is published to the other VMs automatically
+            as soon as you save it - just write it in a plain text file.
             
             RESEARCH WORKFLOW:
             1. Quick Google search for: {prompt}
             2. Gather key data from first 3-4 results
-            3. Update SHARED_MEMORY.txt with:
-               
-               === VM1 RESEARCH SECTION ===
-               VM1 STATUS: Research in progress
+            3. Open a text editor and write your research section:
                
                KEY STATISTICS:
                - [Add 3-4 key statistics about {prompt}]
@@ -122,9 +170,9 @@ System: Shared memory initialized
                RECENT DEVELOPMENTS:
                - [Add recent news/updates]
                
-               VM1 STATUS: Research complete - Data available for VM2 & VM3
+               INSIGHT: [one line per insight worth sharing with all VMs]
             
-            4. Save the file so VM2 and VM3 can access the data
+            4. SAVE AS: 'vm1_research_section.txt'
             5. Announce: "VM1 DATA WRITTEN TO SHARED MEMORY - AVAILABLE FOR ALL VMs"
             
             TIME LIMIT: 3-4 minutes maximum
@@ -135,19 +183,15 @@ System: Shared memory initialized
             VM2 ANALYSIS WITH SHARED MEMORY ACCESS for: "{prompt}"
             
             🧠 SHARED MEMORY INSTRUCTIONS:
-            1. Open 'SHARED_MEMORY.txt' and READ VM1's research data
-            2. Find the "=== VM2 ANALYSIS SECTION ===" header
-            3. Write your analysis under that section using VM1's data
+            VM1's research section is pasted above. Your analysis section is
+            published to VM3 automatically as soon as you save it.
             
             ANALYSIS WORKFLOW:
-            1. FIRST - Read VM1's research from shared memory
+            1. FIRST - Read VM1's research from the shared memory above
             2. Announce: "VM2 READING VM1 DATA FROM SHARED MEMORY"
             3. Open Numbers/Excel for analysis
             4. Create analysis based on VM1's shared memory data
-            5. Update SHARED_MEMORY.txt with:
-               
-               === VM2 ANALYSIS SECTION ===
-               VM2 STATUS: Analysis in progress using VM1 data
+            5. Open a text editor and write your analysis section:
                
                DATA ANALYSIS (Based on VM1 research):
                - [Analysis of VM1's statistics]
@@ -163,10 +207,11 @@ System: Shared memory initialized
                RECOMMENDATIONS:
                - [Based on VM1's findings]
                
-               VM2 STATUS: Analysis complete - Available for VM3
+               INSIGHT: [one line per insight worth sharing with all VMs]
             
             6. Save Excel file as 'analysis_using_shared_memory.xlsx'
-            7. Announce: "VM2 ANALYSIS WRITTEN TO SHARED MEMORY - USING VM1 DATA"
+            7. SAVE the analysis section AS: 'vm2_analysis_section.txt'
+            8. Announce: "VM2 ANALYSIS WRITTEN TO SHARED MEMORY - USING VM1 DATA"
             
             TIME LIMIT: 3-4 minutes maximum
             CRITICAL: Use VM1's data from shared memory for your analysis
@@ -176,19 +221,15 @@ System: Shared memory initialized
             VM3 PRESENTATION WITH SHARED MEMORY ACCESS for: "{prompt}"
             
             🧠 SHARED MEMORY INSTRUCTIONS:
-            1. Open 'SHARED_MEMORY.txt' and READ both VM1 and VM2 data
-            2. Find the "=== VM3 PRESENTATION SECTION ===" header
-            3. Write your presentation notes under that section
+            VM1's research and VM2's analysis sections are pasted above.
+            Your presentation notes are published automatically once saved.
             
             PRESENTATION WORKFLOW:
-            1. FIRST - Read complete shared memory file
+            1. FIRST - Read all the shared memory above
             2. Announce: "VM3 READING ALL VM DATA FROM SHARED MEMORY"
             3. Open Keynote/PowerPoint
             4. Create presentation using ALL shared memory data
-            5. Update SHARED_MEMORY.txt with:
-               
-               === VM3 PRESENTATION SECTION ===
-               VM3 STATUS: Creating presentation using all shared data
+            5. Open a text editor and write your presentation section:
                
                PRESENTATION OUTLINE:
                Slide 1: Title - "{prompt} Analysis"
@@ -203,17 +244,10 @@ System: Shared memory initialized
                - VM2 analysis data from shared memory
                - Combined insights from all VMs
                
-               VM3 STATUS: Presentation complete using all shared memory data
+               INSIGHT: [one line per insight worth sharing with all VMs]
             
             6. Save presentation as 'final_shared_memory_presentation.pptx'
-            7. Update shared memory final status:
-               
-               === STATUS UPDATES ===
-               VM1: Research complete ✅
-               VM2: Analysis complete ✅  
-               VM3: Presentation complete ✅
-               ALL VMs: Shared memory workflow successful! 🎉
-            
+            7. SAVE the presentation section AS: 'vm3_presentation_section.txt'
             8. Announce: "VM3 PRESENTATION COMPLETE - USED ALL SHARED MEMORY DATA"
             
             TIME LIMIT: 4-5 minutes maximum
@@ -227,116 +261,156 @@ System: Shared memory initialized
         print("\n🧠 STARTING SHARED MEMORY PIPELINE...")
         print("=" * 80)
         
+        # VM2 reads VM1's section, VM3 reads both sections - each starts
+        # the moment the sections it reads have been written
+        scheduler = StageScheduler()
+        vm1_stage = scheduler.add_stage('vm1', self.execute_vm1_memory, args=(task_plan['vm1_task'],))
+        vm2_stage = scheduler.add_stage('vm2', self.execute_vm2_memory, args=(task_plan['vm2_task'],),
+                                        depends_on=['vm1'])
+        vm3_stage = scheduler.add_stage('vm3', self.execute_vm3_memory, args=(task_plan['vm3_task'],),
+                                        depends_on=['vm1', 'vm2'])
+        
+        # Skip stages a previous run of this exact plan already finished
+        job_id, completed = self.journal.resume_or_create('shared_memory', task_plan)
+        if completed:
+            print(f"♻️ Resuming job {job_id}: {', '.join(sorted(completed))} already done")
+        self.journal.attach(scheduler, job_id, {'vm1': self.vm1, 'vm2': self.vm2, 'vm3': self.vm3}, completed)
+        # Files saved since the job began are this job's - restored stages' outputs included
+        self.transfers = ArtifactTransfers(job_id=job_id, since=self.journal.created_at(job_id))
+        for name, stage in scheduler.stages.items():
+            if stage.restored:
+                self.status_log.append(name, f"✅ Restored from journal ({stage.completion.result})")
+                # The section file survives on the VM - put it back into shared memory
+                self.publish_section(name, getattr(self, name))
+        
         # Step 1: VM1 Research (writes to shared memory)
         print("📊 STEP 1: VM1 writing research to SHARED MEMORY...")
-        vm1_thread = threading.Thread(target=self.execute_vm1_memory, args=(task_plan['vm1_task'],))
-        vm1_thread.start()
+        tail = self.status_log.tail(self.blackboard.status_from)
+        scheduler.start()
         
         # Monitor VM1
-        self.monitor_vm1_memory(vm1_thread)
-        vm1_thread.join()
-        print("✅ VM1 COMPLETE - Data written to SHARED MEMORY!")
-        
-        # Step 2: VM2 and VM3 can now access shared memory
-        print("\n📈📋 STEP 2: VM2 & VM3 accessing SHARED MEMORY simultaneously...")
-        
-        vm2_thread = threading.Thread(target=self.execute_vm2_memory, args=(task_plan['vm2_task'],))
-        vm3_thread = threading.Thread(target=self.execute_vm3_memory, args=(task_plan['vm3_task'],))
-        
-        # Start VM2 first, then VM3
-        vm2_thread.start()
-        time.sleep(30)  # Give VM2 time to add to shared memory
-        vm3_thread.start()
+        self.monitor_vm1_memory(tail, vm1_stage)
+        vm1_stage.completion.wait()
         
-        # Monitor both
-        self.monitor_vm2_vm3_memory(vm2_thread, vm3_thread)
+        if vm1_stage.completion.succeeded():
+            print("✅ VM1 COMPLETE - Data written to SHARED MEMORY!")
+            
+            # Step 2: VM2 and VM3 can now access shared memory
+            print("\n📈📋 STEP 2: VM2 & VM3 accessing SHARED MEMORY as their inputs land...")
+            
+            # Monitor both
+            self.monitor_vm2_vm3_memory(tail, vm2_stage, vm3_stage)
         
         # Wait for completion
-        vm2_thread.join()
-        vm3_thread.join()
+        scheduler.wait()
+        self.journal.finish_job(job_id, scheduler.succeeded())
+        self.transfers.finish_job()
+        
+        if not scheduler.succeeded():
+            print("\n⚠️ SHARED MEMORY WORKFLOW STOPPED EARLY!")
+            for name, stage in (('vm2', vm2_stage), ('vm3', vm3_stage)):
+                if stage.completion.outcome == StageCompletion.SKIPPED:
+                    self.status_log.append(name, f"Skipped - {stage.completion.reason}")
+            tail.print_new()
+            scheduler.print_timeline()
+            self.blackboard.print_status()
+            return False
         
         print("\n🎉 SHARED MEMORY WORKFLOW COMPLETE!")
+        scheduler.print_timeline()
+        self.blackboard.print_status()
+        if self.transfers.store is not None:
+            self.transfers.store.print_status()
         self.show_shared_memory_success()
+        return True
     
     def execute_vm1_memory(self, task):
         """📊 VM1 execution with shared memory writing"""
-        self.vm1_status = "🧠 Writing to shared memory..."
+        self.status_log.append('vm1', "🧠 Writing to shared memory...")
         try:
             self.vm1.prompt(task)
-            self.vm1_status = "✅ Research in shared memory"
+            artifact = self.publish_section('vm1', self.vm1)
+            self.status_log.append('vm1', "✅ Research in shared memory")
             self.vm1_complete = True
             print("\n🧠 VM1 → SHARED MEMORY: Research data written!")
+            return artifact
         except Exception as e:
-            self.vm1_status = f"❌ Error: {e}"
+            self.status_log.append('vm1', f"❌ Error: {e}")
             print(f"❌ VM1 Error: {e}")
+            raise
     
     def execute_vm2_memory(self, task):
         """📈 VM2 execution with shared memory access"""
-        self.vm2_status = "🧠 Reading shared memory & analyzing..."
+        self.status_log.append('vm2', "🧠 Reading shared memory & analyzing...")
         try:
-            self.vm2.prompt(task)
-            self.vm2_status = "✅ Analysis in shared memory"
+            self.vm2.prompt(self.with_shared_memory('vm2', task, RESEARCH))
+            self.publish_section('vm2', self.vm2)
+            self.transfers.pull(self.vm2, STAGE_ARTIFACTS['vm2'], 'VM2')
+            self.status_log.append('vm2', "✅ Analysis in shared memory")
             self.vm2_complete = True
             print("\n🧠 VM2 → SHARED MEMORY: Analysis added using VM1 data!")
+            return 'analysis_using_shared_memory.xlsx'
         except Exception as e:
-            self.vm2_status = f"❌ Error: {e}"
+            self.status_log.append('vm2', f"❌ Error: {e}")
             print(f"❌ VM2 Error: {e}")
+            raise
     
     def execute_vm3_memory(self, task):
         """📋 VM3 execution with shared memory access"""
-        self.vm3_status = "🧠 Reading all shared memory & presenting..."
+        self.status_log.append('vm3', "🧠 Reading all shared memory & presenting...")
         try:
-            self.vm3.prompt(task)
-            self.vm3_status = "✅ Presentation using all shared data"
+            self.vm3.prompt(self.with_shared_memory('vm3', task, RESEARCH, ANALYSIS))
+            self.publish_section('vm3', self.vm3)
+            self.transfers.pull(self.vm3, STAGE_ARTIFACTS['vm3'], 'VM3')
+            self.status_log.append('vm3', "✅ Presentation using all shared data")
             print("\n🧠 VM3 → SHARED MEMORY: Presentation complete using all VM data!")
+            return 'final_shared_memory_presentation.pptx'
         except Exception as e:
-            self.vm3_status = f"❌ Error: {e}"
+            self.status_log.append('vm3', f"❌ Error: {e}")
             print(f"❌ VM3 Error: {e}")
+            raise
     
-    def monitor_vm1_memory(self, vm1_thread):
-        """📊 Monitor VM1 shared memory writing"""
-        while vm1_thread.is_alive():
-            print(f"🧠 VM1: {self.vm1_status}")
-            time.sleep(4)
+    def monitor_vm1_memory(self, tail, vm1_stage):
+        """📊 Monitor VM1 shared memory writing - new status updates only"""
+        while vm1_stage.is_alive():
+            tail.print_new(wait=4)
     
-    def monitor_vm2_vm3_memory(self, vm2_thread, vm3_thread):
-        """📊 Monitor VM2 and VM3 shared memory access"""
+    def monitor_vm2_vm3_memory(self, tail, vm2_stage, vm3_stage):
+        """📊 Monitor VM2 and VM3 shared memory access, carrying on from the VM1 monitor's offset"""
         print("\n🧠 MONITORING SHARED MEMORY ACCESS:")
-        while vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"📈 VM2: {self.vm2_status}")
-            print(f"📋 VM3: {self.vm3_status}")
-            print("🧠 All VMs sharing memory space...")
-            print("-" * 60)
-            time.sleep(5)
+        while vm2_stage.is_alive() or vm3_stage.is_alive():
+            if tail.print_new(wait=5):
+                print("🧠 All VMs sharing memory space...")
+                print("-" * 60)
+        tail.print_new()
     
     def show_shared_memory_success(self):
         """🧠 Show shared memory workflow results"""
         print("\n🧠 SHARED MEMORY WORKFLOW SUCCESS!")
         print("=" * 80)
         print("🎯 SHARED MEMORY FEATURES DEMONSTRATED:")
-        print("✅ All 3 VMs accessed the same memory file")
+        print("✅ All 3 VMs shared one orchestrator-hosted memory")
         print("✅ VM1 wrote research data to shared memory")
         print("✅ VM2 read VM1 data and added analysis to shared memory")
         print("✅ VM3 read ALL data and created presentation using shared memory")
         print("\n🧠 REVOLUTIONARY ARCHITECTURE:")
         print("  💾 Single shared memory space for all VMs")
-        print("  🔄 Real-time memory updates accessible to all")
+        print("  🔄 Versioned sections handed off the moment they are written")
         print("  ⚡ No file searching - direct memory access")
         print("  🔗 Seamless data sharing between all VMs")
         print("  📊 Structured memory sections for each VM")
         print("\n🏆 SHARED MEMORY VM ORCHESTRATION COMPLETE!")
         
         print("\n📁 SHARED MEMORY FILES CREATED:")
-        print("  • SHARED_MEMORY.txt (accessed by all 3 VMs)")
+        print("  • vm1/vm2/vm3 *_section.txt (each VM's published shared memory section)")
         print("  • analysis_using_shared_memory.xlsx (VM2 output)")
         print("  • final_shared_memory_presentation.pptx (VM3 output)")
     
     def cleanup(self):
         """🧹 Cleanup with shared memory status"""
+        self.provisioning.print_startup_metrics()
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
             print("\n✅ All VMs disconnected from shared memory!")
         except Exception as e:
             print(f"⚠️ Cleanup: {e}")
@@ -354,6 +428,9 @@ def main():
     orchestrator = SharedMemoryOrchestrator()
     
     try:
+        # Pick up anything a crashed run left behind before taking new work
+        orchestrator.resume_unfinished_jobs()
+        
         user_prompt = input("\n💭 Enter your prompt for SHARED MEMORY workflow: ").strip()
         
         if not user_prompt:
@@ -362,11 +439,12 @@ def main():
         
         # Execute the shared memory workflow
         start_time = time.time()
-        orchestrator.execute_shared_memory_workflow(user_prompt)
+        succeeded = orchestrator.execute_shared_memory_workflow(user_prompt)
         end_time = time.time()
         
         print(f"\n⚡ TOTAL EXECUTION TIME: {end_time - start_time:.2f} seconds")
-        print("🏆 SHARED MEMORY WORKFLOW COMPLETE!")
+        if succeeded:
+            print("🏆 SHARED MEMORY WORKFLOW COMPLETE!")
         
     except KeyboardInterrupt:
         print("\n⚠️ Workflow interrupted")
@@ -1,46 +1,95 @@
 import os
-import time
-import threading
+import asyncio
 from dotenv import load_dotenv
 from orgo import Computer
 
+from async_engine import AsyncOrchestrationEngine, run_sync
+from job_queue import DEFAULT_TENANT, MAX_RUNNING, NORMAL, FairShareJobQueue
+from status_log import vm_status_log
+from vm_pool import VMPool, RESEARCH, PROCESSING, PRESENTATION
+from vm_provisioning import SMALL_JOB_SECONDS, OnDemandVMs, ProvisioningFailed, add_stage_vms, vms_for_plan
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
 class SmartTaskDelegator:
-    def __init__(self):
+    def __init__(self, warm_pool=None, small_job_seconds=SMALL_JOB_SECONDS):
         self.api_key = os.getenv('ORGO_API_KEY', 'your_orgo_api_key_here')
         
-        # Initialize all 3 VMs
+        # Up to 3 VMs, attached once the task breakdown says how many are worth it
         print("🚀 Initializing Smart Task Delegation System...")
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)  # Research & Data Collection
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Processing & Analysis  
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Output & Presentation
+        reap_leaked_computers(Computer, self.api_key)
+        self.stage_vms = OnDemandVMs({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research & Data Collection
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing & Analysis
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Output & Presentation
+        }, warm_pool=warm_pool)
+        self.provisioning = self.stage_vms.provisioning
+        self.small_job_seconds = small_job_seconds
+        
+        print("✅ Ready for intelligent task delegation - VMs attach once a plan needs them!")
         
-        print("✅ All 3 VMs ready for intelligent task delegation!")
+        # Status tracking
+        self.status_log = vm_status_log()
         
-        # VM status tracking
-        self.vm1_status = "Ready"
-        self.vm2_status = "Ready" 
-        self.vm3_status = "Ready"
+        # Delegated tasks go through a capability-tagged VM pool
+        self.engine = AsyncOrchestrationEngine()
+        self.pool = VMPool(self.engine, replace_vm=self.stage_vms.replace)
+        
+        # Every entry point queues here, so tenants share the VMs fairly
+        self.queue = FairShareJobQueue(self.analyze_and_delegate_task_async, max_running=MAX_RUNNING)
+    
+    def attach_stage_vms(self, count):
+        """🪄 Make sure the first `count` VMs are attached"""
+        self.stage_vms.ensure(count)
+        if not self.provisioning.computers:
+            raise ProvisioningFailed("No VMs could be attached")
+    
+    def vms_needed(self):
+        """🪶 One VM while past delegated tasks have been short, otherwise one per task"""
+        return vms_for_plan([self.pool.durations.expected(stage) for stage in (RESEARCH, PROCESSING, PRESENTATION)],
+                            self.small_job_seconds)
+    
+    def analyze_and_delegate_task(self, user_prompt, tenant=DEFAULT_TENANT, priority=NORMAL):
+        """Intelligently break down user prompt and delegate across VMs (queued per tenant)"""
+        return self.queue.submit_and_wait(tenant, user_prompt, priority)
+    
+    def submit(self, tenant, prompt, priority=NORMAL):
+        """📥 Queue a tenant's prompt; run_queued() dispatches it"""
+        return self.queue.submit(tenant, prompt, priority)
+    
+    def run_queued(self):
+        """⚖️ Run every queued prompt, fair-shared between tenants, and print their queue waits"""
+        return self.queue.run()
     
-    def analyze_and_delegate_task(self, user_prompt):
-        """Intelligently break down user prompt and delegate across VMs"""
+    async def analyze_and_delegate_task_async(self, user_prompt):
+        """Async delegation - many prompts can share one event loop and pool"""
         
+        self.provisioning.accept_task()
         print(f"\n🧠 ANALYZING TASK: '{user_prompt}'")
         print("="*80)
         
+        # VM1 is needed whatever the breakdown says - attach it while planning
+        first_vm = asyncio.ensure_future(self.engine.run_blocking(self.stage_vms.ensure, 1))
+        
         # Smart task breakdown based on prompt analysis
         task_breakdown = self.smart_task_breakdown(user_prompt)
+        vms = self.vms_needed()
         
         print("🎯 TASK DELEGATION PLAN:")
         print(f"🔍 VM1 (Research): {task_breakdown['vm1_task'][:100]}...")
         print(f"⚙️ VM2 (Processing): {task_breakdown['vm2_task'][:100]}...")
         print(f"📊 VM3 (Output): {task_breakdown['vm3_task'][:100]}...")
+        print(f"🖥️ VMs needed: {vms}")
         print("="*80)
         
+        await first_vm
+        await self.engine.run_blocking(self.attach_stage_vms, vms)
+        add_stage_vms(self.pool, self.provisioning)
+        
         # Execute all VMs simultaneously
-        self.execute_delegated_tasks(task_breakdown)
+        await self.execute_delegated_tasks_async(task_breakdown)
     
     def smart_task_breakdown(self, prompt):
         """AI-powered task breakdown logic"""
@@ -197,93 +246,93 @@ class SmartTaskDelegator:
     
     def execute_delegated_tasks(self, task_breakdown):
         """Execute tasks across all VMs simultaneously"""
+        return run_sync(self.execute_delegated_tasks_async(task_breakdown))
+    
+    async def execute_delegated_tasks_async(self, task_breakdown):
+        """Dispatch delegated tasks through the VM pool"""
         
         print("\n🚀 EXECUTING DELEGATED TASKS ACROSS ALL VMs...")
         
-        # Create threads for parallel execution
-        vm1_thread = threading.Thread(target=self.execute_vm1_task, args=(task_breakdown['vm1_task'],))
-        vm2_thread = threading.Thread(target=self.execute_vm2_task, args=(task_breakdown['vm2_task'],))
-        vm3_thread = threading.Thread(target=self.execute_vm3_task, args=(task_breakdown['vm3_task'],))
-        
-        # Start all VMs simultaneously
-        vm1_thread.start()
-        vm2_thread.start() 
-        vm3_thread.start()
-        
-        # Monitor progress
-        self.monitor_all_vms(vm1_thread, vm2_thread, vm3_thread)
-        
-        # Wait for completion
-        vm1_thread.join()
-        vm2_thread.join()
-        vm3_thread.join()
+        async with self.pool.running():
+            # Queue all tasks simultaneously
+            vm1_task = asyncio.ensure_future(self.execute_vm1_task(task_breakdown['vm1_task']))
+            vm2_task = asyncio.ensure_future(self.execute_vm2_task(task_breakdown['vm2_task']))
+            vm3_task = asyncio.ensure_future(self.execute_vm3_task(task_breakdown['vm3_task']))
+            
+            # Monitor progress until every task has finished
+            await self.monitor_all_vms(vm1_task, vm2_task, vm3_task)
+            self.pool.print_pool_status()
         
         print("\n🎉 ALL VMs COMPLETED THEIR DELEGATED TASKS!")
     
-    def execute_vm1_task(self, task):
+    async def execute_vm1_task(self, task):
         """Execute VM1 research task"""
-        self.vm1_status = "Working"
+        self.status_log.append('vm1', "Working")
         print("🔍 VM1: Starting research task...")
         try:
-            self.vm1.prompt(task)
-            self.vm1_status = "Completed"
+            await self.pool.run(RESEARCH, task, label="vm1_research")
+            self.status_log.append('vm1', "Completed")
             print("✅ VM1: Research COMPLETED!")
         except Exception as e:
-            self.vm1_status = f"Error: {e}"
+            self.status_log.append('vm1', f"Error: {e}")
             print(f"❌ VM1 Error: {e}")
     
-    def execute_vm2_task(self, task):
+    async def execute_vm2_task(self, task):
         """Execute VM2 processing task"""
-        self.vm2_status = "Working"
+        self.status_log.append('vm2', "Working")
         print("⚙️ VM2: Starting processing task...")
         try:
-            self.vm2.prompt(task)
-            self.vm2_status = "Completed"
+            await self.pool.run(PROCESSING, task, label="vm2_processing")
+            self.status_log.append('vm2', "Completed")
             print("✅ VM2: Processing COMPLETED!")
         except Exception as e:
-            self.vm2_status = f"Error: {e}"
+            self.status_log.append('vm2', f"Error: {e}")
             print(f"❌ VM2 Error: {e}")
     
-    def execute_vm3_task(self, task):
+    async def execute_vm3_task(self, task):
         """Execute VM3 output task"""
-        self.vm3_status = "Working"
+        self.status_log.append('vm3', "Working")
         print("📊 VM3: Starting output task...")
         try:
-            self.vm3.prompt(task)
-            self.vm3_status = "Completed"
+            await self.pool.run(PRESENTATION, task, label="vm3_presentation")
+            self.status_log.append('vm3', "Completed")
             print("✅ VM3: Output COMPLETED!")
         except Exception as e:
-            self.vm3_status = f"Error: {e}"
+            self.status_log.append('vm3', f"Error: {e}")
             print(f"❌ VM3 Error: {e}")
     
-    def monitor_all_vms(self, vm1_thread, vm2_thread, vm3_thread):
+    async def monitor_all_vms(self, *vm_tasks):
         """Real-time monitoring of all VMs"""
         print("\n📊 REAL-TIME VM MONITORING:")
         print("-" * 60)
         
-        while vm1_thread.is_alive() or vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"🔍 VM1 (Research): {self.vm1_status}")
-            print(f"⚙️ VM2 (Processing): {self.vm2_status}")
-            print(f"📊 VM3 (Output): {self.vm3_status}")
-            print("-" * 60)
-            time.sleep(15)  # Update every 15 seconds
+        # Only status changes since the tasks were queued are printed, each once
+        tail = self.status_log.tail(self.status_log.end())
+        pending = set(vm_tasks)
+        while pending:
+            if tail.print_new():
+                print("-" * 60)
+            # Update every 15 seconds, or as soon as the last task finishes
+            done, pending = await asyncio.wait(pending, timeout=15)
+        tail.print_new()
         
         # Final status report
         print("\n🏁 FINAL EXECUTION REPORT:")
-        print(f"🔍 VM1 Research: {self.vm1_status}")
-        print(f"⚙️ VM2 Processing: {self.vm2_status}")
-        print(f"📊 VM3 Output: {self.vm3_status}")
+        print(f"🔍 VM1 Research: {self.status_log.latest('vm1')}")
+        print(f"⚙️ VM2 Processing: {self.status_log.latest('vm2')}")
+        print(f"📊 VM3 Output: {self.status_log.latest('vm3')}")
     
     def cleanup(self):
         """Clean up all VM connections"""
+        self.provisioning.print_startup_metrics()
         print("\n🧹 Cleaning up all VMs...")
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
             print("✅ All VMs cleaned up!")
         except Exception as e:
             print(f"⚠️ Cleanup warning: {e}")
+        finally:
+            self.engine.shutdown()
 
 def main():
     """Main interactive function"""
@@ -304,6 +353,7 @@ def main():
         
         # Execute intelligent delegation
         delegator.analyze_and_delegate_task(user_prompt)
+        delegator.queue.print_report()
         
     except KeyboardInterrupt:
         print("\n⚠️ Execution interrupted by user")
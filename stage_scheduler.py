@@ -0,0 +1,390 @@
+import time
+import threading
+
+from fake_computer import FakeComputer
+
+# A wedged agent session is given up on after this long
+DEFAULT_STAGE_TIMEOUT = 15 * 60
+
+
+class StageFailed(Exception):
+    """Raised when reading the result of a stage that failed or was skipped"""
+
+
+class StageTimeout(TimeoutError):
+    """Failure recorded for a stage that overran its timeout or its job's deadline"""
+
+
+class StageCompletion:
+    """
+    📬 ONE-SHOT COMPLETION SIGNAL FOR A STAGE
+
+    Carries the stage outcome (success + result payload, failure + error,
+    or skipped + reason) and wakes every waiter the instant it is set,
+    so downstream stages never have to poll a flag.
+    """
+
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    def __init__(self, name):
+        self.name = name
+        self.outcome = self.PENDING
+        self.result = None
+        self.error = None
+        self.reason = None
+
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.callbacks = []
+
+    def set_result(self, result=None):
+        """✅ Mark the stage successful with an optional payload"""
+        return self.finish(self.SUCCEEDED, result=result)
+
+    def set_failure(self, error):
+        """❌ Mark the stage failed with the exception that stopped it"""
+        return self.finish(self.FAILED, error=error)
+
+    def set_skipped(self, reason):
+        """⏭️ Mark the stage skipped because an input will never arrive"""
+        return self.finish(self.SKIPPED, reason=reason)
+
+    def finish(self, outcome, result=None, error=None, reason=None):
+        """Record the outcome once, then wake waiters and run callbacks"""
+        with self.lock:
+            if self.outcome != self.PENDING:
+                return False
+            self.outcome = outcome
+            self.result = result
+            self.error = error
+            self.reason = reason
+            callbacks = list(self.callbacks)
+            self.callbacks = []
+            self.event.set()
+
+        for callback in callbacks:
+            callback(self)
+        return True
+
+    def add_done_callback(self, callback):
+        """🔔 Call callback(completion) once done (immediately if already done)"""
+        with self.lock:
+            if self.outcome == self.PENDING:
+                self.callbacks.append(callback)
+                return
+        callback(self)
+
+    def done(self):
+        return self.outcome != self.PENDING
+
+    def succeeded(self):
+        return self.outcome == self.SUCCEEDED
+
+    def wait(self, timeout=None):
+        """⏳ Block until the stage finishes; False if the timeout expired first"""
+        return self.event.wait(timeout)
+
+    def get(self, timeout=None):
+        """📦 Wait for and return the result payload, raising if the stage didn't succeed"""
+        if not self.wait(timeout):
+            raise TimeoutError(f"Stage '{self.name}' still running after {timeout}s")
+        if self.outcome == self.FAILED:
+            raise StageFailed(f"Stage '{self.name}' failed: {self.error}") from self.error
+        if self.outcome == self.SKIPPED:
+            raise StageFailed(f"Stage '{self.name}' skipped: {self.reason}")
+        return self.result
+
+
+class Stage:
+    """🧩 One VM stage in the dependency graph"""
+
+    def __init__(self, name, target, args=(), depends_on=(), timeout=None):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+
+        self.started_at = None
+        self.finished_at = None
+        self.restored = False
+
+        self.thread = None
+        self.completion = StageCompletion(name)
+
+    def is_alive(self):
+        """Same contract as threading.Thread so existing monitor loops accept stages"""
+        return not self.completion.done()
+
+    def duration(self):
+        """⏱️ Seconds the stage spent running (None until it finishes)"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class StageScheduler:
+    """
+    🕸️ EVENT-DRIVEN STAGE SCHEDULER
+
+    Each VM stage declares the stages it reads from. A stage is started
+    the instant its last upstream stage signals completion, so wall time
+    follows the critical path instead of a sum of guessed sleep delays.
+    If an upstream stage fails, everything downstream of it is skipped
+    rather than left waiting forever.
+
+    A stage that runs past its timeout, or is still unfinished when the
+    job deadline passes, is failed with StageTimeout so the run can move
+    on. Its thread cannot be killed - a blocking prompt is abandoned and
+    its late result ignored.
+
+    Usage:
+        scheduler = StageScheduler(deadline=30 * 60)
+        scheduler.add_stage('vm1', self.execute_vm1, args=(task,))
+        scheduler.add_stage('vm2', self.execute_vm2, args=(task,), depends_on=['vm1'], timeout=600)
+        scheduler.run()
+    """
+
+    def __init__(self, stage_timeout=DEFAULT_STAGE_TIMEOUT, deadline=None):
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.stage_timeout = stage_timeout
+        self.deadline = deadline
+        self.started_at = None
+        self.finished_at = None
+
+    def add_stage(self, name, target, args=(), depends_on=(), timeout=None):
+        """➕ Register a stage; upstream stages must already be registered"""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+
+        for upstream in depends_on:
+            if upstream not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{upstream}'")
+
+        if timeout is None:
+            timeout = self.stage_timeout
+        stage = Stage(name, target, args, depends_on, timeout)
+        self.stages[name] = stage
+        return stage
+
+    def restore_stage(self, name, result=None):
+        """⏩ Mark a stage as already done by an earlier run (call before start)"""
+        stage = self.stages[name]
+        stage.restored = True
+        stage.completion.set_result(result)
+        print(f"⏩ Stage '{name}' restored from an earlier run: {result}")
+
+    def start(self):
+        """🚀 Launch every stage whose inputs are already available"""
+        self.started_at = time.time()
+
+        with self.lock:
+            for stage in self.stages.values():
+                if stage.completion.done():
+                    continue
+                if all(self.stages[upstream].completion.succeeded() for upstream in stage.depends_on):
+                    self.launch(stage)
+
+    def wait(self):
+        """⏳ Block until every stage has finished, been skipped or run out of time"""
+        for stage in self.stages.values():
+            if self.deadline is None:
+                stage.completion.wait()
+                continue
+            remaining = self.started_at + self.deadline - time.time()
+            if not stage.completion.wait(max(remaining, 0)):
+                self.expire_all()
+                break
+        self.finished_at = time.time()
+
+    def expire(self, stage, reason):
+        """⏰ Fail a still-running stage with StageTimeout and release its dependents"""
+        if stage.completion.done():
+            return
+        stage.finished_at = time.time()
+        print(f"⏰ Stage '{stage.name}' {reason}")
+        if stage.completion.set_failure(StageTimeout(f"Stage '{stage.name}' {reason}")):
+            self.on_stage_done(stage)
+
+    def expire_all(self):
+        """⏰ Job deadline passed: time out running stages, skip ones that never started"""
+        reason = f"missed the job deadline of {self.deadline:.1f}s"
+        for stage in self.stages.values():
+            if stage.thread is not None:
+                self.expire(stage, reason)
+        for stage in self.stages.values():
+            if not stage.completion.done():
+                print(f"⏭️ Stage '{stage.name}' skipped: {reason}")
+                stage.completion.set_skipped(reason)
+
+    def run(self):
+        """🔁 Start the graph and wait for it to drain"""
+        self.start()
+        self.wait()
+        return self
+
+    def launch(self, stage):
+        """Start one stage thread (caller holds the lock)"""
+        # Daemon threads: a wedged prompt must not keep the process alive after a timeout
+        stage.thread = threading.Thread(target=self.run_stage, args=(stage,), name=f"stage-{stage.name}", daemon=True)
+        stage.thread.start()
+
+        if stage.timeout is not None:
+            timer = threading.Timer(stage.timeout, self.expire, args=(stage, f"timed out after {stage.timeout:.1f}s"))
+            timer.daemon = True
+            stage.completion.add_done_callback(lambda completion: timer.cancel())
+            timer.start()
+
+    def run_stage(self, stage):
+        """Run a stage body, then wake any stage that was waiting on it"""
+        stage.started_at = time.time()
+        try:
+            result = stage.target(*stage.args)
+        except Exception as e:
+            if stage.completion.done():
+                return  # already timed out; nobody is waiting for this any more
+            stage.finished_at = time.time()
+            print(f"❌ Stage '{stage.name}' failed: {e}")
+            finished = stage.completion.set_failure(e)
+        else:
+            if stage.completion.done():
+                return
+            stage.finished_at = time.time()
+            finished = stage.completion.set_result(result)
+        if finished:
+            self.on_stage_done(stage)
+
+    def on_stage_done(self, finished):
+        """🔔 Release downstream stages whose inputs are ready, skip those whose inputs never will be"""
+        skipped = []
+        with self.lock:
+            for stage in self.stages.values():
+                if stage.thread is not None or stage.completion.done() or finished.name not in stage.depends_on:
+                    continue
+                if not finished.completion.succeeded():
+                    reason = f"upstream '{finished.name}' {finished.completion.outcome}"
+                    print(f"⏭️ Stage '{stage.name}' skipped: {reason}")
+                    stage.completion.set_skipped(reason)
+                    skipped.append(stage)
+                elif all(self.stages[upstream].completion.succeeded() for upstream in stage.depends_on):
+                    self.launch(stage)
+
+        for stage in skipped:
+            self.on_stage_done(stage)
+
+    def succeeded(self):
+        """✅ True when every stage finished successfully"""
+        return all(stage.completion.succeeded() for stage in self.stages.values())
+
+    def result(self, name):
+        """📦 Result payload of a finished stage (raises StageFailed if it didn't succeed)"""
+        return self.stages[name].completion.get()
+
+    def critical_path(self):
+        """🛤️ Longest chain of stage durations through the graph"""
+        longest = {}
+        for name, stage in self.stages.items():
+            if stage.duration() is None:
+                continue
+            upstream_best = max((longest[upstream] for upstream in stage.depends_on if upstream in longest),
+                                default=(0.0, []))
+            longest[name] = (upstream_best[0] + stage.duration(), upstream_best[1] + [name])
+        return max(longest.values(), default=(0.0, []))
+
+    def print_timeline(self):
+        """📊 Show when each stage started relative to the run, and for how long"""
+        print("\n🕸️ STAGE TIMELINE:")
+        print("-" * 60)
+        for stage in self.stages.values():
+            if stage.started_at is None:
+                detail = "restored from an earlier run" if stage.restored else stage.completion.reason or "never started"
+                print(f"   {stage.name}: {stage.completion.outcome} ({detail})")
+                continue
+            offset = stage.started_at - self.started_at
+            print(f"   {stage.name}: {stage.completion.outcome}, started +{offset:.2f}s, ran {stage.duration():.2f}s")
+
+        path_time, path = self.critical_path()
+        if self.finished_at is not None:
+            print(f"⚡ Wall time: {self.finished_at - self.started_at:.2f}s")
+        print(f"🛤️ Critical path: {' → '.join(path)} ({path_time:.2f}s)")
+
+
+def run_fixed_staggers(vms, staggers, scale):
+    """⏱️ Old approach: start VM2/VM3 after guessed sleeps, even if upstream isn't done"""
+    start = time.time()
+    threads = []
+    upstream_done = []
+    starved = 0
+
+    def run_vm(vm, done):
+        vm.prompt(f"{vm.name} task")
+        done.set()
+
+    for index, name in enumerate(['vm1', 'vm2', 'vm3']):
+        if index > 0:
+            time.sleep(staggers[index - 1] * scale)
+            if not all(done.is_set() for done in upstream_done):
+                starved += 1
+        done = threading.Event()
+        thread = threading.Thread(target=run_vm, args=(vms[name], done))
+        thread.start()
+        threads.append(thread)
+        upstream_done.append(done)
+
+    for thread in threads:
+        thread.join()
+    return (time.time() - start) / scale, starved
+
+
+def benchmark_scheduler(latencies=None, jitter=30, staggers=None, scale=0.01, seed=7):
+    """
+    🧪 Compare fixed sleep staggers against the event-driven scheduler
+
+    latencies: per-VM median prompt latency in "real" seconds
+    jitter: extra random latency per prompt (seconds)
+    staggers: fixed delays the old orchestrators slept before VM2 and VM3
+    scale: shrink factor so the benchmark finishes quickly
+    """
+    latencies = latencies or {'vm1': 150, 'vm2': 180, 'vm3': 200}
+    staggers = staggers or [60, 60]
+    # Delays an operator would have to guess to be sure upstream data exists
+    safe_staggers = [latencies['vm1'] + jitter, latencies['vm2'] + jitter]
+
+    def fresh_vms():
+        return {name: FakeComputer(name, latency=latency * scale, jitter=jitter * scale, seed=seed)
+                for name, latency in latencies.items()}
+
+    guessed_time, guessed_starved = run_fixed_staggers(fresh_vms(), staggers, scale)
+    safe_time, safe_starved = run_fixed_staggers(fresh_vms(), safe_staggers, scale)
+
+    # New approach: each stage starts the moment its inputs exist
+    vms = fresh_vms()
+    scheduler = StageScheduler()
+    scheduler.add_stage('vm1', vms['vm1'].prompt, args=("vm1 task",))
+    scheduler.add_stage('vm2', vms['vm2'].prompt, args=("vm2 task",), depends_on=['vm1'])
+    scheduler.add_stage('vm3', vms['vm3'].prompt, args=("vm3 task",), depends_on=['vm1', 'vm2'])
+    scheduler.run()
+    dag_time = (scheduler.finished_at - scheduler.started_at) / scale
+    path_time = scheduler.critical_path()[0] / scale
+
+    print("\n🧪 SCHEDULER BENCHMARK (simulated seconds):")
+    print(f"   Guessed staggers {staggers}: {guessed_time:.1f}s, {guessed_starved} stage(s) started before their inputs existed")
+    print(f"   Worst-case staggers {safe_staggers}: {safe_time:.1f}s, {safe_starved} starved stage(s)")
+    print(f"   Event-driven DAG: {dag_time:.1f}s, 0 starved stages (critical path {path_time:.1f}s)")
+
+    return {
+        'guessed_staggers': guessed_time,
+        'guessed_starved': guessed_starved,
+        'safe_staggers': safe_time,
+        'safe_starved': safe_starved,
+        'dag': dag_time,
+        'critical_path': path_time
+    }
+
+
+if __name__ == "__main__":
+    benchmark_scheduler()
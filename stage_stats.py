@@ -0,0 +1,92 @@
+import os
+import json
+import threading
+from collections import defaultdict, deque
+
+# Where measured stage durations survive between runs
+HISTORY_PATH = os.getenv('VM_STAGE_HISTORY', os.path.expanduser('~/.vm_orchestrator/stage_durations.json'))
+
+# Guess for a stage nobody has timed yet (the prompts ask for ~3 minutes per VM)
+DEFAULT_STAGE_SECONDS = 180.0
+
+
+def stage_key(template, stage):
+    """History key for one stage of one task-plan template, e.g. 'business/processing'"""
+    return f"{template}/{stage}"
+
+
+class DurationStats:
+    """
+    📈 STAGE DURATION STATISTICS
+
+    Keeps a rolling window of observed durations per key (a stage
+    capability, or a template/stage pair) and answers percentile
+    questions about them. With a path, samples are loaded from and
+    saved to a local JSON file so predictions improve across runs.
+    """
+
+    def __init__(self, window=200, path=None):
+        self.window = window
+        self.path = path
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def record(self, key, seconds):
+        """➕ Add one observed duration"""
+        with self.lock:
+            self.samples[key].append(seconds)
+
+    def count(self, key):
+        with self.lock:
+            return len(self.samples[key])
+
+    def percentile(self, key, percent):
+        """📊 Nearest-rank percentile of the samples for key (None if there are none)"""
+        with self.lock:
+            values = sorted(self.samples[key])
+        if not values:
+            return None
+        rank = max(1, -(-len(values) * percent // 100))
+        return values[int(rank) - 1]
+
+    def expected(self, *keys):
+        """⏱️ Median duration of the first key with history (DEFAULT_STAGE_SECONDS if none has any)"""
+        for key in keys:
+            median = self.percentile(key, 50)
+            if median is not None:
+                return median
+        return DEFAULT_STAGE_SECONDS
+
+    def predict_chain(self, template, stages):
+        """🛤️ Predicted seconds for stages that run one after another"""
+        return sum(self.expected(stage_key(template, stage), stage) for stage in stages)
+
+    def load(self):
+        """📂 Read saved samples (a corrupt file is ignored, not fatal)"""
+        try:
+            with open(self.path) as stream:
+                saved = json.load(stream)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring stage history {self.path}: {e}")
+            return
+        with self.lock:
+            for key, values in saved.items():
+                self.samples[key].extend(values)
+
+    def save(self):
+        """💾 Write samples to disk atomically (no-op without a path)"""
+        if not self.path:
+            return
+        with self.lock:
+            snapshot = {key: list(values) for key, values in self.samples.items() if values}
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, 'w') as stream:
+                json.dump(snapshot, stream)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save stage history to {self.path}: {e}")
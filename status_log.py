@@ -0,0 +1,149 @@
+import os
+import time
+import threading
+
+# Events kept in memory; older ones are dropped (offsets keep counting)
+MAX_EVENTS = int(os.getenv('VM_STATUS_LOG_MAX', 10000))
+
+# How each stage VM's status changes are printed by monitors
+VM_LABELS = {'vm1': "🔍 VM1", 'vm2': "⚙️ VM2", 'vm3': "📊 VM3"}
+
+
+class StatusEvent:
+    """📌 One status change, at a fixed offset in the log"""
+
+    def __init__(self, offset, source, message):
+        self.offset = offset
+        self.source = source
+        self.message = message
+        self.at = time.time()
+
+    def __repr__(self):
+        return f"StatusEvent({self.offset}, {self.source!r}, {self.message!r})"
+
+
+class StatusLog:
+    """
+    📜 APPEND-ONLY STATUS / EVENT LOG
+
+    Every status change is appended with a monotonically increasing
+    offset instead of overwriting a string field. Readers remember the
+    offset they have consumed up to and only ever read what came after
+    it, so a monitor's cost per update is the number of new events, not
+    the length of the history. Only the newest max_events are kept; a
+    reader that falls further behind than that skips the dropped ones.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS, labels=None):
+        self.max_events = max_events
+        # source -> how tails print it (unlabelled sources print as-is)
+        self.labels = labels or {}
+        self.changed = threading.Condition()
+        self.events = []
+        # Offset of self.events[0]
+        self.first_offset = 0
+        self.latest_by_source = {}
+
+    def append(self, source, message):
+        """✍️ Record a status change; returns its offset"""
+        with self.changed:
+            event = StatusEvent(self.first_offset + len(self.events), source, message)
+            self.events.append(event)
+            self.latest_by_source[source] = event
+            if len(self.events) > self.max_events:
+                dropped = len(self.events) - self.max_events
+                del self.events[:dropped]
+                self.first_offset += dropped
+            self.changed.notify_all()
+            return event.offset
+
+    def end(self):
+        """Offset the next event will get"""
+        with self.changed:
+            return self.first_offset + len(self.events)
+
+    def latest(self, source, default=None):
+        """Current status of a source - its most recent message"""
+        with self.changed:
+            event = self.latest_by_source.get(source)
+            return event.message if event else default
+
+    def read_from(self, offset, wait=None):
+        """
+        📖 Events at offset and after (oldest retained first if offset was dropped)
+
+        With wait, blocks up to that many seconds for at least one event.
+        """
+        deadline = time.time() + wait if wait else None
+        with self.changed:
+            while True:
+                start = max(offset - self.first_offset, 0)
+                if start < len(self.events) or deadline is None:
+                    return self.events[start:]
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return []
+                self.changed.wait(remaining)
+
+    def tail(self, offset=0):
+        """👀 A reader that picks up from offset (0 = from the start, end() = only new events)"""
+        return LogTail(self, offset)
+
+
+class LogTail:
+    """👀 One consumer's position in a StatusLog"""
+
+    def __init__(self, log, offset=0):
+        self.log = log
+        self.offset = offset
+
+    def poll(self, wait=None):
+        """Events since the last poll (blocking up to wait seconds for one)"""
+        events = self.log.read_from(self.offset, wait)
+        if events:
+            self.offset = events[-1].offset + 1
+        return events
+
+    def print_new(self, labels=None, wait=None):
+        """🖨️ Print events since the last poll, one line each; returns how many"""
+        events = self.poll(wait)
+        for event in events:
+            label = (labels or self.log.labels).get(event.source, event.source)
+            print(f"{label}: {event.message}")
+        return len(events)
+
+
+def vm_status_log(labels=VM_LABELS, **initial):
+    """📜 Status log for the three stage VMs, each starting "Ready" unless initial says otherwise"""
+    log = StatusLog(labels=labels)
+    for vm in ('vm1', 'vm2', 'vm3'):
+        log.append(vm, initial.get(vm, "Ready"))
+    return log
+
+
+def benchmark_status_log(events=100000, polls=1000):
+    """🧪 Cost per monitor poll: tailing from an offset vs re-reading the whole history"""
+    print("\n📜 STATUS LOG BENCHMARK:")
+    log = StatusLog(max_events=events)
+    batch = events // polls
+    tail = log.tail()
+
+    tail_seconds = reread_seconds = 0.0
+    for poll in range(polls):
+        for index in range(batch):
+            log.append(f"vm{index % 3 + 1}", f"step {poll}.{index}")
+        start = time.time()
+        tail.poll()
+        tail_seconds += time.time() - start
+        start = time.time()
+        # What a monitor that re-reads everything pays
+        "\n".join(event.message for event in log.read_from(0))
+        reread_seconds += time.time() - start
+
+    print(f"   {events} events over {polls} polls: tailing {tail_seconds * 1000:.1f}ms total, "
+          f"re-reading history {reread_seconds * 1000:.1f}ms total ({reread_seconds / tail_seconds:.0f}x)")
+    return tail_seconds, reread_seconds
+
+
+if __name__ == "__main__":
+    benchmark_status_log()
@@ -0,0 +1,66 @@
+import os
+import time
+
+from artifact_store import ArtifactStore
+
+RESEARCH = b"=== RESEARCH ===\n" + b"market size, growth, sources\n" * 200
+
+
+def stray_file(store, name, age=0.0):
+    """An object file with no index row, last modified age seconds ago"""
+    directory = os.path.join(store.objects, 'ff')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as blob:
+        blob.write(b"partial")
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+def test_same_content_is_stored_once_and_reference_counted(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.put(RESEARCH, job_id='job1', stage='vm1', filename='vm1_research_data.txt')
+    second = store.put(RESEARCH, job_id='job2', stage='vm1', filename='vm1_research_data.txt')
+
+    assert first == second
+    assert store.get(first) == RESEARCH
+    stats = store.stats()
+    assert (stats['blobs'], stats['references'], stats['dedup_ratio']) == (1, 2, 2.0)
+    assert stats['stored_bytes'] < len(RESEARCH)
+
+    store.release_job('job1')
+    assert store.get(first) == RESEARCH
+    store.release_job('job2')
+    assert not store.has(first)
+    assert not os.path.exists(store.blob_path(first))
+
+
+def test_finishing_a_job_releases_the_oldest_beyond_keep(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    digests = {}
+    for job in ('job1', 'job2', 'job3'):
+        digests[job] = store.put(f"deck for {job}", job_id=job, stage='vm3', filename='deck.pptx')
+        store.finish_job(job, keep=2)
+
+    assert not store.has(digests['job1'])
+    assert store.has(digests['job2']) and store.has(digests['job3'])
+    assert store.latest('deck.pptx') == digests['job3']
+
+
+def test_gc_removes_old_unindexed_files_but_not_in_flight_ones(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    kept = store.put(RESEARCH, job_id='job1')
+    crashed = stray_file(store, 'dead', age=7200)
+    crashed_temporary = stray_file(store, 'beef.1234.tmp', age=7200)
+    # Another process between writing a blob and indexing it
+    writing = stray_file(store, 'cafe.5678.tmp')
+    renamed = stray_file(store, 'cafe')
+
+    assert store.collect_garbage(grace=3600) == 2
+    assert not os.path.exists(crashed) and not os.path.exists(crashed_temporary)
+    assert os.path.exists(writing) and os.path.exists(renamed)
+    assert store.get(kept) == RESEARCH
+
+    assert store.collect_garbage(grace=0) == 2
+    assert store.get(kept) == RESEARCH
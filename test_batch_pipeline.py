@@ -0,0 +1,12 @@
+import pytest
+
+# batch_pipeline drives OnePromptOrchestrator, which needs the Orgo client installed
+pytest.importorskip("orgo")
+pytest.importorskip("dotenv")
+
+from batch_pipeline import benchmark_critical_path  # noqa: E402
+
+
+def test_critical_path_first_shortens_a_mixed_batch():
+    results = benchmark_critical_path(unit=0.1)
+    assert results["longest critical path first"] < results["submission order"]
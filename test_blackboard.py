@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from blackboard import ANALYSIS, RESEARCH, STATUS, Blackboard, VersionConflict
+from status_log import StatusLog
+
+
+def test_each_write_bumps_the_section_version():
+    board = Blackboard()
+    assert board.version(RESEARCH) == 0
+    assert board.write(RESEARCH, "draft", writer='vm1') == 1
+    assert board.write(RESEARCH, "final", writer='vm1') == 2
+    assert board.read(RESEARCH) == "final"
+    assert board.snapshot()[RESEARCH] == (2, "final")
+
+
+def test_read_blocks_until_the_requested_version_is_written():
+    board = Blackboard()
+    board.write(RESEARCH, "draft", writer='vm1')
+    threading.Timer(0.05, board.write, args=(RESEARCH, "final"), kwargs={'writer': 'vm1'}).start()
+
+    assert board.read(RESEARCH, min_version=2, timeout=5, reader='vm2') == "final"
+    section, version, reader, _ = board.handoffs[-1]
+    assert (section, version, reader) == (RESEARCH, 2, 'vm2')
+
+
+def test_read_times_out_on_a_section_nobody_writes():
+    board = Blackboard()
+    with pytest.raises(TimeoutError):
+        board.read(ANALYSIS, timeout=0.05)
+
+
+def test_conditional_write_on_a_stale_version_conflicts():
+    board = Blackboard()
+    seen = board.write(ANALYSIS, "v1 analysis", writer='vm2')
+    board.write(ANALYSIS, "v2 analysis", writer='vm3')
+
+    with pytest.raises(VersionConflict):
+        board.write(ANALYSIS, "overwrites v2", writer='vm2', expected_version=seen)
+    assert board.read(ANALYSIS) == "v2 analysis"
+    assert board.write(ANALYSIS, "v3 analysis", writer='vm2', expected_version=board.version(ANALYSIS)) == 3
+
+
+def test_concurrent_appends_never_lose_a_line():
+    board = Blackboard()
+    threads = [threading.Thread(target=board.append, args=(RESEARCH, f"INSIGHT: {index}"))
+               for index in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert board.version(RESEARCH) == 20
+    assert sorted(board.read(RESEARCH).splitlines()) == sorted(f"INSIGHT: {index}" for index in range(20))
+
+
+def test_status_section_shows_updates_since_the_board_was_created():
+    log = StatusLog()
+    log.append('vm1', "Ready")
+    board = Blackboard(status_log=log)
+    log.append('vm1', "Writing to shared memory...")
+
+    rendered = board.render()
+    assert "=== STATUS UPDATES (1) ===\nVM1: Writing to shared memory..." in rendered
+    with pytest.raises(KeyError):
+        board.write(STATUS, "not a section")
@@ -0,0 +1,93 @@
+import pytest
+
+from concurrency_limiter import AdaptiveConcurrencyLimiter, LimiterRejected
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_successes_raise_the_limit_by_about_one_per_window():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release()
+    expected = 4.0
+    for _ in range(5):
+        expected += 1 / expected
+    assert limiter.limit == pytest.approx(expected)
+    assert limiter.metrics()['limit'] == 5
+    assert limiter.metrics()['completed'] == 5
+
+
+def test_additive_increase_stops_at_max_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 3
+
+
+def test_rate_limit_halves_the_limit_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, cooldown=60)
+    for _ in range(3):
+        limiter.acquire()
+    # A burst of simultaneous 429s is one congestion event
+    for _ in range(3):
+        limiter.release(throttled=True)
+    assert limiter.limit == 4
+    assert limiter.metrics()['throttled'] == 3
+
+
+def test_first_rate_limit_caps_an_unbounded_limiter_at_half_the_load():
+    limiter = AdaptiveConcurrencyLimiter(cooldown=60)
+    for _ in range(10):
+        limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 5
+
+
+def test_decrease_never_goes_below_min_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2, cooldown=0)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(throttled=True)
+    assert limiter.limit == 2
+
+
+def test_rate_limited_prompts_are_retried():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, backoff=0, cooldown=60)
+    responses = [RateLimited("429 Too Many Requests"), "done"]
+
+    def prompt():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert limiter.call(prompt) == "done"
+    assert limiter.limit == pytest.approx(2.5)
+    assert (limiter.retries, limiter.in_flight) == (1, 0)
+
+
+def test_timed_out_prompts_shrink_the_limit_without_a_retry():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, backoff=0, cooldown=60)
+    calls = []
+
+    def prompt():
+        calls.append(1)
+        raise TimeoutError("agent session timed out")
+
+    with pytest.raises(TimeoutError):
+        limiter.call(prompt)
+    assert len(calls) == 1
+    assert limiter.limit == 2
+    assert (limiter.timeouts, limiter.retries, limiter.in_flight) == (1, 0, 0)
+
+
+def test_acquire_gives_up_after_max_wait():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_wait=0.05)
+    limiter.acquire()
+    with pytest.raises(LimiterRejected):
+        limiter.acquire()
+    assert limiter.metrics()['rejected'] == 1
@@ -0,0 +1,106 @@
+import os
+import socket
+import subprocess
+import sys
+
+from fake_computer import FakeComputer
+from job_journal import JOB, STARTED, JobJournal, owner_identity
+from stage_scheduler import StageCompletion, StageScheduler
+
+PLAN = {'vm1_research_task': "research", 'vm2_analysis_task': "analyze"}
+
+
+def pipeline(vm2):
+    """Two-stage scheduler: VM1 researches, then vm2() runs on VM2"""
+    ran = []
+    scheduler = StageScheduler(stage_timeout=None)
+    scheduler.add_stage('vm1', lambda: ran.append('vm1') or 'vm1_research_data.txt')
+    scheduler.add_stage('vm2', lambda: ran.append('vm2') or vm2(), depends_on=['vm1'])
+    return scheduler, ran
+
+
+def crash():
+    raise RuntimeError("VM2 crashed")
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_resumed_job_restores_stages_that_succeeded_on_the_same_vm():
+    journal = JobJournal(':memory:')
+    vms = {'vm1': FakeComputer("vm-a"), 'vm2': FakeComputer("vm-b")}
+
+    job_id, completed = journal.resume_or_create('interconnected', PLAN)
+    assert completed == {}
+    scheduler, _ = pipeline(crash)
+    journal.attach(scheduler, job_id, vms, completed)
+    scheduler.run()
+    journal.finish_job(job_id, scheduler.succeeded())
+
+    resumed_id, completed = journal.resume_or_create('interconnected', PLAN)
+    assert resumed_id == job_id
+    assert completed == {'vm1': ('vm1_research_data.txt', 'vm-a')}
+    scheduler, ran = pipeline(lambda: 'vm2_analysis_data.xlsx')
+    journal.attach(scheduler, resumed_id, vms, completed)
+    scheduler.run()
+    journal.finish_job(resumed_id, scheduler.succeeded())
+
+    assert ran == ['vm2']
+    assert scheduler.stages['vm1'].restored
+    assert scheduler.result('vm1') == 'vm1_research_data.txt'
+    # A finished job is never resumed
+    assert journal.resume_or_create('interconnected', PLAN)[0] != job_id
+
+
+def test_stage_from_a_different_vm_is_rerun():
+    journal = JobJournal(':memory:')
+    job_id, _ = journal.resume_or_create('interconnected', PLAN)
+    scheduler, _ = pipeline(crash)
+    journal.attach(scheduler, job_id, {'vm1': FakeComputer("vm-a"), 'vm2': FakeComputer("vm-b")})
+    scheduler.run()
+
+    _, completed = journal.resume_or_create('interconnected', PLAN)
+    scheduler, ran = pipeline(lambda: 'vm2_analysis_data.xlsx')
+    journal.attach(scheduler, job_id, {'vm1': FakeComputer("vm-new"), 'vm2': FakeComputer("vm-b")}, completed)
+    scheduler.run()
+
+    assert ran == ['vm1', 'vm2']
+    assert scheduler.stages['vm2'].completion.outcome == StageCompletion.SUCCEEDED
+
+
+def test_job_claimed_by_a_live_process_is_running_elsewhere():
+    journal = JobJournal(':memory:')
+    job_id = journal.create_job('interconnected', PLAN)
+    journal.record(job_id, JOB, STARTED, detail=f"{socket.gethostname()}:{os.getppid()}")
+
+    assert journal.running_elsewhere(job_id)
+    assert journal.unfinished_jobs('interconnected') == []
+    assert journal.resume_or_create('interconnected', PLAN)[0] != job_id
+
+
+def test_job_on_another_host_is_assumed_running():
+    journal = JobJournal(':memory:')
+    job_id = journal.create_job('interconnected', PLAN)
+    journal.record(job_id, JOB, STARTED, detail="some-other-host:1")
+    assert journal.running_elsewhere(job_id)
+
+
+def test_job_whose_process_died_is_resumable():
+    journal = JobJournal(':memory:')
+    job_id = journal.create_job('interconnected', PLAN)
+    journal.record(job_id, JOB, STARTED, detail=f"{socket.gethostname()}:{dead_pid()}")
+
+    assert not journal.running_elsewhere(job_id)
+    assert journal.unfinished_jobs('interconnected') == [job_id]
+    assert journal.resume_or_create('interconnected', PLAN)[0] == job_id
+    assert journal.owner(job_id) == owner_identity()
+
+
+def test_own_jobs_are_not_running_elsewhere():
+    journal = JobJournal(':memory:')
+    job_id, _ = journal.resume_or_create('interconnected', PLAN)
+    assert not journal.running_elsewhere(job_id)
+    assert journal.unfinished_jobs('interconnected') == [job_id]
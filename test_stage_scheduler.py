@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from stage_scheduler import StageCompletion, StageFailed, StageScheduler, StageTimeout
+
+
+def wedged(release):
+    """A stage body that blocks like a stuck agent session until release is set"""
+    def body():
+        release.wait(5)
+        return "late result"
+    return body
+
+
+def test_failed_stage_skips_everything_downstream():
+    scheduler = StageScheduler(stage_timeout=None)
+    ran = []
+
+    def broken():
+        raise RuntimeError("VM1 crashed")
+
+    scheduler.add_stage('vm1', broken)
+    scheduler.add_stage('vm2', lambda: ran.append('vm2'), depends_on=['vm1'])
+    scheduler.add_stage('vm3', lambda: ran.append('vm3'), depends_on=['vm1', 'vm2'])
+    scheduler.run()
+
+    stages = scheduler.stages
+    assert stages['vm1'].completion.outcome == StageCompletion.FAILED
+    assert stages['vm2'].completion.outcome == StageCompletion.SKIPPED
+    assert stages['vm2'].completion.reason == "upstream 'vm1' failed"
+    assert stages['vm3'].completion.outcome == StageCompletion.SKIPPED
+    assert ran == []
+    assert not scheduler.succeeded()
+    with pytest.raises(StageFailed):
+        scheduler.result('vm3')
+
+
+def test_stage_past_its_timeout_fails_and_skips_dependents():
+    release = threading.Event()
+    scheduler = StageScheduler(stage_timeout=None)
+    scheduler.add_stage('vm1', wedged(release), timeout=0.05)
+    scheduler.add_stage('vm2', lambda: "analysis", depends_on=['vm1'])
+    try:
+        scheduler.run()
+    finally:
+        release.set()
+
+    vm1 = scheduler.stages['vm1'].completion
+    assert vm1.outcome == StageCompletion.FAILED
+    assert isinstance(vm1.error, StageTimeout)
+    assert scheduler.stages['vm2'].completion.reason == "upstream 'vm1' failed"
+    # The abandoned prompt's late result is ignored
+    scheduler.stages['vm1'].thread.join(1)
+    assert vm1.outcome == StageCompletion.FAILED
+
+
+def test_job_deadline_times_out_running_stages_and_skips_the_rest():
+    release = threading.Event()
+    scheduler = StageScheduler(stage_timeout=None, deadline=0.05)
+    scheduler.add_stage('vm1', wedged(release))
+    scheduler.add_stage('vm2', lambda: "analysis", depends_on=['vm1'])
+    try:
+        scheduler.run()
+    finally:
+        release.set()
+
+    assert isinstance(scheduler.stages['vm1'].completion.error, StageTimeout)
+    assert scheduler.stages['vm2'].completion.outcome == StageCompletion.SKIPPED
+    assert scheduler.stages['vm2'].started_at is None
+
+
+def test_independent_stages_run_while_a_sibling_fails():
+    scheduler = StageScheduler(stage_timeout=None)
+
+    def broken():
+        raise RuntimeError("VM2 crashed")
+
+    scheduler.add_stage('vm1', lambda: "research")
+    scheduler.add_stage('vm2', broken)
+    scheduler.add_stage('vm3', lambda: "deck", depends_on=['vm1'])
+    scheduler.run()
+
+    assert scheduler.result('vm3') == "deck"
+    assert scheduler.stages['vm2'].completion.outcome == StageCompletion.FAILED
+
+
+def test_explicit_zero_timeout_is_not_replaced_by_the_default():
+    scheduler = StageScheduler(stage_timeout=60)
+    assert scheduler.add_stage('vm1', lambda: None, timeout=0).timeout == 0
+    assert scheduler.add_stage('vm2', lambda: None).timeout == 60
@@ -0,0 +1,66 @@
+import threading
+
+from status_log import StatusLog, vm_status_log
+
+
+def messages(events):
+    return [event.message for event in events]
+
+
+def test_tail_only_returns_events_after_its_offset():
+    log = StatusLog()
+    log.append('vm1', "Ready")
+    tail = log.tail(log.end())
+    assert tail.poll() == []
+
+    log.append('vm1', "Researching...")
+    log.append('vm2', "Waiting for VM1")
+    assert messages(tail.poll()) == ["Researching...", "Waiting for VM1"]
+    assert tail.poll() == []
+    log.append('vm1', "Research Complete ✅")
+    assert messages(tail.poll()) == ["Research Complete ✅"]
+    assert log.latest('vm1') == "Research Complete ✅"
+
+
+def test_independent_tails_keep_their_own_offsets():
+    log = StatusLog()
+    early = log.tail()
+    log.append('vm1', "one")
+    late = log.tail(log.end())
+    log.append('vm1', "two")
+    assert messages(early.poll()) == ["one", "two"]
+    assert messages(late.poll()) == ["two"]
+
+
+def test_reader_behind_the_retained_window_skips_dropped_events():
+    log = StatusLog(max_events=3)
+    tail = log.tail()
+    offsets = [log.append('vm1', f"step {index}") for index in range(5)]
+    assert offsets == [0, 1, 2, 3, 4]
+
+    events = tail.poll()
+    assert [event.offset for event in events] == [2, 3, 4]
+    assert tail.offset == 5
+
+
+def test_poll_waits_for_the_next_event():
+    log = StatusLog()
+    tail = log.tail()
+    threading.Timer(0.05, log.append, args=('vm2', "Analysis Complete ✅")).start()
+    assert messages(tail.poll(wait=5)) == ["Analysis Complete ✅"]
+    assert tail.poll(wait=0.01) == []
+
+
+def test_vm_status_log_prints_with_its_labels(capsys):
+    log = vm_status_log({'vm1': "🔍 VM1", 'vm2': "📈 VM2", 'vm3': "📋 VM3"}, vm3="Waiting for VM1 & VM2")
+    assert log.latest('vm3') == "Waiting for VM1 & VM2"
+    tail = log.tail()
+    log.append('system', "Shared memory initialized")
+
+    assert tail.print_new() == 4
+    assert capsys.readouterr().out.splitlines() == [
+        "🔍 VM1: Ready",
+        "📈 VM2: Ready",
+        "📋 VM3: Waiting for VM1 & VM2",
+        "system: Shared memory initialized",
+    ]
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from async_engine import await_completion, run_sync
+from fake_computer import FakeComputer
+from stage_stats import DurationStats, stage_key
+from vm_pool import GENERIC, PRESENTATION, PROCESSING, RESEARCH, VMPool
+
+# Past stage durations per template: creative jobs have long processing and presentation
+STAGE_SECONDS = {
+    'general': {RESEARCH: 1.0, PROCESSING: 0.2, PRESENTATION: 0.2},
+    'creative': {RESEARCH: 1.0, PROCESSING: 2.0, PRESENTATION: 2.0},
+}
+
+
+def run_pool(pool, drive):
+    """Run drive() while the pool's workers are up"""
+    async def session():
+        async with pool.running():
+            return await drive()
+
+    try:
+        return run_sync(session())
+    finally:
+        pool.engine.shutdown()
+
+
+def blocked_vm(name="vm", blocker_seconds=0.2, latency=0.01):
+    """A VM whose 'blocker' prompt keeps it busy while the rest of a batch is queued"""
+    return FakeComputer(name, latency=lambda instruction: blocker_seconds if instruction == "blocker" else latency)
+
+
+def test_mixed_batch_dispatches_longest_critical_path_first():
+    durations = DurationStats()
+    for template, stages in STAGE_SECONDS.items():
+        for capability, seconds in stages.items():
+            durations.record(stage_key(template, capability), seconds)
+    pool = VMPool(durations=durations, health_interval=None, prelaunch_apps=False)
+    computer = blocked_vm()
+    pool.add_vm(computer, [GENERIC])
+
+    async def drive():
+        blocker = await pool.submit(GENERIC, "blocker")
+        await asyncio.sleep(0.05)
+        tasks = []
+        # Submission order: every general job before every creative one
+        for index, template in enumerate(['general'] * 3 + ['creative'] * 3):
+            critical_path = durations.predict_chain(template, [PROCESSING, PRESENTATION])
+            tasks.append(await pool.submit(PROCESSING, f"{template} job {index}", template=template,
+                                           critical_path=critical_path))
+        await asyncio.gather(*[await_completion(task.completion) for task in [blocker] + tasks])
+
+    run_pool(pool, drive)
+    order = ['creative' if 'creative' in prompt else 'general' for prompt in computer.prompts[1:]]
+    assert order == ['creative'] * 3 + ['general'] * 3
+
+
+def test_urgent_stages_dispatch_earliest_deadline_first():
+    pool = VMPool(health_interval=None, prelaunch_apps=False, urgent_slack=60)
+    computer = blocked_vm()
+    pool.add_vm(computer, [GENERIC])
+
+    async def drive():
+        blocker = await pool.submit(GENERIC, "blocker")
+        await asyncio.sleep(0.05)
+        now = time.time()
+        tasks = [await pool.submit(GENERIC, "no deadline", critical_path=100.0)]
+        for seconds in (30, 10, 20):
+            tasks.append(await pool.submit(GENERIC, f"due in {seconds}s", deadline=now + seconds))
+        await asyncio.gather(*[await_completion(task.completion) for task in [blocker] + tasks])
+
+    run_pool(pool, drive)
+    assert computer.prompts[1:] == ["due in 10s", "due in 20s", "due in 30s", "no deadline"]
+
+
+def test_straggling_stage_is_hedged_onto_an_idle_vm():
+    durations = DurationStats()
+    for _ in range(5):
+        durations.record(RESEARCH, 0.05)
+    pool = VMPool(hedge_percentile=90, durations=durations, health_interval=None, prelaunch_apps=False)
+    pool.add_vm(FakeComputer("slow", latency=0.5), [RESEARCH])
+    fast = FakeComputer("fast", latency=0.01)
+
+    async def drive():
+        task = await pool.submit(RESEARCH, "research")
+        await asyncio.sleep(0.01)
+        # Joins after the slow VM took the stage, so only a hedge can run it here
+        pool.add_vm(fast, [RESEARCH])
+        await await_completion(task.completion)
+        return task
+
+    task = run_pool(pool, drive)
+    assert task.completion.succeeded()
+    assert task.vm_name == "fast"
+    assert fast.prompts == ["research"]
+    assert (pool.hedges_fired, pool.hedge_wins) == (1, 1)
+    assert task.finished_at - task.started_at < 0.5
@@ -1,9 +1,13 @@
 import os
 import time
-import threading
 from dotenv import load_dotenv
 from orgo import Computer
 
+from stage_scheduler import StageCompletion, StageScheduler
+from status_log import vm_status_log
+from vm_provisioning import provision_vms
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
@@ -12,7 +16,7 @@ class UltraOptimizedOrchestrator:
     🚀 ULTRA-OPTIMIZED VM ORCHESTRATOR - MAXIMUM SPEED
     
     SMART TIME-SAVING TECHNIQUES:
-    - Staggered VM starts (VM1 starts first, others follow data flow)
+    - Dependency-driven VM starts (each VM starts the moment its inputs exist)
     - Pre-built templates and shortcuts
     - Conditional execution (skip steps if data exists)
     - Keyboard shortcuts over mouse clicks
@@ -27,20 +31,25 @@ class UltraOptimizedOrchestrator:
         
         print("🚀 Initializing ULTRA-OPTIMIZED Orchestrator...")
         
+        reap_leaked_computers(Computer, self.api_key)
+
         # Initialize VMs but don't start tasks yet
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)   
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)  
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   
+        self.provisioning = provision_vms({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),
+        })
+        self.vm1, self.vm2, self.vm3 = self.provisioning.require('vm1', 'vm2', 'vm3')
         
         print("✅ All VMs ready for ULTRA-FAST execution!")
         
-        self.vm1_status = "Ready"
-        self.vm2_status = "Ready"
-        self.vm3_status = "Ready"
+        # Status tracking
+        self.status_log = vm_status_log()
     
     def smart_orchestrate(self, user_prompt):
         """🧠 SMART ORCHESTRATION with time-saving optimizations"""
         
+        self.provisioning.accept_task()
         print(f"\n🧠 ULTRA-FAST ORCHESTRATION: '{user_prompt}'")
         print("="*80)
         
@@ -53,8 +62,8 @@ class UltraOptimizedOrchestrator:
         print(f"📊 VM3: {task_plan['vm3_focus']}")
         print("="*80)
         
-        # SMART EXECUTION: Staggered start for data flow efficiency
-        self.smart_staggered_execution(task_plan)
+        # SMART EXECUTION: Dependency-driven start for data flow efficiency
+        return self.smart_staggered_execution(task_plan)
     
     def rapid_task_analysis(self, prompt):
         """⚡ ULTRA-FAST prompt analysis"""
@@ -208,78 +217,92 @@ class UltraOptimizedOrchestrator:
         }
     
     def smart_staggered_execution(self, task_plan):
-        """🚀 SMART STAGGERED EXECUTION for maximum efficiency"""
+        """🚀 SMART DEPENDENCY-DRIVEN EXECUTION for maximum efficiency"""
         
-        print("\n🚀 SMART STAGGERED EXECUTION:")
+        print("\n🚀 SMART DEPENDENCY-DRIVEN EXECUTION:")
         print("⚡ VM1 starts immediately (data collection)")
-        print("⏱️ VM2 starts after 1 minute (has some data to work with)")  
-        print("⏱️ VM3 starts after 2 minutes (has data from both VMs)")
+        print("⏱️ VM2 starts the moment VM1 signals its data is ready")  
+        print("⏱️ VM3 starts the moment VM1 and VM2 have both finished")
         print("="*80)
         
+        scheduler = StageScheduler()
+        
         # Start VM1 immediately
-        vm1_thread = threading.Thread(target=self.execute_vm1_ultra_fast, args=(task_plan['vm1_task'],))
-        vm1_thread.start()
+        vm1_stage = scheduler.add_stage('vm1', self.execute_vm1_ultra_fast, args=(task_plan['vm1_task'],))
         
-        # Start VM2 after short delay (can use some data from VM1)
-        time.sleep(60)  # 1 minute delay
-        vm2_thread = threading.Thread(target=self.execute_vm2_ultra_fast, args=(task_plan['vm2_task'],))
-        vm2_thread.start()
+        # Start VM2 as soon as VM1's data exists
+        vm2_stage = scheduler.add_stage('vm2', self.execute_vm2_ultra_fast, args=(task_plan['vm2_task'],),
+                                        depends_on=['vm1'])
         
-        # Start VM3 after another delay (can use data from VM1 and VM2)
-        time.sleep(60)  # Another 1 minute delay
-        vm3_thread = threading.Thread(target=self.execute_vm3_ultra_fast, args=(task_plan['vm3_task'],))
-        vm3_thread.start()
+        # Start VM3 as soon as data from VM1 and VM2 exists
+        vm3_stage = scheduler.add_stage('vm3', self.execute_vm3_ultra_fast, args=(task_plan['vm3_task'],),
+                                        depends_on=['vm1', 'vm2'])
+        
+        tail = self.status_log.tail(self.status_log.end())
+        scheduler.start()
         
         # Monitor with faster updates
-        self.ultra_fast_monitoring(vm1_thread, vm2_thread, vm3_thread)
+        self.ultra_fast_monitoring(tail, vm1_stage, vm2_stage, vm3_stage)
         
         # Wait for all completion
-        vm1_thread.join()
-        vm2_thread.join()
-        vm3_thread.join()
+        scheduler.wait()
+        
+        if not scheduler.succeeded():
+            print("\n⚠️ ULTRA-FAST ORCHESTRATION STOPPED EARLY!")
+            for name, stage in (('vm2', vm2_stage), ('vm3', vm3_stage)):
+                if stage.completion.outcome == StageCompletion.SKIPPED:
+                    self.status_log.append(name, f"Skipped - {stage.completion.reason}")
+            tail.print_new()
+            scheduler.print_timeline()
+            return False
         
         print("\n🎉 ULTRA-FAST ORCHESTRATION COMPLETE!")
+        scheduler.print_timeline()
         self.show_speed_summary()
+        return True
     
     def execute_vm1_ultra_fast(self, task):
         """🔍 ULTRA-FAST VM1 execution"""
-        self.vm1_status = "Speed Research..."
+        self.status_log.append('vm1', "Speed Research...")
         try:
             self.vm1.prompt(task)
-            self.vm1_status = "Research Complete ⚡"
+            self.status_log.append('vm1', "Research Complete ⚡")
         except Exception as e:
-            self.vm1_status = f"Error: {e}"
+            self.status_log.append('vm1', f"Error: {e}")
+            raise
     
     def execute_vm2_ultra_fast(self, task):
         """⚙️ ULTRA-FAST VM2 execution"""
-        self.vm2_status = "Speed Processing..."
+        self.status_log.append('vm2', "Speed Processing...")
         try:
             self.vm2.prompt(task)
-            self.vm2_status = "Processing Complete ⚡"
+            self.status_log.append('vm2', "Processing Complete ⚡")
         except Exception as e:
-            self.vm2_status = f"Error: {e}"
+            self.status_log.append('vm2', f"Error: {e}")
+            raise
     
     def execute_vm3_ultra_fast(self, task):
         """📊 ULTRA-FAST VM3 execution"""
-        self.vm3_status = "Speed Presentation..."
+        self.status_log.append('vm3', "Speed Presentation...")
         try:
             self.vm3.prompt(task)
-            self.vm3_status = "Presentation Complete ⚡"
+            self.status_log.append('vm3', "Presentation Complete ⚡")
         except Exception as e:
-            self.vm3_status = f"Error: {e}"
+            self.status_log.append('vm3', f"Error: {e}")
+            raise
     
-    def ultra_fast_monitoring(self, vm1_thread, vm2_thread, vm3_thread):
-        """📊 ULTRA-FAST monitoring"""
-        while vm1_thread.is_alive() or vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"🔍 VM1: {self.vm1_status} | ⚙️ VM2: {self.vm2_status} | 📊 VM3: {self.vm3_status}")
-            time.sleep(3)  # Even faster updates
+    def ultra_fast_monitoring(self, tail, vm1_stage, vm2_stage, vm3_stage):
+        """📊 ULTRA-FAST monitoring - prints each status change the moment it is appended"""
+        while vm1_stage.is_alive() or vm2_stage.is_alive() or vm3_stage.is_alive():
+            tail.print_new(wait=3)
+        tail.print_new()
     
     def show_speed_summary(self):
         """⚡ Show speed optimization summary"""
         print("\n⚡ ULTRA-OPTIMIZATION SUMMARY:")
         print("=" * 70)
         print("🚀 SPEED TECHNIQUES USED:")
-        print("  • Staggered execution (data flow optimization)")
+        print("  • Dependency-driven execution (no fixed start delays)")
         print("  • Keyboard shortcuts (faster than mouse)")
         print("  • Pre-built templates (no setup time)")
         print("  • Minimal content targets (2-4 minutes per VM)")
@@ -289,10 +312,9 @@ class UltraOptimizedOrchestrator:
     
     def cleanup(self):
         """🧹 Quick cleanup"""
+        self.provisioning.print_startup_metrics()
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
         except Exception as e:
             print(f"⚠️ {e}")
 
@@ -312,11 +334,12 @@ def main():
             return
         
         start_time = time.time()
-        orchestrator.smart_orchestrate(user_prompt)
+        succeeded = orchestrator.smart_orchestrate(user_prompt)
         end_time = time.time()
         
         print(f"\n⚡ TOTAL EXECUTION TIME: {end_time - start_time:.2f} seconds")
-        print("🏆 ULTRA-OPTIMIZATION SUCCESSFUL!")
+        if succeeded:
+            print("🏆 ULTRA-OPTIMIZATION SUCCESSFUL!")
         
     except KeyboardInterrupt:
         print("\n⚠️ Interrupted")
@@ -1,12 +1,28 @@
 import os
 import time
-import threading
 from dotenv import load_dotenv
 from orgo import Computer
 
+from stage_scheduler import StageCompletion, StageScheduler
+from status_log import vm_status_log
+from vm_files import UPLOAD_DIR, ArtifactTransfers
+from vm_provisioning import provision_vms
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
+# The file each stage saves, and the stages whose files it reads
+STAGE_OUTPUTS = {
+    'vm1': 'shared_research.txt',
+    'vm2': 'shared_analysis.xlsx',
+    'vm3': 'final_interconnected_presentation.pptx',
+}
+STAGE_INPUTS = {
+    'vm2': ['vm1'],
+    'vm3': ['vm1', 'vm2'],
+}
+
 class VisibleInterconnectedOrchestrator:
     """
     🔗 VISIBLE INTERCONNECTED VM ORCHESTRATOR - FAST & VISUAL
@@ -26,10 +42,15 @@ class VisibleInterconnectedOrchestrator:
         
         print("🔗 Initializing VISIBLE INTERCONNECTED Orchestrator...")
         
+        reap_leaked_computers(Computer, self.api_key)
+
         # Initialize all 3 VMs
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Research VM
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Processing VM
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)   # Presentation VM
+        self.provisioning = provision_vms({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research VM
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing VM
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Presentation VM
+        })
+        self.vm1, self.vm2, self.vm3 = self.provisioning.require('vm1', 'vm2', 'vm3')
         
         print("✅ All 3 VMs connected for VISIBLE INTERCONNECTION!")
         
@@ -40,17 +61,19 @@ class VisibleInterconnectedOrchestrator:
         self.shared_analysis_points = ""
         
         # Status tracking
-        self.vm1_status = "Ready"
-        self.vm2_status = "Ready"
-        self.vm3_status = "Ready"
+        self.status_log = vm_status_log()
         
         # Completion flags
         self.vm1_complete = False
         self.vm2_complete = False
+        
+        # Stage outputs copied from the VM that saved them to the VMs that read them (one per run)
+        self.transfers = None
     
     def execute_visible_interconnected_workflow(self, user_prompt):
         """🔗 Execute VISIBLE interconnected workflow with real-time data sharing"""
         
+        self.provisioning.accept_task()
         print(f"\n🔗 VISIBLE INTERCONNECTED WORKFLOW: '{user_prompt}'")
         print("="*80)
         print("🎯 VISIBLE DATA FLOW PLAN:")
@@ -63,7 +86,7 @@ class VisibleInterconnectedOrchestrator:
         task_plan = self.create_fast_visible_tasks(user_prompt)
         
         # Execute with visible data handoffs
-        self.execute_fast_visible_pipeline(task_plan)
+        return self.execute_fast_visible_pipeline(task_plan)
     
     def create_fast_visible_tasks(self, prompt):
         """⚡ Create fast tasks with visible data sharing"""
@@ -98,7 +121,7 @@ class VisibleInterconnectedOrchestrator:
             FAST ANALYSIS USING VM1 DATA for: "{prompt}"
             
             VISIBLE DATA INTEGRATION (2-3 minutes max):
-            1. FIRST - Open 'shared_research.txt' and read VM1's findings
+            1. FIRST - Open 'shared_research.txt' from {UPLOAD_DIR} (already copied here) and read VM1's findings
             2. ANNOUNCE: "VM2 RECEIVED DATA FROM VM1 - STARTING ANALYSIS"
             3. Open Numbers/Excel quickly
             4. Create simple table with VM1's statistics
@@ -121,9 +144,9 @@ class VisibleInterconnectedOrchestrator:
             FAST PRESENTATION USING VM1 AND VM2 DATA for: "{prompt}"
             
             VISIBLE DATA COMPILATION (3-4 minutes max):
-            1. FIRST - Open 'shared_research.txt' and announce:
+            1. FIRST - Open 'shared_research.txt' from {UPLOAD_DIR} (already copied here) and announce:
                "VM3 RECEIVING RESEARCH DATA FROM VM1"
-            2. THEN - Open 'shared_analysis.xlsx' and announce:
+            2. THEN - Open 'shared_analysis.xlsx' from {UPLOAD_DIR} and announce:
                "VM3 RECEIVING ANALYSIS DATA FROM VM2"
             
             3. Open Keynote/PowerPoint with basic template
@@ -153,89 +176,121 @@ class VisibleInterconnectedOrchestrator:
         print("\n🚀 STARTING FAST VISIBLE INTERCONNECTED PIPELINE...")
         print("=" * 80)
         
+        # VM2 opens shared_research.txt, VM3 opens it and shared_analysis.xlsx
+        scheduler = StageScheduler()
+        vm1_stage = scheduler.add_stage('vm1', self.execute_vm1_fast, args=(task_plan['vm1_task'],))
+        vm2_stage = scheduler.add_stage('vm2', self.execute_vm2_fast, args=(task_plan['vm2_task'],),
+                                        depends_on=['vm1'])
+        vm3_stage = scheduler.add_stage('vm3', self.execute_vm3_fast, args=(task_plan['vm3_task'],),
+                                        depends_on=['vm1', 'vm2'])
+        
+        # Only files saved from here on are handed between VMs, never a previous run's copy
+        self.transfers = ArtifactTransfers()
+        
         # Step 1: VM1 Research (immediate start)
         print("📊 STEP 1: VM1 FAST RESEARCH & DATA SHARING...")
-        vm1_thread = threading.Thread(target=self.execute_vm1_fast, args=(task_plan['vm1_task'],))
-        vm1_thread.start()
+        tail = self.status_log.tail(self.status_log.end())
+        scheduler.start()
         
         # Monitor VM1 with fast updates
-        self.monitor_vm1_fast(vm1_thread)
-        
-        # Wait for VM1 completion
-        vm1_thread.join()
-        print("✅ VM1 COMPLETE - DATA READY FOR VM2 & VM3!")
-        
-        # Step 2: Start VM2 and VM3 simultaneously (both can use VM1 data)
-        print("\n📈📋 STEP 2: VM2 & VM3 USING VM1 DATA SIMULTANEOUSLY...")
+        self.monitor_vm1_fast(tail, vm1_stage)
+        vm1_stage.completion.wait()
         
-        vm2_thread = threading.Thread(target=self.execute_vm2_fast, args=(task_plan['vm2_task'],))
-        vm3_thread = threading.Thread(target=self.execute_vm3_fast, args=(task_plan['vm3_task'],))
-        
-        # Start both with slight stagger
-        vm2_thread.start()
-        time.sleep(5)  # Give VM2 slight head start
-        vm3_thread.start()
-        
-        # Monitor both with visible updates
-        self.monitor_vm2_vm3_fast(vm2_thread, vm3_thread)
+        if vm1_stage.completion.succeeded():
+            print("✅ VM1 COMPLETE - DATA READY FOR VM2 & VM3!")
+            
+            # Step 2: VM2 starts on VM1 data, VM3 the moment VM2's analysis exists
+            print("\n📈📋 STEP 2: VM2 & VM3 USING VM1 DATA AS IT LANDS...")
+            
+            # Monitor both with visible updates
+            self.monitor_vm2_vm3_fast(tail, vm2_stage, vm3_stage)
         
         # Wait for completion
-        vm2_thread.join()
-        vm3_thread.join()
+        scheduler.wait()
+        self.transfers.finish_job()
+        
+        if not scheduler.succeeded():
+            print("\n⚠️ VISIBLE INTERCONNECTED WORKFLOW STOPPED EARLY!")
+            for name, stage in (('vm2', vm2_stage), ('vm3', vm3_stage)):
+                if stage.completion.outcome == StageCompletion.SKIPPED:
+                    self.status_log.append(name, f"Skipped - {stage.completion.reason}")
+            tail.print_new()
+            scheduler.print_timeline()
+            self.transfers.print_report()
+            return False
         
         print("\n🎉 VISIBLE INTERCONNECTED WORKFLOW COMPLETE!")
+        scheduler.print_timeline()
+        self.transfers.print_report()
         self.show_interconnection_success()
+        return True
+    
+    def collect_output(self, name):
+        """⬇️ Pull the file a stage just saved off its VM, ready to hand to the stages that read it"""
+        self.transfers.pull(getattr(self, name), STAGE_OUTPUTS[name], name.upper())
+    
+    def receive_inputs(self, name):
+        """📦 Copy the files a stage reads onto its VM before its prompt starts"""
+        for source in STAGE_INPUTS[name]:
+            self.transfers.hand_off(STAGE_OUTPUTS[source], getattr(self, source), getattr(self, name),
+                                    source.upper(), name.upper())
     
     def execute_vm1_fast(self, task):
         """📊 Fast VM1 execution with data sharing"""
-        self.vm1_status = "🔍 Fast Research..."
+        self.status_log.append('vm1', "🔍 Fast Research...")
         try:
             self.vm1.prompt(task)
-            self.vm1_status = "✅ Research Complete - Data Shared"
+            self.collect_output('vm1')
+            self.status_log.append('vm1', "✅ Research Complete - Data Shared")
             self.vm1_complete = True
             print("\n🔗 VM1 → VM2 & VM3: RESEARCH DATA SHARED!")
         except Exception as e:
-            self.vm1_status = f"❌ Error: {e}"
+            self.status_log.append('vm1', f"❌ Error: {e}")
             print(f"❌ VM1 Error: {e}")
+            raise
     
     def execute_vm2_fast(self, task):
         """📈 Fast VM2 execution using VM1 data"""
-        self.vm2_status = "📊 Using VM1 Data..."
+        self.status_log.append('vm2', "📊 Using VM1 Data...")
         try:
+            self.receive_inputs('vm2')
             self.vm2.prompt(task)
-            self.vm2_status = "✅ Analysis Complete - Data Shared"
+            self.collect_output('vm2')
+            self.status_log.append('vm2', "✅ Analysis Complete - Data Shared")
             self.vm2_complete = True
             print("\n🔗 VM2 → VM3: ANALYSIS DATA SHARED!")
         except Exception as e:
-            self.vm2_status = f"❌ Error: {e}"
+            self.status_log.append('vm2', f"❌ Error: {e}")
             print(f"❌ VM2 Error: {e}")
+            raise
     
     def execute_vm3_fast(self, task):
         """📋 Fast VM3 execution using VM1 & VM2 data"""
-        self.vm3_status = "📋 Using VM1 & VM2 Data..."
+        self.status_log.append('vm3', "📋 Using VM1 & VM2 Data...")
         try:
+            self.receive_inputs('vm3')
             self.vm3.prompt(task)
-            self.vm3_status = "✅ Presentation Complete - All Data Used"
+            self.collect_output('vm3')
+            self.status_log.append('vm3', "✅ Presentation Complete - All Data Used")
             print("\n🔗 VM3: FINAL PRESENTATION CREATED USING ALL VM DATA!")
         except Exception as e:
-            self.vm3_status = f"❌ Error: {e}"
+            self.status_log.append('vm3', f"❌ Error: {e}")
             print(f"❌ VM3 Error: {e}")
+            raise
     
-    def monitor_vm1_fast(self, vm1_thread):
-        """📊 Fast monitoring of VM1"""
-        while vm1_thread.is_alive():
-            print(f"🔍 VM1: {self.vm1_status}")
-            time.sleep(3)  # Fast updates
+    def monitor_vm1_fast(self, tail, vm1_stage):
+        """📊 Fast monitoring of VM1 - status changes print the moment they are appended"""
+        while vm1_stage.is_alive():
+            tail.print_new(wait=3)
     
-    def monitor_vm2_vm3_fast(self, vm2_thread, vm3_thread):
-        """📊 Fast monitoring of VM2 and VM3"""
+    def monitor_vm2_vm3_fast(self, tail, vm2_stage, vm3_stage):
+        """📊 Fast monitoring of VM2 and VM3, carrying on from where the VM1 monitor stopped"""
         print("\n📊 MONITORING INTERCONNECTED VMs:")
-        while vm2_thread.is_alive() or vm3_thread.is_alive():
-            print(f"📈 VM2: {self.vm2_status}")
-            print(f"📋 VM3: {self.vm3_status}")
-            print("🔗 Data flowing between VMs...")
-            print("-" * 50)
-            time.sleep(4)  # Fast updates
+        while vm2_stage.is_alive() or vm3_stage.is_alive():
+            if tail.print_new(wait=4):
+                print("🔗 Data flowing between VMs...")
+                print("-" * 50)
+        tail.print_new()
     
     def show_interconnection_success(self):
         """🎉 Show visible interconnection results"""
@@ -260,10 +315,9 @@ class VisibleInterconnectedOrchestrator:
     
     def cleanup(self):
         """🧹 Fast cleanup"""
+        self.provisioning.print_startup_metrics()
         try:
-            self.vm1.destroy()
-            self.vm2.destroy()
-            self.vm3.destroy()
+            self.provisioning.release()
             print("\n✅ All VMs cleaned up!")
         except Exception as e:
             print(f"⚠️ Cleanup: {e}")
@@ -289,11 +343,12 @@ def main():
         
         # Execute the visible interconnected workflow
         start_time = time.time()
-        orchestrator.execute_visible_interconnected_workflow(user_prompt)
+        succeeded = orchestrator.execute_visible_interconnected_workflow(user_prompt)
         end_time = time.time()
         
         print(f"\n⚡ TOTAL EXECUTION TIME: {end_time - start_time:.2f} seconds")
-        print("🏆 VISIBLE INTERCONNECTED WORKFLOW COMPLETE!")
+        if succeeded:
+            print("🏆 VISIBLE INTERCONNECTED WORKFLOW COMPLETE!")
         
     except KeyboardInterrupt:
         print("\n⚠️ Workflow interrupted")
@@ -2,13 +2,19 @@ import os
 from dotenv import load_dotenv
 from orgo import Computer
 
+from concurrency_limiter import limited
+from role_session import RoleSession
+from vm_pool import RESEARCH
+
 # Load environment variables
 load_dotenv()
 
 class ResearchVM:
     def __init__(self):
         self.api_key = os.getenv('ORGO_API_KEY')
-        self.computer = Computer(project_id="yourcomputerid", api_key=self.api_key)
+        # One live session for every task this VM runs
+        self.session = RoleSession(lambda: limited(Computer(project_id="yourcomputerid", api_key=self.api_key)), RESEARCH)
+        self.computer = self.session.computer
         print("🔍 Research VM (VM1) initialized!")
     
     def research_task(self, topic, depth="comprehensive"):
@@ -37,7 +43,7 @@ class ResearchVM:
             5. Save the comprehensive report as 'research_{topic.replace(' ', '_')}.txt'
             """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ Research on {topic} completed!")
     
     def competitive_analysis(self, industry):
@@ -51,9 +57,13 @@ class ResearchVM:
         5. Save as 'competitive_analysis_{industry.replace(' ', '_')}.txt'
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ Competitive analysis for {industry} completed!")
     
+    def research_many(self, topics, depth="comprehensive"):
+        """Research several topics back to back on this VM's live session"""
+        return self.session.run_many(lambda topic: self.research_task(topic, depth), topics, label="research task")
+    
     def cleanup(self):
         self.computer.destroy()
         print("🧹 Research VM cleaned up!")
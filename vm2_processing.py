@@ -2,13 +2,19 @@ import os
 from dotenv import load_dotenv
 from orgo import Computer
 
+from concurrency_limiter import limited
+from role_session import RoleSession
+from vm_pool import PROCESSING
+
 # Load environment variables
 load_dotenv()
 
 class ProcessingVM:
     def __init__(self):
         self.api_key = os.getenv('ORGO_API_KEY')
-        self.computer = Computer(project_id="=yourcomputerid", api_key=self.api_key)
+        # One live session for every task this VM runs
+        self.session = RoleSession(lambda: limited(Computer(project_id="=yourcomputerid", api_key=self.api_key)), PROCESSING)
+        self.computer = self.session.computer
         print("⚙️ Processing VM (VM2) initialized!")
     
     def data_analysis_task(self, topic):
@@ -31,7 +37,7 @@ class ProcessingVM:
         5. Export final analysis as 'analysis_{topic.replace(' ', '_')}.xlsx'
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ Data analysis for {topic} completed!")
     
     def financial_modeling(self, business_type):
@@ -50,7 +56,7 @@ class ProcessingVM:
         5. Save as 'financial_model_{business_type.replace(' ', '_')}.xlsx'
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ Financial modeling for {business_type} completed!")
     
     def content_processing(self, content_type):
@@ -68,9 +74,17 @@ class ProcessingVM:
         5. Save both as 'processed_{content_type.replace(' ', '_')}.docx' and 'summary_{content_type.replace(' ', '_')}.docx'
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt, in_app=False)
         print(f"✅ Content processing for {content_type} completed!")
     
+    def analyze_many(self, topics):
+        """Run data analysis for several topics back to back on this VM's live session"""
+        return self.session.run_many(self.data_analysis_task, topics, label="data analysis")
+    
+    def model_many(self, business_types):
+        """Build financial models for several business types back to back on this VM's live session"""
+        return self.session.run_many(self.financial_modeling, business_types, label="financial model")
+    
     def cleanup(self):
         self.computer.destroy()
         print("🧹 Processing VM cleaned up!")
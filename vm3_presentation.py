@@ -2,13 +2,19 @@ import os
 from dotenv import load_dotenv
 from orgo import Computer
 
+from concurrency_limiter import limited
+from role_session import RoleSession
+from vm_pool import PRESENTATION
+
 # Load environment variables
 load_dotenv()
 
 class PresentationVM:
     def __init__(self):
         self.api_key = os.getenv('ORGO_API_KEY')
-        self.computer = Computer(project_id="yourcomputerid", api_key=self.api_key)
+        # One live session for every task this VM runs
+        self.session = RoleSession(lambda: limited(Computer(project_id="yourcomputerid", api_key=self.api_key)), PRESENTATION)
+        self.computer = self.session.computer
         print("📊 Presentation VM (VM3) initialized!")
     
     def create_presentation(self, topic, style="professional"):
@@ -47,7 +53,7 @@ class PresentationVM:
             5. Save as 'presentation_{topic.replace(' ', '_')}.pptx'
             """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ {style.title()} presentation for {topic} completed!")
     
     def create_dashboard(self, data_type):
@@ -66,7 +72,7 @@ class PresentationVM:
         5. Save as 'dashboard_{data_type.replace(' ', '_')}.pptx'
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ Dashboard for {data_type} completed!")
     
     def create_report(self, report_type):
@@ -87,7 +93,7 @@ class PresentationVM:
         5. Save as 'report_{report_type.replace(' ', '_')}.docx'
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt, in_app=False)
         print(f"✅ Report for {report_type} completed!")
     
     def create_infographic(self, topic):
@@ -106,9 +112,17 @@ class PresentationVM:
         5. Save as 'infographic_{topic.replace(' ', '_')}.png' and .pptx
         """
         
-        self.computer.prompt(prompt)
+        self.session.prompt(prompt)
         print(f"✅ Infographic for {topic} completed!")
     
+    def create_presentations(self, topics, style="professional"):
+        """Create presentations for several topics back to back on this VM's live session"""
+        return self.session.run_many(lambda topic: self.create_presentation(topic, style), topics, label="presentation")
+    
+    def create_dashboards(self, data_types):
+        """Create dashboards for several data types back to back on this VM's live session"""
+        return self.session.run_many(self.create_dashboard, data_types, label="dashboard")
+    
     def cleanup(self):
         self.computer.destroy()
         print("🧹 Presentation VM cleaned up!")
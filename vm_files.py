@@ -0,0 +1,265 @@
+import os
+import re
+import time
+import uuid
+import base64
+import shlex
+import hashlib
+import sqlite3
+import threading
+
+from artifact_store import artifact_store, digest_of
+
+# Agents save into the desktop user's home; search a few levels below it
+SEARCH_ROOT = "~"
+SEARCH_DEPTH = 4
+UPLOAD_DIR = "~/Desktop"
+
+# Base64 characters per bash() call when uploading, well under the per-argument limit
+UPLOAD_CHUNK = 64 * 1024
+
+# How far a VM's clock may run behind the orchestrator's when matching files saved "since" a time
+CLOCK_SLACK = float(os.getenv('VM_FILE_CLOCK_SLACK', 120))
+
+# Longest piece of user text kept in a generated filename
+SLUG_LENGTH = 40
+
+
+def safe_slug(text, length=SLUG_LENGTH):
+    """🏷️ Filename-safe tag for user text: [A-Za-z0-9_-] only, capped, plus a short hash so tags stay distinct"""
+    digest = hashlib.sha1(text.encode()).hexdigest()[:8]
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', text).strip('_')[:length]
+    return f"{slug}_{digest}" if slug else digest
+
+
+def find_command(filename, since=None):
+    """
+    Shell snippet printing the newest path matching filename on the VM
+
+    Output filenames repeat across jobs and VMs are reused, so with since
+    (orchestrator time.time()) only files modified after it - less
+    CLOCK_SLACK - count; an earlier job's copy is never picked up.
+    """
+    newer = f" -newermt @{int(since - CLOCK_SLACK)}" if since is not None else ""
+    return (f"find {SEARCH_ROOT} -maxdepth {SEARCH_DEPTH} -type f -name {shlex.quote(filename)}{newer} "
+            f"-printf '%T@ %p\\n' 2>/dev/null | sort -rn | head -n 1 | cut -d' ' -f2-")
+
+
+def read_vm_file(computer, filename, since=None):
+    """
+    📄 Fetch a file an agent saved on a VM, or None if it isn't there
+
+    Uses the computer's own read_file() when it has one (FakeComputer),
+    otherwise base64-streams the newest match (saved after since) over
+    Computer.bash().
+    """
+    if hasattr(computer, 'read_file'):
+        return computer.read_file(filename)
+
+    output = computer.bash(f'path=$({find_command(filename, since)}); [ -n "$path" ] && base64 -w0 "$path"')
+    output = (output or "").strip()
+    if not output:
+        return None
+    return base64.b64decode(output)
+
+
+def upload_path(filename):
+    """Shell path of filename in UPLOAD_DIR - where hand-offs put it and downstream prompts look"""
+    return f"{UPLOAD_DIR}/{shlex.quote(filename)}"
+
+
+def write_vm_file(computer, filename, data):
+    """💾 Place bytes on a VM as UPLOAD_DIR/filename"""
+    if isinstance(data, str):
+        data = data.encode()
+
+    if hasattr(computer, 'write_file'):
+        return computer.write_file(filename, data)
+
+    encoded = base64.b64encode(data).decode()
+    target = upload_path(filename)
+    staging = f"{UPLOAD_DIR}/.{shlex.quote(filename)}.b64"
+    computer.bash(f"mkdir -p {UPLOAD_DIR} && : > {staging}")
+    for start in range(0, len(encoded), UPLOAD_CHUNK):
+        computer.bash(f"echo -n {encoded[start:start + UPLOAD_CHUNK]} >> {staging}")
+    computer.bash(f"base64 -d {staging} > {target} && rm -f {staging}")
+
+
+def vm_file_digest(computer, filename, since=None, uploaded=False):
+    """
+    #️⃣ SHA-256 of a file on a VM without transferring it, or None if it isn't there
+
+    uploaded=True hashes exactly UPLOAD_DIR/filename instead of searching
+    for the newest match.
+    """
+    if hasattr(computer, 'read_file'):
+        data = computer.read_file(filename)
+        return digest_of(data) if data is not None else None
+
+    if uploaded:
+        output = computer.bash(f'[ -f {upload_path(filename)} ] && sha256sum {upload_path(filename)}')
+    else:
+        output = computer.bash(f'path=$({find_command(filename, since)}); [ -n "$path" ] && sha256sum "$path"')
+    output = (output or "").strip()
+    return output.split()[0] if output else None
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Transfer:
+    """📦 One artifact copied from the VM that made it to a VM that reads it"""
+
+    def __init__(self, filename, source, target, size, pull_seconds, push_seconds, skipped=False):
+        self.filename = filename
+        self.source = source
+        self.target = target
+        self.size = size
+        self.pull_seconds = pull_seconds
+        self.push_seconds = push_seconds
+        # The target already had these exact bytes, so nothing was uploaded
+        self.skipped = skipped
+
+    def seconds(self):
+        return self.pull_seconds + self.push_seconds
+
+
+class ArtifactTransfers:
+    """
+    📦 PROGRAMMATIC ARTIFACT HANDOFF BETWEEN VMs
+
+    Each VM is its own machine, so a downstream agent told to "open VM1's
+    file" has nothing to find. The orchestrator pulls a stage's named
+    outputs off the producing VM once it finishes and pushes them into
+    UPLOAD_DIR on each consuming VM before that stage's prompt starts.
+    Pulled files are cached, so fanning one out to two VMs reads it once.
+
+    Every pulled artifact also lands in the content-addressed store. A
+    file whose hash the store already has is read from local disk
+    instead of being downloaded, and a target that already holds the
+    same bytes (a resumed job, a reused VM) is not uploaded to again.
+
+    Only files saved after since (default: when this was created) are
+    pulled, so a reused VM's copy from an earlier job is never handed on.
+    """
+
+    def __init__(self, store=None, job_id=None, since=None):
+        self.lock = threading.Lock()
+        # Runs without a journaled job still get their own id, so their store references can be released
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.since = since if since is not None else time.time()
+        try:
+            self.store = store or artifact_store()
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Artifact store unavailable, transferring without it: {e}")
+            self.store = None
+
+        # filename -> (bytes, seconds the pull took, digest)
+        self.pulled = {}
+        self.transfers = []
+        self.missing = []
+        self.bytes_from_store = 0
+
+    def pull(self, computer, filename, source=None):
+        """⬇️ Fetch (once) an artifact from the VM that produced it and keep it in the store; None if it isn't there"""
+        with self.lock:
+            if filename in self.pulled:
+                return self.pulled[filename][0]
+        start = time.time()
+        data = self.pull_from_store(computer, filename)
+        if data is None:
+            data = read_vm_file(computer, filename, self.since)
+        seconds = time.time() - start
+        if data is None:
+            print(f"⚠️ {filename} not found on {source or computer} - nothing to hand off")
+            return None
+
+        digest = digest_of(data)
+        if self.store is not None:
+            try:
+                digest = self.store.put(data, job_id=self.job_id, stage=source, filename=filename)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Could not keep {filename} in the artifact store: {e}")
+        with self.lock:
+            self.pulled[filename] = (data, seconds, digest)
+        return data
+
+    def pull_from_store(self, computer, filename):
+        """Local copy of a VM file whose hash the store already has (None means download it)"""
+        if self.store is None or hasattr(computer, 'read_file'):
+            # Fake VMs read locally anyway - hashing first would not save anything
+            return None
+        digest = vm_file_digest(computer, filename, self.since)
+        if digest is None or not self.store.has(digest):
+            return None
+        data = self.store.get(digest)
+        with self.lock:
+            self.bytes_from_store += len(data)
+        return data
+
+    def hand_off(self, filename, source, target, source_name=None, target_name=None):
+        """
+        🔄 Copy filename from source to target's UPLOAD_DIR
+
+        Returns True if the file is now on target. A missing artifact is
+        recorded and reported, not raised - the consuming agent can still
+        look for it itself.
+        """
+        source_name = source_name or getattr(source, 'name', 'source')
+        target_name = target_name or getattr(target, 'name', 'target')
+        cached = filename in self.pulled
+        data = self.pull(source, filename, source_name)
+        if data is None:
+            with self.lock:
+                self.missing.append((filename, source_name, target_name))
+            return False
+        _, pulled_seconds, digest = self.pulled[filename]
+
+        start = time.time()
+        # Only the copy at the path the downstream prompt points to counts
+        skipped = vm_file_digest(target, filename, uploaded=True) == digest
+        if not skipped:
+            write_vm_file(target, filename, data)
+        push_seconds = time.time() - start
+        # The pull is only charged to the first hand-off that paid for it
+        pull_seconds = 0.0 if cached else pulled_seconds
+        transfer = Transfer(filename, source_name, target_name, len(data), pull_seconds, push_seconds, skipped)
+        with self.lock:
+            self.transfers.append(transfer)
+        print(f"📦 {filename}: {source_name} → {target_name}, {format_size(len(data))} in {transfer.seconds():.2f}s"
+              f"{' (already there, upload skipped)' if skipped else ''}")
+        return True
+
+    def finish_job(self):
+        """🏁 This run is over - let the store release the artifacts of the jobs it supersedes"""
+        if self.store is None:
+            return
+        try:
+            released, collected = self.store.finish_job(self.job_id)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Could not release superseded artifacts: {e}")
+            return
+        if released or collected:
+            print(f"🗑️ Artifact store: released {released} superseded artifact(s), {collected} orphaned blob file(s) removed")
+
+    def print_report(self):
+        if not self.transfers and not self.missing:
+            return
+        total = sum(transfer.size for transfer in self.transfers if not transfer.skipped)
+        seconds = sum(transfer.seconds() for transfer in self.transfers)
+        skipped = sum(transfer.skipped for transfer in self.transfers)
+        print(f"📦 ARTIFACT TRANSFERS: {len(self.transfers)} hand-off(s), {format_size(total)} uploaded in {seconds:.2f}s"
+              f"{f', {skipped} skipped (target already had the file)' if skipped else ''}"
+              f"{f', {format_size(self.bytes_from_store)} read from the local store' if self.bytes_from_store else ''}")
+        for transfer in self.transfers:
+            print(f"   {transfer.filename}: {transfer.source} → {transfer.target}, {format_size(transfer.size)} "
+                  f"(pull {transfer.pull_seconds:.2f}s, push {transfer.push_seconds:.2f}s"
+                  f"{', skipped' if transfer.skipped else ''})")
+        for filename, source, target in self.missing:
+            print(f"   ⚠️ {filename}: not found on {source}, {target} had to do without")
+        if self.store is not None:
+            self.store.print_status()
@@ -1,9 +1,11 @@
 import os
-import time
-import threading
 from dotenv import load_dotenv
 from orgo import Computer
 
+from stage_scheduler import StageScheduler
+from vm_provisioning import provision_vms
+from vm_registry import reap_leaked_computers
+
 # Load environment variables
 load_dotenv()
 
@@ -11,10 +13,15 @@ class VMOrchestrator:
     def __init__(self):
         self.api_key = os.getenv('ORGO_API_KEY')
         
+        reap_leaked_computers(Computer, self.api_key)
+
         # Initialize all VMs
-        self.vm1 = Computer(project_id="yourcomputerid", api_key=self.api_key)  # Research VM
-        self.vm2 = Computer(project_id="yourcomputerid", api_key=self.api_key)  # Processing VM
-        self.vm3 = Computer(project_id="yourcomputerid", api_key=self.api_key)  # Presentation VM
+        self.provisioning = provision_vms({
+            'vm1': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Research VM
+            'vm2': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Processing VM
+            'vm3': lambda: Computer(project_id="yourcomputerid", api_key=self.api_key),  # Presentation VM
+        })
+        self.vm1, self.vm2, self.vm3 = self.provisioning.require('vm1', 'vm2', 'vm3')
         
         print("🚀 All VMs initialized successfully!")
         
@@ -24,40 +31,24 @@ class VMOrchestrator:
         print(f"\n📋 Starting distributed research task on: {topic}")
         print("=" * 60)
         
-        # Create threads for parallel execution
-        threads = []
+        # The three stages don't read each other's files, so none of them
+        # declares an upstream and all start immediately
+        scheduler = StageScheduler()
         
         # VM1: Research Task
-        research_thread = threading.Thread(
-            target=self.vm1_research_task, 
-            args=(topic,)
-        )
+        scheduler.add_stage('vm1_research', self.vm1_research_task, args=(topic,))
         
         # VM2: Data Processing Task  
-        processing_thread = threading.Thread(
-            target=self.vm2_processing_task, 
-            args=(topic,)
-        )
+        scheduler.add_stage('vm2_processing', self.vm2_processing_task, args=(topic,))
         
         # VM3: Presentation Task
-        presentation_thread = threading.Thread(
-            target=self.vm3_presentation_task, 
-            args=(topic,)
-        )
-        
-        # Start all tasks
-        research_thread.start()
-        time.sleep(5)  # Stagger the starts
-        processing_thread.start()
-        time.sleep(5)
-        presentation_thread.start()
-        
-        # Wait for all to complete
-        research_thread.join()
-        processing_thread.join()
-        presentation_thread.join()
+        scheduler.add_stage('vm3_presentation', self.vm3_presentation_task, args=(topic,))
+        
+        # Run all tasks and wait for them to complete
+        scheduler.run()
         
         print("\n✅ All VMs completed their tasks!")
+        scheduler.print_timeline()
         
     def vm1_research_task(self, topic):
         """VM1: Research and data gathering"""
@@ -106,10 +97,9 @@ class VMOrchestrator:
         
     def cleanup(self):
         """Clean up all VM connections"""
+        self.provisioning.print_startup_metrics()
         print("\n🧹 Cleaning up all VMs...")
-        self.vm1.destroy()
-        self.vm2.destroy() 
-        self.vm3.destroy()
+        self.provisioning.release()
         print("✅ All VMs cleaned up successfully!")
 
 def main():
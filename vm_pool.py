@@ -0,0 +1,790 @@
+import time
+import asyncio
+
+from async_engine import AsyncOrchestrationEngine, await_completion, run_sync
+from concurrency_limiter import LimitedComputer
+from fake_computer import FakeComputer
+from stage_scheduler import DEFAULT_STAGE_TIMEOUT, StageCompletion, StageTimeout
+from stage_stats import DurationStats, stage_key
+
+# VM capability tags
+RESEARCH = 'research'
+PROCESSING = 'processing'
+PRESENTATION = 'presentation'
+GENERIC = 'generic'
+
+# Stages whose deadline is closer than this (after their expected run time) jump the queue
+URGENT_SLACK = 60
+
+# Seconds between liveness probes, how long one may take, and failed probes before a VM is dropped
+HEALTH_INTERVAL = 30
+PROBE_TIMEOUT = 10
+UNHEALTHY_AFTER = 2
+
+# How many times one stage may be moved off a dead VM before it just fails
+MAX_FAILOVERS = 2
+
+# The app each stage starts by opening: (name shown to the agent, shell command that launches it)
+STAGE_APPS = {
+    RESEARCH: ('Firefox', 'firefox'),
+    PROCESSING: ('LibreOffice Calc', 'libreoffice --calc'),
+    PRESENTATION: ('LibreOffice Impress', 'libreoffice --impress'),
+}
+
+
+def launch_app(computer, capability):
+    """
+    🖥️ Open the app a capability's stages start with, without an agent session
+
+    Returns False when the Computer has no way to run it directly.
+    """
+    name, command = STAGE_APPS[capability]
+    if hasattr(computer, 'launch_app'):
+        computer.launch_app(command)
+    elif hasattr(computer, 'bash'):
+        computer.bash(f"nohup {command} >/dev/null 2>&1 &")
+    else:
+        return False
+    return True
+
+
+def probe_vm(computer):
+    """💓 Cheapest liveness check the Computer supports (no agent session); raises if the VM is gone"""
+    if hasattr(computer, 'ping'):
+        computer.ping()
+    elif hasattr(computer, 'bash'):
+        computer.bash("true")
+    elif hasattr(computer, 'screenshot'):
+        computer.screenshot()
+
+
+def app_ready_instruction(capability, instruction):
+    """Tell the agent its app is already up so it skips the launch steps"""
+    name, _ = STAGE_APPS[capability]
+    return (f"NOTE: {name} is already open and focused on this VM - "
+            f"do not launch it again, start working in it directly.\n{instruction}")
+
+
+class PooledVM:
+    """🖥️ One Computer in the pool, tagged with the stages it can run"""
+
+    def __init__(self, computer, capabilities=(GENERIC,), name=None):
+        self.computer = computer
+        self.capabilities = set(capabilities)
+        self.name = name or getattr(computer, 'name', None) or f"vm-{id(computer):x}"
+
+        self.busy = False
+        self.tasks_run = 0
+        self.busy_seconds = 0.0
+
+        # Apps known to be running, the pre-launch in progress, and startup-to-first-action timing
+        self.open_apps = set()
+        self.prelaunch = None
+        self.online_at = None
+        self.first_action_at = None
+
+        # Liveness: consecutive failed probes, the stage currently running here
+        # and the task of the prompt attempt still driving its screen
+        self.healthy = True
+        self.probe_failures = 0
+        self.current = None
+        self.attempt_of = None
+        # Taken out of the pool on purpose (e.g. scaled down)
+        self.retired = False
+
+    def can_run(self, capability):
+        """Generic VMs and generic tasks match anything"""
+        return capability == GENERIC or GENERIC in self.capabilities or capability in self.capabilities
+
+    def in_rotation(self):
+        return self.healthy and not self.retired
+
+    def home_app(self):
+        """The stage app this VM is dedicated to (None for generic or multi-stage VMs)"""
+        specialties = [capability for capability in STAGE_APPS if capability in self.capabilities]
+        return specialties[0] if len(specialties) == 1 else None
+
+
+class StageTask:
+    """📝 One queued stage prompt and its completion signal"""
+
+    def __init__(self, capability, instruction, label=None, deadline=None, template=None, critical_path=0.0):
+        self.capability = capability
+        self.instruction = instruction
+        self.label = label or capability
+        self.deadline = deadline
+        # The job's own deadline, before a per-stage timeout tightened it
+        self.job_deadline = deadline
+        self.failovers = 0
+        # Task-plan template (for duration history) and predicted seconds from here to the end of the job
+        self.template = template
+        self.critical_path = critical_path
+        self.completion = StageCompletion(self.label)
+
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.vm_name = None
+
+    def queue_wait(self):
+        """⏱️ Seconds spent waiting for a free VM"""
+        return (self.started_at or time.time()) - self.submitted_at
+
+    def time_left(self):
+        """Seconds until the deadline (None if the stage has none)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+
+
+class VMPool:
+    """
+    🏊 ELASTIC VM WORKER POOL
+
+    Holds any number of Computers tagged by capability (research,
+    processing, presentation or generic). Stage tasks go into one shared
+    queue and each VM pulls the oldest task it is able to run, so adding a
+    machine adds throughput and a slow stage only ties up its own VM.
+
+    With prelaunch_apps set, a VM dedicated to one stage opens that stage's
+    app as soon as it joins the pool (while upstream stages are still
+    running), and its prompts start with the app already focused.
+
+    With hedge_percentile set, a stage still running past that percentile
+    of its capability's past durations is duplicated onto an idle capable
+    VM; whichever copy finishes first wins and the other is abandoned.
+
+    Every stage has a deadline (stage_timeout after it starts, or an
+    earlier per-job deadline). Stages close to their deadline are handed
+    out earliest-deadline-first; a stage that misses it fails with
+    StageTimeout. A native async prompt is cancelled and its VM goes
+    straight back into rotation. A blocking prompt can't be interrupted,
+    so its VM is wedged: with replace_vm it is quarantined and replaced,
+    otherwise it only rejoins once that prompt returns.
+
+    Otherwise the stage with the longest predicted critical path left in
+    its job goes first (oldest first on ties), so long jobs are not
+    discovered at the back of the queue.
+
+    Every health_interval seconds each VM gets a cheap liveness probe. A
+    VM that fails unhealthy_after probes in a row (or one probe right
+    after a stage errored on it) leaves the rotation, and the stage it
+    was running goes back on the queue for a healthy VM. Stages only it
+    could run are handed to the remaining VMs, and with replace_vm
+    (name -> fresh Computer) a replacement is attached in the background.
+    """
+
+    def __init__(self, engine=None, hedge_percentile=None, hedge_min_samples=5,
+                 stage_timeout=DEFAULT_STAGE_TIMEOUT, urgent_slack=URGENT_SLACK, durations=None,
+                 prelaunch_apps=True, health_interval=HEALTH_INTERVAL, probe_timeout=PROBE_TIMEOUT,
+                 unhealthy_after=UNHEALTHY_AFTER, replace_vm=None):
+        self.engine = engine or AsyncOrchestrationEngine()
+        self.vms = []
+        self.pending = []
+
+        self.prelaunch_apps = prelaunch_apps
+
+        self.health_interval = health_interval
+        self.probe_timeout = probe_timeout
+        self.unhealthy_after = unhealthy_after
+        self.replace_vm = replace_vm
+        self.heartbeat_task = None
+        self.replacing = 0
+        self.quarantined = []
+        self.failovers = 0
+        self.prelaunch_seconds = []
+        self.stages_app_ready = 0
+        self.stages_app_cold = 0
+
+        self.stage_timeout = stage_timeout
+        self.urgent_slack = urgent_slack
+        self.timeouts = 0
+
+        self.durations = durations or DurationStats()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+        self.hedge_seconds_saved = 0.0
+
+        self.loop = None
+        self.condition = None
+        self.workers = []
+        self.users = 0
+        self.started_at = None
+
+    def add_vm(self, computer, capabilities=(GENERIC,), name=None):
+        """➕ Put another Computer into rotation (picked up immediately if running)"""
+        vm = PooledVM(computer, capabilities, name)
+        self.vms.append(vm)
+        if self.loop is not None:
+            self.workers.append(self.loop.create_task(self.worker(vm)))
+            vm.online_at = time.time()
+            self.start_prelaunch(vm)
+        return vm
+
+    def start_prelaunch(self, vm):
+        """🖥️ Open a dedicated VM's stage app in the background while it waits for work"""
+        capability = vm.home_app()
+        if not self.prelaunch_apps or capability is None or capability in vm.open_apps or vm.prelaunch:
+            return
+        vm.prelaunch = self.loop.create_task(self.run_prelaunch(vm, capability))
+
+    async def run_prelaunch(self, vm, capability):
+        start = time.time()
+        try:
+            if await self.engine.run_blocking(launch_app, vm.computer, capability):
+                vm.open_apps.add(capability)
+                self.prelaunch_seconds.append(time.time() - start)
+        except Exception as e:
+            print(f"⚠️ Could not pre-launch {STAGE_APPS[capability][0]} on {vm.name}: {e}")
+        finally:
+            vm.prelaunch = None
+
+    def remove_vm(self, vm):
+        """➖ Take an idle VM out of rotation (False if it is busy); the caller releases the Computer"""
+        if vm.busy or vm not in self.vms:
+            return False
+        vm.retired = True
+        self.vms.remove(vm)
+        if self.loop is not None:
+            self.loop.create_task(self.wake_workers())
+        return True
+
+    def can_serve(self, capability):
+        return any(vm.can_run(capability) for vm in self.vms)
+
+    async def start(self):
+        """🚀 Start one worker per VM (nested starts share the same workers)"""
+        self.users += 1
+        if self.users > 1:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.condition = asyncio.Condition()
+        self.started_at = time.time()
+        self.workers = [self.loop.create_task(self.worker(vm)) for vm in self.vms]
+        for vm in self.vms:
+            vm.online_at = vm.online_at or self.started_at
+            self.start_prelaunch(vm)
+        if self.health_interval:
+            self.heartbeat_task = self.loop.create_task(self.heartbeat())
+
+    async def stop(self):
+        """🛑 Stop workers once the last user is done with the pool"""
+        self.users -= 1
+        if self.users > 0:
+            return
+        background = [vm.prelaunch for vm in self.vms if vm.prelaunch]
+        if self.heartbeat_task:
+            background.append(self.heartbeat_task)
+            self.heartbeat_task = None
+        for worker in self.workers + background:
+            worker.cancel()
+        await asyncio.gather(*self.workers, *background, return_exceptions=True)
+        self.workers = []
+
+        # Nothing will ever pick these up now
+        for task in self.pending:
+            task.completion.set_failure(RuntimeError("VM pool stopped before the stage ran"))
+        self.pending = []
+        self.loop = None
+        self.condition = None
+
+    def running(self):
+        """Async context manager: `async with pool.running(): ...`"""
+        return PoolSession(self)
+
+    async def submit(self, capability, instruction, label=None, deadline=None, template=None, critical_path=0.0):
+        """📥 Queue a stage prompt (deadline: absolute time.time() for the whole job); returns its StageTask"""
+        if not self.can_serve(capability) and not self.replacing:
+            raise ValueError(f"No VM in the pool can run '{capability}' stages")
+
+        if self.condition is None:
+            raise RuntimeError("VM pool is not running - use `async with pool.running()`")
+
+        task = StageTask(capability, instruction, label, deadline, template, critical_path)
+        async with self.condition:
+            self.pending.append(task)
+            self.condition.notify_all()
+        if deadline is not None:
+            self.loop.call_later(max(task.time_left(), 0), self.expire_queued, task)
+        return task
+
+    async def run(self, capability, instruction, label=None, deadline=None, template=None, critical_path=0.0):
+        """🔁 Queue a stage prompt and wait for its result"""
+        task = await self.submit(capability, instruction, label, deadline, template, critical_path)
+        await await_completion(task.completion)
+        return task.completion.get()
+
+    def expire_queued(self, task):
+        """⏰ Fail a stage whose deadline passed before any VM picked it up"""
+        if task not in self.pending:
+            return
+        self.pending.remove(task)
+        self.timeouts += 1
+        print(f"⏰ Stage '{task.label}' missed its deadline after {task.queue_wait():.1f}s in the queue")
+        task.completion.set_failure(StageTimeout(f"Stage '{task.label}' missed its deadline while queued"))
+
+    def slack(self, task):
+        """Seconds to spare if task started now and took its usual time (None = no deadline)"""
+        if task.deadline is None:
+            return None
+        expected = (self.durations.percentile(stage_key(task.template, task.capability), 50)
+                    or self.durations.percentile(task.capability, 50) or 0.0)
+        return task.time_left() - expected
+
+    def take_task_for(self, vm):
+        """Next queued task this VM can run: urgent ones earliest-deadline-first, else longest critical path (caller holds the condition)"""
+        if vm.busy or not vm.in_rotation():
+            # Still finishing an abandoned attempt, claimed for a hedge, or out of rotation
+            return None
+        runnable = [task for task in self.pending if vm.can_run(task.capability)]
+        if not runnable:
+            return None
+        urgent = [task for task in runnable if task.deadline is not None and self.slack(task) < self.urgent_slack]
+        if urgent:
+            task = min(urgent, key=lambda task: task.deadline)
+        else:
+            task = max(runnable, key=lambda task: task.critical_path)
+        self.pending.remove(task)
+        return task
+
+    async def worker(self, vm):
+        """👷 Pull tasks for one VM until the pool stops or the VM is dropped"""
+        while vm.in_rotation():
+            async with self.condition:
+                task = self.take_task_for(vm)
+                while task is None:
+                    await self.condition.wait()
+                    if not vm.in_rotation():
+                        return
+                    task = self.take_task_for(vm)
+            await self.execute(vm, task)
+
+    async def wake_workers(self):
+        if self.condition is None:
+            return
+        async with self.condition:
+            self.condition.notify_all()
+
+    def start_attempt(self, vm, task, hedge=False):
+        """
+        ▶️ Launch one prompt attempt of task on vm
+
+        The VM stays busy until the attempt really ends, even if the stage
+        was already won by a hedge - the agent is still driving its screen.
+        """
+        vm.busy = True
+        vm.attempt_of = task
+        started = time.time()
+        attempt = asyncio.ensure_future(self.prompt_in_app(vm, task))
+
+        def finished(attempt):
+            now = time.time()
+            vm.busy = False
+            vm.attempt_of = None
+            vm.tasks_run += 1
+            vm.busy_seconds += now - started
+            if not attempt.cancelled() and attempt.exception() is None:
+                if task.capability in STAGE_APPS:
+                    # The agent opened the stage's app if it wasn't already
+                    vm.open_apps.add(task.capability)
+                self.durations.record(task.capability, now - started)
+                if task.template is not None:
+                    self.durations.record(stage_key(task.template, task.capability), now - started)
+            if not hedge and task.finished_at is not None and task.vm_name != vm.name:
+                # A hedge beat this attempt: the stage would have waited this much longer without it
+                self.hedge_seconds_saved += max(now - task.finished_at, 0.0)
+            if self.loop is not None:
+                self.loop.create_task(self.wake_workers())
+
+        attempt.add_done_callback(finished)
+        return attempt
+
+    async def prompt_in_app(self, vm, task):
+        """🤖 Prompt vm with task, telling the agent when the stage's app is already open"""
+        if vm.prelaunch:
+            # Nearly launched already - waiting beats having the agent open it again
+            await asyncio.shield(vm.prelaunch)
+
+        instruction = task.instruction
+        if task.capability in vm.open_apps:
+            instruction = app_ready_instruction(task.capability, instruction)
+            self.stages_app_ready += 1
+            if vm.first_action_at is None:
+                # The agent's first step is real work rather than opening the app
+                vm.first_action_at = time.time()
+        elif task.capability in STAGE_APPS:
+            self.stages_app_cold += 1
+        return await self.engine.prompt(vm.computer, instruction)
+
+    def startup_to_first_action(self):
+        """⏱️ Seconds from a VM first running in the pool to its first prompt that began in an open app"""
+        return {vm.name: vm.first_action_at - vm.online_at
+                for vm in self.vms if vm.first_action_at is not None}
+
+    def hedge_delay(self, capability):
+        """⏱️ Seconds after which a stage counts as a straggler (None = don't hedge)"""
+        if self.hedge_percentile is None or self.durations.count(capability) < self.hedge_min_samples:
+            return None
+        return self.durations.percentile(capability, self.hedge_percentile)
+
+    def claim_idle_vm(self, capability, exclude):
+        """Reserve an idle VM for a hedge, preferring specialists over generic VMs"""
+        idle = [vm for vm in self.vms if not vm.busy and vm not in exclude and vm.can_run(capability)]
+        if not idle:
+            return None
+        vm = min(idle, key=lambda vm: capability not in vm.capabilities)
+        vm.busy = True
+        return vm
+
+    def abandon(self, vm, attempt):
+        """
+        🗑️ Drop a losing attempt
+
+        Native async clients are cancelled outright; a blocking prompt
+        cannot be interrupted, so its VM rejoins the pool when it returns.
+        """
+        if self.engine.wrap(vm.computer).native_prompt() is not None:
+            attempt.cancel()
+
+    def abandon_unfinished(self, attempts):
+        for attempt, owner in attempts.items():
+            if not attempt.done():
+                self.abandon(owner, attempt)
+
+    async def race_attempts(self, vm, task):
+        """🏁 Run task on vm, hedging onto an idle VM if it straggles; returns (winning vm, result)"""
+        attempts = {self.start_attempt(vm, task): vm}
+        pending = set(attempts)
+        delay = self.hedge_delay(task.capability)
+        error = None
+
+        try:
+            while pending:
+                timeout = None
+                if delay is not None:
+                    timeout = max(task.started_at + delay - time.time(), 0.0)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    delay = None  # one hedge per stage
+                    hedge_vm = self.claim_idle_vm(task.capability, attempts.values())
+                    if hedge_vm is not None:
+                        hedge = self.start_attempt(hedge_vm, task, hedge=True)
+                        attempts[hedge] = hedge_vm
+                        pending.add(hedge)
+                        self.hedges_fired += 1
+                        print(f"🪞 Stage '{task.label}' straggling on {vm.name} after "
+                              f"{time.time() - task.started_at:.1f}s - hedging on {hedge_vm.name}")
+                    continue
+
+                for attempt in done:
+                    if attempt.exception() is None:
+                        self.abandon_unfinished(attempts)
+                        return attempts[attempt], attempt.result()
+                    error = attempt.exception()
+        except asyncio.CancelledError:
+            # Deadline passed or pool stopping: nobody wants these results any more
+            self.abandon_unfinished(attempts)
+            raise
+
+        raise error
+
+    async def execute(self, vm, task):
+        """Run one task on one VM and record its outcome"""
+        task.vm_name = vm.name
+        task.started_at = time.time()
+        if self.stage_timeout is not None:
+            task.deadline = min(task.job_deadline or float('inf'), task.started_at + self.stage_timeout)
+
+        race = asyncio.ensure_future(self.race_attempts(vm, task))
+        vm.current = race
+        try:
+            done, _ = await asyncio.wait([race], timeout=task.time_left())
+            if not done:
+                race.cancel()
+                await asyncio.wait([race])
+                raise StageTimeout(f"Stage '{task.label}' missed its deadline after "
+                                   f"{time.time() - task.started_at:.1f}s on {vm.name}")
+            winner, result = race.result()
+        except asyncio.CancelledError:
+            race.cancel()
+            if not vm.healthy and self.fail_over(task, vm):
+                # The VM was dropped mid-stage, not the pool stopped
+                return
+            task.completion.set_failure(RuntimeError("VM pool stopped while the stage was running"))
+            raise
+        except StageTimeout as e:
+            task.finished_at = time.time()
+            self.timeouts += 1
+            print(f"⏰ {e}")
+            task.completion.set_failure(e)
+            await self.release_wedged(task)
+        except Exception as e:
+            if not await self.check_vm(vm, immediate=True) and self.fail_over(task, vm):
+                return
+            task.finished_at = time.time()
+            task.completion.set_failure(e)
+        else:
+            task.finished_at = time.time()
+            if winner is not vm:
+                self.hedge_wins += 1
+                print(f"🏁 Hedge on {winner.name} won stage '{task.label}'")
+            task.vm_name = winner.name
+            task.completion.set_result(result)
+        finally:
+            vm.current = None
+
+    async def release_wedged(self, task):
+        """
+        🧊 Deal with VMs still running a timed-out stage's blocking prompt
+
+        With replace_vm they are quarantined and replaced, so the pool
+        doesn't run dry while prompts that may never return hold them.
+        """
+        wedged = [vm for vm in list(self.vms) if vm.busy and vm.attempt_of is task]
+        for vm in wedged:
+            if self.replace_vm is not None:
+                await self.quarantine(vm, f"is still running '{task.label}' past its deadline")
+            else:
+                print(f"🧊 {vm.name} is still running '{task.label}' past its deadline - "
+                      f"it rejoins the pool when that prompt returns")
+
+    async def heartbeat(self):
+        """💓 Probe every VM each health_interval seconds"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*[self.check_vm(vm) for vm in list(self.vms)])
+
+    async def check_vm(self, vm, immediate=False):
+        """
+        💓 Probe one VM; returns whether it is alive
+
+        Drops it from the rotation after unhealthy_after failures in a row,
+        or on the first failure when immediate (a stage just errored there).
+        """
+        if not vm.healthy:
+            return False
+        try:
+            await asyncio.wait_for(self.engine.run_blocking(probe_vm, vm.computer), self.probe_timeout)
+        except Exception as e:
+            vm.probe_failures += 1
+            if immediate or vm.probe_failures >= self.unhealthy_after:
+                await self.quarantine(vm, f"failed its health check ({str(e) or type(e).__name__})")
+            return False
+        vm.probe_failures = 0
+        return True
+
+    async def quarantine(self, vm, reason):
+        """💔 Take a dead or wedged VM out of rotation; its running stage fails over to a healthy VM"""
+        if not vm.healthy:
+            return
+        vm.healthy = False
+        self.vms.remove(vm)
+        self.quarantined.append(vm.name)
+        print(f"💔 {vm.name} {reason} - taking it out of rotation")
+
+        orphaned = {capability for capability in vm.capabilities if not self.can_serve(capability)}
+        if orphaned and self.vms:
+            for other in self.vms:
+                other.capabilities |= orphaned
+            print(f"   {', '.join(sorted(orphaned))} stages move to {', '.join(other.name for other in self.vms)}")
+
+        if vm.current is not None and not vm.current.done():
+            vm.current.cancel()
+        if self.replace_vm is not None:
+            self.replacing += 1
+            self.loop.create_task(self.replace(vm))
+        await self.wake_workers()
+
+    async def replace(self, vm):
+        """🔁 Attach a fresh VM in place of a dropped one"""
+        try:
+            computer = await self.engine.run_blocking(self.replace_vm, vm.name)
+        except Exception as e:
+            print(f"⚠️ Could not replace {vm.name}: {e}")
+            return
+        finally:
+            self.replacing -= 1
+        if computer is not None and self.loop is not None:
+            self.add_vm(computer, vm.capabilities, name=vm.name)
+            print(f"🔁 {vm.name} replaced with a fresh VM")
+            await self.wake_workers()
+
+    def fail_over(self, task, vm):
+        """🔀 Put a stage from a dropped VM back on the queue (False if it should just fail)"""
+        if task.failovers >= MAX_FAILOVERS or self.condition is None:
+            return False
+        if not self.can_serve(task.capability) and not self.replacing:
+            return False
+        task.failovers += 1
+        self.failovers += 1
+        task.started_at = None
+        task.vm_name = None
+        task.deadline = task.job_deadline
+        self.pending.append(task)
+        if task.deadline is not None:
+            # Re-arm the queued deadline; the one set at submit may already have fired while it ran
+            self.loop.call_later(max(task.time_left(), 0), self.expire_queued, task)
+        print(f"🔀 Stage '{task.label}' moved off {vm.name} - requeued for a healthy VM")
+        self.loop.create_task(self.wake_workers())
+        return True
+
+    def utilization(self):
+        """📊 Fraction of wall time each VM spent running prompts"""
+        elapsed = max(time.time() - (self.started_at or time.time()), 1e-9)
+        return {vm.name: min(vm.busy_seconds / elapsed, 1.0) for vm in self.vms}
+
+    def print_pool_status(self):
+        """🏊 Show queue depth and per-VM load"""
+        print(f"\n🏊 VM POOL: {len(self.vms)} VMs, {len(self.pending)} queued stage(s)")
+        utilization = self.utilization()
+        for vm in self.vms:
+            tags = ', '.join(sorted(vm.capabilities))
+            state = "busy" if vm.busy else "idle"
+            print(f"   {vm.name} [{tags}]: {state}, {vm.tasks_run} task(s), {utilization[vm.name]:.0%} utilized")
+        if self.timeouts:
+            print(f"   ⏰ {self.timeouts} stage(s) missed their deadline")
+        if self.quarantined:
+            print(f"   💔 Dropped unhealthy VM(s): {', '.join(self.quarantined)}; "
+                  f"{self.failovers} stage(s) failed over")
+        if self.prelaunch_seconds or self.stages_app_ready:
+            first_action = self.startup_to_first_action()
+            mean_launch = sum(self.prelaunch_seconds) / max(len(self.prelaunch_seconds), 1)
+            print(f"   🖥️ Apps pre-launched {len(self.prelaunch_seconds)}x (mean {mean_launch:.1f}s); "
+                  f"{self.stages_app_ready} stage(s) started in an open app, {self.stages_app_cold} had to open it")
+            if first_action:
+                print("   ⏱️ Startup to first action: " +
+                      ", ".join(f"{name} {seconds:.1f}s" for name, seconds in first_action.items()))
+        for limiter in {vm.computer.limiter for vm in self.vms if isinstance(vm.computer, LimitedComputer)}:
+            print("  ", end=" ")
+            limiter.print_status()
+        if self.hedge_percentile is not None:
+            print(f"   🪞 Hedging at p{self.hedge_percentile}: {self.hedges_fired} fired, "
+                  f"{self.hedge_wins} won, {self.hedge_seconds_saved:.1f}s of tail latency saved")
+
+
+class PoolSession:
+    """Keeps pool workers alive for the duration of an `async with` block"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        await self.pool.start()
+        return self.pool
+
+    async def __aexit__(self, *exc_info):
+        await self.pool.stop()
+
+
+def benchmark_pool(vm_counts=(1, 2, 4), tasks_per_stage=8, latency=0.2):
+    """🧪 Throughput of the same stage backlog as VMs are added per capability"""
+    print("\n🏊 VM POOL SCALING BENCHMARK:")
+    results = {}
+
+    for count in vm_counts:
+        pool = VMPool()
+        for capability in (RESEARCH, PROCESSING, PRESENTATION):
+            for index in range(count):
+                pool.add_vm(FakeComputer(f"{capability}-{index}", latency=latency), [capability])
+
+        async def drive():
+            async with pool.running():
+                stages = [pool.run(capability, f"{capability} task {index}")
+                          for index in range(tasks_per_stage)
+                          for capability in (RESEARCH, PROCESSING, PRESENTATION)]
+                await asyncio.gather(*stages)
+
+        start = time.time()
+        run_sync(drive())
+        elapsed = time.time() - start
+        pool.engine.shutdown()
+
+        throughput = tasks_per_stage * 3 / elapsed
+        results[count] = throughput
+        print(f"   {count} VM(s) per capability: {elapsed:.2f}s, {throughput:.1f} stages/s")
+
+    return results
+
+
+def benchmark_hedging(vms=4, waves=20, wave_size=2, latency=0.2, tail_rate=0.15, percentile=90):
+    """🧪 Stage tail latency with and without hedging on a straggler-prone pool"""
+    print("\n🪞 SPECULATIVE EXECUTION BENCHMARK:")
+    print(f"   {vms} VMs, {waves} waves of {wave_size} stages, {latency}s each, "
+          f"{tail_rate:.0%} straggle at 4x")
+    results = {}
+
+    for hedge_percentile in (None, percentile):
+        pool = VMPool(hedge_percentile=hedge_percentile)
+        for index in range(vms):
+            pool.add_vm(FakeComputer(f"vm{index}", latency=latency, jitter=latency / 4,
+                                     tail_rate=tail_rate, seed=index), [RESEARCH])
+        latencies = []
+
+        async def drive():
+            async with pool.running():
+                for wave in range(waves):
+                    tasks = [await pool.submit(RESEARCH, f"wave {wave} task {index}") for index in range(wave_size)]
+                    await asyncio.gather(*[await_completion(task.completion) for task in tasks])
+                    latencies.extend(task.finished_at - task.submitted_at for task in tasks)
+
+        run_sync(drive())
+        pool.engine.shutdown()
+
+        latencies.sort()
+        summary = {
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'max': latencies[-1],
+            'hedges': pool.hedges_fired,
+            'wins': pool.hedge_wins,
+        }
+        results[hedge_percentile] = summary
+        name = f"hedge at p{hedge_percentile}" if hedge_percentile else "no hedging"
+        print(f"   {name}: p50 {summary['p50']:.2f}s, p95 {summary['p95']:.2f}s, max {summary['max']:.2f}s "
+              f"({summary['hedges']} hedges, {summary['wins']} won)")
+
+    return results
+
+
+def benchmark_prelaunch(jobs=3, latency=0.2, app_launch_seconds=0.3):
+    """🧪 Job latency on fresh VMs with and without pre-launching each stage's app"""
+    print("\n🖥️ APP PRE-LAUNCH BENCHMARK:")
+    print(f"   {jobs} research -> processing -> presentation jobs, {latency}s per stage, "
+          f"{app_launch_seconds}s to open an app")
+    steps = {RESEARCH: "Open browser", PROCESSING: "Open spreadsheet application",
+             PRESENTATION: "Open presentation software"}
+    results = {}
+
+    for prelaunch in (False, True):
+        latencies = []
+        for job in range(jobs):
+            # Fresh VMs per job, as when they were just attached
+            pool = VMPool(prelaunch_apps=prelaunch)
+            for capability in steps:
+                pool.add_vm(FakeComputer(capability, latency=latency, app_launch_seconds=app_launch_seconds),
+                            [capability])
+
+            async def drive():
+                async with pool.running():
+                    for capability, step in steps.items():
+                        await pool.run(capability, f"1. {step}\n2. Work on job {job}")
+
+            start = time.time()
+            run_sync(drive())
+            latencies.append(time.time() - start)
+            pool.engine.shutdown()
+
+        results[prelaunch] = sum(latencies) / len(latencies)
+        name = "pre-launched apps" if prelaunch else "agent opens apps"
+        print(f"   {name}: mean job latency {results[prelaunch]:.2f}s")
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_pool()
+    benchmark_hedging()
+    benchmark_prelaunch()
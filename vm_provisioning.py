@@ -0,0 +1,240 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from concurrency_limiter import limited
+from vm_pool import RESEARCH, PROCESSING, PRESENTATION
+from vm_registry import destroy_with_retries, teardown_vms, vm_registry
+
+# How long startup waits for VMs to attach before giving up on the stragglers
+PROVISION_TIMEOUT = float(os.getenv('VM_PROVISION_TIMEOUT', 180))
+
+# Which VM normally runs which stage
+STAGE_VMS = [('vm1', RESEARCH), ('vm2', PROCESSING), ('vm3', PRESENTATION)]
+
+# A plan whose stages are expected to take this long back to back runs on one VM
+SMALL_JOB_SECONDS = float(os.getenv('VM_SMALL_JOB_SECONDS', 240))
+
+
+class ProvisioningFailed(RuntimeError):
+    """Raised when VMs an orchestrator can't run without failed to attach"""
+
+
+class Provisioning:
+    """
+    🚀 RESULT OF ATTACHING A SET OF VMs
+
+    Which machines attached (and how long each took), which failed or
+    timed out, and - once the first prompt goes out - the orchestrator's
+    startup metrics: wall time spent attaching VMs, and time from the task
+    being accepted to its first prompt (so time spent waiting on a person
+    to type the prompt counts towards neither).
+    """
+
+    def __init__(self, warm_pool=None, register=True):
+        self.warm_pool = warm_pool
+        # Record VMs we create in the persistent registry so leaks can be reaped
+        self.registry = vm_registry() if register else None
+        # Set by the first provision_vms call / accept_task
+        self.started_at = None
+        self.accepted_at = None
+        self.finished_at = None
+        self.attach_wall_seconds = 0.0
+        self.computers = {}
+        self.failures = {}
+        self.attach_seconds = {}
+
+    def complete(self):
+        return not self.failures
+
+    def require(self, *names):
+        """Computers for names, or ProvisioningFailed (releasing the ones that did attach)"""
+        missing = [name for name in names if name not in self.computers]
+        if missing:
+            self.release()
+            details = ', '.join(f"{name}: {self.failures.get(name, 'not requested')}" for name in missing)
+            raise ProvisioningFailed(f"Could not attach {', '.join(missing)} ({details})")
+        return [self.computers[name] for name in names]
+
+    def release(self):
+        """
+        🧹 Give every attached VM back to the warm pool, or tear them all
+        down concurrently; returns the TeardownReport (None with a warm pool)
+        """
+        if not self.warm_pool:
+            return teardown_vms(self.computers, registry=self.registry)
+        for name, computer in self.computers.items():
+            try:
+                self.warm_pool.give_back(computer)
+            except Exception as e:
+                print(f"⚠️ Could not release {name}: {e}")
+
+    def discard(self, computer):
+        if self.warm_pool:
+            self.warm_pool.give_back(computer)
+            return
+        destroy_with_retries(computer)
+        if self.registry:
+            self.registry.mark_destroyed(computer)
+
+    def accept_task(self):
+        """⏱️ Start the time-to-first-prompt clock: a task was just accepted"""
+        self.accepted_at = time.time()
+        for computer in self.computers.values():
+            # Prompts sent for earlier work (e.g. resumed jobs) don't count
+            if getattr(computer, 'first_prompt_at', None) is not None:
+                computer.first_prompt_at = None
+
+    def time_to_first_prompt(self):
+        """⏱️ Seconds from accepting the task (or attaching, if none was) to its first prompt (None until then)"""
+        origin = self.accepted_at or self.started_at
+        sent = [computer.first_prompt_at for computer in self.computers.values()
+                if getattr(computer, 'first_prompt_at', None) is not None]
+        return min(sent) - origin if sent and origin else None
+
+    def print_report(self, names=None, started_at=None):
+        """📋 Per-VM attach time and failures (for one batch of names, or everything)"""
+        names = list(names or list(self.computers) + list(self.failures))
+        elapsed = (self.finished_at or time.time()) - (started_at or self.started_at or time.time())
+        attached = [name for name in names if name in self.computers]
+        print(f"🚀 Attached {len(attached)}/{len(names)} VMs concurrently in {elapsed:.1f}s")
+        for name in attached:
+            print(f"   ✅ {name}: {self.attach_seconds[name]:.1f}s")
+        for name in names:
+            if name in self.failures:
+                print(f"   ❌ {name}: {self.failures[name]}")
+
+    def print_startup_metrics(self):
+        ttfp = self.time_to_first_prompt()
+        attach = self.attach_wall_seconds
+        origin = "the task was accepted" if self.accepted_at else "VMs started attaching"
+        first = f"first prompt {ttfp:.1f}s after {origin}" if ttfp is not None else "no prompt sent"
+        print(f"⏱️ Startup: VMs attached in {attach:.1f}s, {first}")
+
+
+def provision_vms(factories, timeout=PROVISION_TIMEOUT, wrap=limited, warm_pool=None, provisioning=None,
+                  register=True):
+    """
+    🚀 Attach VMs concurrently
+
+    factories: {name: zero-argument callable returning a Computer}. Every
+    factory runs at once; whatever hasn't attached after `timeout` seconds
+    is reported as failed (and destroyed if it shows up later) so startup
+    costs one round trip plus boot instead of three in a row.
+
+    With a warm_pool, VMs are leased from it (factories only run on a cold
+    lease) and release() hands them back instead of destroying them.
+    Pass an existing provisioning to attach more VMs into it, and
+    register=False for machines that aren't ours to reap (e.g. fakes).
+    """
+    provisioning = provisioning or Provisioning(warm_pool, register)
+    warm_pool = provisioning.warm_pool
+    started_at = time.time()
+    if provisioning.started_at is None:
+        provisioning.started_at = started_at
+    for name in factories:
+        provisioning.failures.pop(name, None)
+    if warm_pool:
+        factories = {name: (lambda factory=factory: warm_pool.lease(factory)) for name, factory in factories.items()}
+    executor = ThreadPoolExecutor(max_workers=max(len(factories), 1), thread_name_prefix="vm-attach")
+
+    def attach(name, factory):
+        start = time.time()
+        computer = factory()
+        provisioning.attach_seconds[name] = time.time() - start
+        if provisioning.registry and not provisioning.warm_pool:
+            # Leased VMs are the warm pool's to register
+            provisioning.registry.register(computer, name)
+        return computer
+
+    futures = {executor.submit(attach, name, factory): name for name, factory in factories.items()}
+    done, not_done = wait(futures, timeout=timeout)
+
+    def destroy_late(future):
+        # Don't leak a paid VM that finishes booting after we gave up on it
+        if future.exception() is None:
+            provisioning.discard(future.result())
+
+    for future, name in futures.items():
+        if future in not_done:
+            provisioning.failures[name] = f"timed out after {timeout:g}s"
+            future.add_done_callback(destroy_late)
+        elif future.exception() is not None:
+            provisioning.failures[name] = future.exception()
+        else:
+            computer = future.result()
+            provisioning.computers[name] = wrap(computer) if wrap else computer
+
+    executor.shutdown(wait=False)
+    provisioning.finished_at = time.time()
+    provisioning.attach_wall_seconds += provisioning.finished_at - started_at
+    provisioning.print_report(factories, started_at)
+    return provisioning
+
+
+class OnDemandVMs:
+    """
+    🪄 STAGE VMs ATTACHED ONLY ONCE A PLAN NEEDS THEM
+
+    Holds the factories for vm1..vmN and attaches the first `count` of
+    them when ensure(count) is called - typically vm1 while the prompt
+    is still being planned, and the rest only if the plan is big enough
+    to use them. Attached VMs stay attached for later jobs.
+    """
+
+    def __init__(self, factories, timeout=PROVISION_TIMEOUT, wrap=limited, warm_pool=None, register=True):
+        self.factories = dict(factories)
+        self.timeout = timeout
+        self.wrap = wrap
+        self.provisioning = Provisioning(warm_pool, register)
+        self.lock = threading.Lock()
+
+    def ensure(self, count):
+        """Attach the first `count` VMs that aren't attached yet (earlier failures are retried)"""
+        with self.lock:
+            wanted = list(self.factories)[:count]
+            missing = {name: self.factories[name] for name in wanted if name not in self.provisioning.computers}
+            if missing:
+                provision_vms(missing, self.timeout, self.wrap, provisioning=self.provisioning)
+            return self.provisioning
+
+    def replace(self, name):
+        """🔁 Swap an unhealthy VM for a freshly attached one; returns the new Computer (None if it failed)"""
+        with self.lock:
+            dead = self.provisioning.computers.pop(name, None)
+            if dead is not None:
+                # A dead VM may hang on destroy - don't wait for it (a leak stays registered)
+                threading.Thread(target=teardown_vms, args=({name: dead},),
+                                 kwargs={'registry': self.provisioning.registry}, daemon=True).start()
+            provision_vms({name: self.factories[name]}, self.timeout, self.wrap, provisioning=self.provisioning)
+            return self.provisioning.computers.get(name)
+
+
+def vms_for_plan(stage_seconds, small_job_seconds=SMALL_JOB_SECONDS):
+    """🪶 How many VMs a plan is worth: one if its stages fit in small_job_seconds back to back, else one per stage"""
+    return 1 if sum(stage_seconds) <= small_job_seconds else len(stage_seconds)
+
+
+def add_stage_vms(pool, provisioning):
+    """
+    🏊 Put the attached VMs into the pool (or update the ones already in it)
+
+    Stages whose VM failed to attach - or wasn't needed - are handed to
+    the VMs that are there, so a partial or small setup still runs every
+    stage. Safe to call again after more VMs attach.
+    """
+    orphaned = [capability for name, capability in STAGE_VMS if name not in provisioning.computers]
+    in_pool = {vm.name: vm for vm in pool.vms}
+    for name, capability in STAGE_VMS:
+        if name not in provisioning.computers:
+            continue
+        if name in in_pool:
+            in_pool[name].capabilities = {capability, *orphaned}
+        else:
+            pool.add_vm(provisioning.computers[name], [capability] + orphaned, name=name)
+
+    failed = [capability for name, capability in STAGE_VMS if name in provisioning.failures]
+    if failed:
+        print(f"⚠️ Running with {len(provisioning.computers)} VM(s): "
+              f"{', '.join(failed)} stages will share {', '.join(provisioning.computers)}")
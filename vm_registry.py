@@ -0,0 +1,212 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from concurrency_limiter import unwrap
+from job_journal import process_alive, vm_identity
+
+# Where the list of VMs this machine created survives between runs
+REGISTRY_PATH = os.getenv('VM_REGISTRY', os.path.expanduser('~/.vm_orchestrator/vms.db'))
+
+# How long one VM's teardown (all attempts) may take, and how often a failed destroy is retried
+TEARDOWN_TIMEOUT = float(os.getenv('VM_TEARDOWN_TIMEOUT', 60))
+TEARDOWN_RETRIES = 2
+
+
+class VMRegistry:
+    """
+    🗂️ PERSISTENT REGISTRY OF VMs WE CREATED
+
+    Every VM is registered (with the pid and host that created it) when it
+    attaches and marked destroyed when teardown succeeds. Anything still
+    registered whose process is gone was leaked - a crash, a kill, or a
+    destroy that kept failing - and reap() destroys it on the next start.
+    """
+
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS vms (
+                entry INTEGER PRIMARY KEY AUTOINCREMENT,
+                vm_id TEXT,
+                name TEXT,
+                host TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                destroyed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS live_vms ON vms(destroyed_at, host);
+        """)
+        # id(computer) -> registry entry, for computers created by this process
+        self.entries = {}
+        self.reaped = False
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.connection.execute(sql, params)
+            return cursor.fetchall(), cursor.lastrowid
+
+    def register(self, computer, name=None):
+        """📝 Remember a freshly created VM"""
+        computer = unwrap(computer)
+        _, entry = self.execute("INSERT INTO vms (vm_id, name, host, pid, created_at) VALUES (?, ?, ?, ?, ?)",
+                                (vm_identity(computer), name, socket.gethostname(), os.getpid(), time.time()))
+        self.entries[id(computer)] = entry
+
+    def mark_destroyed(self, computer):
+        entry = self.entries.pop(id(unwrap(computer)), None)
+        if entry is not None:
+            self.execute("UPDATE vms SET destroyed_at = ? WHERE entry = ?", (time.time(), entry))
+
+    def leaked(self):
+        """[(entry, vm_id, name)] registered on this host by processes that no longer exist"""
+        # A VM registered without an id can't be reconnected to - Computer(project_id=None) would boot a new one
+        rows, _ = self.execute("SELECT entry, vm_id, name, pid FROM vms "
+                               "WHERE destroyed_at IS NULL AND host = ? AND vm_id IS NOT NULL",
+                               (socket.gethostname(),))
+        return [(entry, vm_id, name) for entry, vm_id, name, pid in rows if not process_alive(pid)]
+
+    def live_count(self):
+        """VMs this process created that have not been destroyed yet"""
+        return len(self.entries)
+
+    def reap(self, reconnect, timeout=TEARDOWN_TIMEOUT):
+        """
+        🧟 Destroy VMs leaked by earlier runs (once per process)
+
+        reconnect: vm_id -> Computer for that VM. Returns how many were reaped.
+        """
+        if self.reaped:
+            return 0
+        self.reaped = True
+
+        by_vm = {}
+        for entry, vm_id, name in self.leaked():
+            by_vm.setdefault(vm_id, []).append(entry)
+        if not by_vm:
+            return 0
+
+        print(f"🧟 Found {len(by_vm)} VM(s) leaked by earlier runs - destroying them...")
+        reaped = 0
+        for vm_id, entries in by_vm.items():
+            try:
+                destroy_with_retries(reconnect(vm_id), deadline=time.time() + timeout)
+            except Exception as e:
+                print(f"   ⚠️ Could not reap {vm_id}: {e}")
+                continue
+            reaped += 1
+            for entry in entries:
+                self.execute("UPDATE vms SET destroyed_at = ? WHERE entry = ?", (time.time(), entry))
+        print(f"   🧟 Reaped {reaped}/{len(by_vm)} leaked VM(s)")
+        return reaped
+
+
+REGISTRY = None
+REGISTRY_LOCK = threading.Lock()
+
+
+def vm_registry():
+    """🗂️ The process-wide registry (opened on first use)"""
+    global REGISTRY
+    with REGISTRY_LOCK:
+        if REGISTRY is None:
+            REGISTRY = VMRegistry()
+        return REGISTRY
+
+
+def reap_leaked_vms(reconnect):
+    """🧟 Destroy VMs earlier runs on this machine left behind (no-op after the first call)"""
+    try:
+        return vm_registry().reap(reconnect)
+    except sqlite3.Error as e:
+        print(f"⚠️ VM registry unavailable, not reaping: {e}")
+        return 0
+
+
+def reap_leaked_computers(computer_class, api_key):
+    """🧟 reap_leaked_vms for orchestrators, reconnecting as computer_class(project_id=vm_id, api_key=api_key)"""
+    return reap_leaked_vms(lambda vm_id: computer_class(project_id=vm_id, api_key=api_key))
+
+
+def destroy_with_retries(computer, retries=TEARDOWN_RETRIES, deadline=None, backoff=1.0):
+    """🗑️ destroy() with retries and exponential backoff, giving up at deadline"""
+    for attempt in range(retries + 1):
+        try:
+            computer.destroy()
+            return
+        except Exception:
+            delay = backoff * 2 ** attempt
+            if attempt == retries or (deadline is not None and time.time() + delay > deadline):
+                raise
+            time.sleep(delay)
+
+
+class TeardownReport:
+    """🧹 What happened to each VM in one teardown"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.destroyed = []
+        self.leaked = {}
+
+    def print_report(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        total = len(self.destroyed) + len(self.leaked)
+        print(f"🧹 Destroyed {len(self.destroyed)}/{total} VMs concurrently in {elapsed:.1f}s"
+              f"{f' - {len(self.leaked)} leaked' if self.leaked else ''}")
+        for name, error in self.leaked.items():
+            print(f"   ❌ {name}: {error} (left in the registry for the next start to reap)")
+
+
+def teardown_vms(computers, timeout=TEARDOWN_TIMEOUT, retries=TEARDOWN_RETRIES, registry=None):
+    """
+    🧹 Destroy VMs concurrently, each with its own retries, within `timeout` seconds
+
+    computers: {name: Computer}. One VM failing no longer skips the
+    others; whatever could not be destroyed is reported as leaked and
+    stays registered so the next start can reap it. Pass the registry
+    the VMs were recorded in - with None (unregistered VMs, e.g. fakes)
+    no registry is touched.
+    """
+    report = TeardownReport()
+    if not computers:
+        report.finished_at = time.time()
+        return report
+
+    deadline = time.time() + timeout
+    executor = ThreadPoolExecutor(max_workers=len(computers), thread_name_prefix="vm-teardown")
+    futures = {executor.submit(destroy_with_retries, computer, retries, deadline): name
+               for name, computer in computers.items()}
+    done, not_done = wait(futures, timeout=timeout)
+
+    def destroyed_late(future, computer):
+        if future.exception() is None and registry:
+            registry.mark_destroyed(computer)
+
+    for future, name in futures.items():
+        computer = computers[name]
+        if future in not_done:
+            report.leaked[name] = f"still destroying after {timeout:g}s"
+            # A destroy that finishes after all is still taken off the registry
+            future.add_done_callback(lambda future, computer=computer: destroyed_late(future, computer))
+        elif future.exception() is not None:
+            report.leaked[name] = future.exception()
+        else:
+            report.destroyed.append(name)
+            if registry:
+                registry.mark_destroyed(computer)
+
+    executor.shutdown(wait=False)
+    report.finished_at = time.time()
+    report.print_report()
+    return report
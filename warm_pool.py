@@ -0,0 +1,271 @@
+import os
+import time
+import threading
+
+from concurrency_limiter import unwrap
+from fake_computer import FakeComputer
+from vm_registry import VMRegistry, destroy_with_retries, vm_registry
+
+# Shell command that returns a VM to a clean desktop between jobs
+RESET_COMMAND = "pkill -f firefox; pkill -f soffice; pkill -f gedit; rm -rf /tmp/.orchestrator-*"
+
+# Idle VMs kept around at least / at most, and how long an extra idle VM may sit unused
+MIN_IDLE = int(os.getenv('VM_WARM_MIN_IDLE', 0))
+MAX_IDLE = int(os.getenv('VM_WARM_MAX_IDLE', 3))
+IDLE_TIMEOUT = float(os.getenv('VM_WARM_IDLE_TIMEOUT', 10 * 60))
+
+
+def reset_computer(computer):
+    """
+    🧽 Cheap reset between leases
+
+    Closes whatever the last job left open instead of destroying the VM.
+    Saved output files stay where they are - later stages and journal
+    resumes may still read them.
+    """
+    if hasattr(computer, 'reset'):
+        computer.reset()
+    elif hasattr(computer, 'bash'):
+        computer.bash(RESET_COMMAND)
+
+
+class IdleVM:
+    """💤 A reset Computer waiting in the warm pool"""
+
+    def __init__(self, computer):
+        self.computer = computer
+        self.idle_since = time.time()
+
+    def idle_seconds(self):
+        return time.time() - self.idle_since
+
+
+class WarmVMPool:
+    """
+    ♨️ LONG-LIVED POOL OF WARM VMs
+
+    Jobs lease Computers and give them back instead of destroying them,
+    so only the first job (or a burst beyond what is idle) pays the cold
+    boot. Returned VMs are reset and parked; at most max_idle are kept,
+    at least min_idle are kept booted ahead of demand, and idle VMs
+    above min_idle are destroyed after idle_timeout seconds unused.
+    """
+
+    def __init__(self, factory, min_idle=MIN_IDLE, max_idle=MAX_IDLE, idle_timeout=IDLE_TIMEOUT,
+                 reset=reset_computer, sweep_interval=None, registry=None):
+        if min_idle > max_idle:
+            raise ValueError(f"min_idle ({min_idle}) is larger than max_idle ({max_idle})")
+        self.factory = factory
+        self.min_idle = min_idle
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.reset = reset
+        self.registry = registry or vm_registry()
+        self.sweep_interval = sweep_interval or max(1.0, min(idle_timeout / 4, 60.0))
+
+        self.lock = threading.Lock()
+        self.idle = []
+        self.leased = set()
+        self.booting = 0
+        self.closed = False
+
+        # (seconds, warm) for every lease, plus lifecycle counters
+        self.lease_latencies = []
+        self.created = 0
+        self.evicted = 0
+        self.destroyed = 0
+        self.reset_failures = 0
+
+        self.janitor_stop = threading.Event()
+        self.janitor = threading.Thread(target=self.sweep_forever, name="warm-pool-janitor", daemon=True)
+        self.janitor.start()
+        self.fill()
+
+    def boot(self, factory=None):
+        """🥶 Cold-start one Computer"""
+        computer = (factory or self.factory)()
+        self.registry.register(computer, "warm-pool")
+        with self.lock:
+            self.created += 1
+        return computer
+
+    def lease(self, factory=None):
+        """
+        🔑 A Computer for one job: the most recently returned idle VM if
+        there is one, otherwise a cold boot (with `factory` if given).
+        """
+        start = time.time()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Warm pool is closed")
+            # Most recently returned first, so the oldest idle VMs age out
+            idle = self.idle.pop() if self.idle else None
+        computer = idle.computer if idle else self.boot(factory)
+
+        with self.lock:
+            self.leased.add(id(computer))
+            self.lease_latencies.append((time.time() - start, idle is not None))
+        self.fill()
+        return computer
+
+    def give_back(self, computer):
+        """↩️ Return a leased Computer: reset and park it, or destroy it if the pool is full"""
+        computer = unwrap(computer)
+        with self.lock:
+            self.leased.discard(id(computer))
+
+        try:
+            self.reset(computer)
+        except Exception as e:
+            print(f"⚠️ Reset failed, destroying VM instead of reusing it: {e}")
+            with self.lock:
+                self.reset_failures += 1
+            self.destroy(computer)
+            self.fill()
+            return
+
+        with self.lock:
+            keep = not self.closed and len(self.idle) < self.max_idle
+            if keep:
+                self.idle.append(IdleVM(computer))
+        if not keep:
+            self.destroy(computer)
+
+    def destroy(self, computer):
+        try:
+            destroy_with_retries(computer)
+            self.registry.mark_destroyed(computer)
+        except Exception as e:
+            print(f"⚠️ Could not destroy VM, leaving it registered for the reaper: {e}")
+        with self.lock:
+            self.destroyed += 1
+
+    def fill(self):
+        """🔥 Boot VMs in the background until min_idle are idle (or booting)"""
+        with self.lock:
+            if self.closed:
+                return
+            missing = self.min_idle - len(self.idle) - self.booting
+            self.booting += max(missing, 0)
+        for _ in range(missing):
+            threading.Thread(target=self.prewarm, name="warm-pool-boot", daemon=True).start()
+
+    def prewarm(self):
+        try:
+            computer = self.boot()
+        except Exception as e:
+            print(f"⚠️ Could not pre-warm a VM: {e}")
+            with self.lock:
+                self.booting -= 1
+            return
+
+        with self.lock:
+            self.booting -= 1
+            keep = not self.closed and len(self.idle) < self.max_idle
+            if keep:
+                self.idle.append(IdleVM(computer))
+        if not keep:
+            self.destroy(computer)
+
+    def evict_idle(self):
+        """🧹 Destroy VMs idle longer than idle_timeout, keeping min_idle"""
+        with self.lock:
+            expired = []
+            # Oldest first; never dip below min_idle
+            for idle in list(self.idle):
+                if len(self.idle) <= self.min_idle:
+                    break
+                if idle.idle_seconds() >= self.idle_timeout:
+                    self.idle.remove(idle)
+                    expired.append(idle)
+            self.evicted += len(expired)
+
+        for idle in expired:
+            print(f"💤 Evicting VM idle for {idle.idle_seconds():.0f}s")
+            self.destroy(idle.computer)
+        return len(expired)
+
+    def sweep_forever(self):
+        while not self.janitor_stop.wait(self.sweep_interval):
+            self.evict_idle()
+
+    def close(self):
+        """🧹 Stop the janitor and destroy every idle VM (leased ones are destroyed when returned)"""
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        self.janitor_stop.set()
+        for entry in idle:
+            self.destroy(entry.computer)
+
+    def metrics(self):
+        """📊 Cold vs warm lease latency and pool lifecycle counts"""
+        with self.lock:
+            cold = [seconds for seconds, warm in self.lease_latencies if not warm]
+            warm = [seconds for seconds, warm in self.lease_latencies if warm]
+            return {
+                'idle': len(self.idle),
+                'leased': len(self.leased),
+                'booting': self.booting,
+                'cold_leases': len(cold),
+                'warm_leases': len(warm),
+                'mean_cold_seconds': sum(cold) / len(cold) if cold else None,
+                'mean_warm_seconds': sum(warm) / len(warm) if warm else None,
+                'created': self.created,
+                'evicted': self.evicted,
+                'destroyed': self.destroyed,
+                'reset_failures': self.reset_failures,
+            }
+
+    def print_status(self):
+        metrics = self.metrics()
+        print(f"♨️ WARM POOL: {metrics['idle']} idle, {metrics['leased']} leased, {metrics['booting']} booting "
+              f"(min {self.min_idle}, max {self.max_idle} idle)")
+
+        def mean(seconds):
+            return f"{seconds:.2f}s" if seconds is not None else "n/a"
+        print(f"   {metrics['cold_leases']} cold lease(s), mean {mean(metrics['mean_cold_seconds'])}; "
+              f"{metrics['warm_leases']} warm lease(s), mean {mean(metrics['mean_warm_seconds'])}")
+        print(f"   {metrics['created']} booted, {metrics['evicted']} evicted, {metrics['destroyed']} destroyed")
+
+
+def benchmark_warm_pool(jobs=6, vms_per_job=3, boot_seconds=0.5):
+    """🧪 Per-job startup with destroy-per-run vs leasing from a warm pool"""
+    print("\n♨️ WARM POOL BENCHMARK:")
+    print(f"   {jobs} jobs x {vms_per_job} VMs, {boot_seconds}s cold boot")
+
+    def factory():
+        time.sleep(boot_seconds)
+        return FakeComputer("warm-vm", latency=0.01)
+
+    results = {}
+    for mode in ("destroy per run", "warm pool"):
+        # Fake VMs go in a throwaway registry so the reaper never goes looking for them
+        pool = WarmVMPool(factory, max_idle=vms_per_job, registry=VMRegistry(':memory:')) if mode == "warm pool" else None
+        startups = []
+        for job in range(jobs):
+            start = time.time()
+            if pool:
+                computers = [pool.lease() for _ in range(vms_per_job)]
+            else:
+                computers = [factory() for _ in range(vms_per_job)]
+            startups.append(time.time() - start)
+
+            for computer in computers:
+                computer.prompt(f"job {job}")
+                if pool:
+                    pool.give_back(computer)
+                else:
+                    computer.destroy()
+
+        results[mode] = sum(startups) / len(startups)
+        print(f"   {mode}: mean startup {results[mode]:.2f}s per job (first job {startups[0]:.2f}s)")
+        if pool:
+            pool.print_status()
+            pool.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_warm_pool()